@@ -1,7 +1,7 @@
 import logging
 import os
 import openpyxl
-from flask import Flask, session, request, jsonify, abort
+from flask import Flask, session, request, jsonify, abort, g, has_request_context
 from flask import render_template
 import eudoxa
 from eudoxa import EudoxaManager
@@ -20,6 +20,29 @@ _STORE_DIR = os.getenv("MANAGER_STORE_DIR") or os.path.join(
 )
 os.makedirs(_STORE_DIR, exist_ok=True)
 
+# Closure backend: "numpy" (boolean matrices, default) or "python" (semi-naive)
+EudoxaManager.closure_engine = os.getenv("CLOSURE_ENGINE") or "numpy"
+
+# closure() results, by vdcm fingerprint, on disk next to the session files
+EudoxaManager.closure_cache = eudoxa.ClosureCache(
+    directory=os.getenv("CLOSURE_CACHE_DIR") or os.path.join(_STORE_DIR, "closures")
+)
+
+# Wall-clock limit (seconds) for the closure check of a workbook import
+_CLOSURE_TIME_LIMIT = float(os.getenv("CLOSURE_TIME_LIMIT") or 60)
+
+
+def _collect_closure_stats(stats):
+    """closure_hook: keep the stats for the per-request log line."""
+    if has_request_context():
+        g.setdefault("closure_stats", []).append(stats)
+    else:
+        logger.info(f"{stats}")
+
+# Rule counters and phase timings of every closure(), logged per request
+if os.getenv("CLOSURE_PROFILE"):
+    EudoxaManager.closure_hook = staticmethod(_collect_closure_stats)
+
 
 # -----------------------------------------------------------
 #  HELPERS
@@ -55,12 +78,14 @@ def load_manager_or_400():
         abort(400, description="No active project")
     try:
         with open(_store_path(sid), "r", encoding="utf-8") as f:
-            return EudoxaManager.from_dict(json.load(f))
+            mgr = EudoxaManager.from_dict(json.load(f))
     except FileNotFoundError:
         abort(400, description="No active project")
     except Exception:
         logger.exception("Failed to deserialize EudoxaManager")
         abort(400, description="Failed to load project data")
+    _attach_session(mgr, sid)
+    return mgr
 
 
 def save_manager(mgr: EudoxaManager):
@@ -69,6 +94,14 @@ def save_manager(mgr: EudoxaManager):
     sid = _get_sid()
     with open(_store_path(sid), "w", encoding="utf-8") as f:
         json.dump(mgr.to_dict(), f, ensure_ascii=False)
+    _attach_session(mgr, sid)
+
+
+def _attach_session(mgr: EudoxaManager, sid: str):
+    """Let mgr take the session's warm closure from EudoxaManager.warm_closures
+    and hand it back at the end of the request (keep_warm_closures)."""
+    mgr.session_key = sid
+    g.setdefault("managers", []).append(mgr)
 
 
 @app.get("/favicon.ico")
@@ -83,6 +116,22 @@ def favicon():
                     headers={"Cache-Control": "max-age=86400"})
 
 
+@app.after_request
+def log_closure_stats(response):
+    """Log the ClosureStats collected while handling the request."""
+    for stats in g.pop("closure_stats", ()):
+        logger.info(f"{request.method} {request.path}: {stats}")
+    return response
+
+
+@app.after_request
+def keep_warm_closures(response):
+    """Keep the warm closures of the request's managers for the next request."""
+    for mgr in g.pop("managers", ()):
+        mgr.keep_warm_closure()
+    return response
+
+
 @app.after_request
 def no_store_html(response):
     """Prevent HTML pages from being served from bfcache on back-navigation."""
@@ -227,7 +276,8 @@ def import_project():
         return {"error": "No aspect worksheets found in the file."}, 400
 
     try:
-        result = mgr.validate_and_import_workbook(wb)
+        budget = eudoxa.ClosureBudget(seconds=_CLOSURE_TIME_LIMIT)
+        result = mgr.validate_and_import_workbook(wb, budget=budget)
     except Exception:
         logger.exception("Unexpected error during import")
         return {"error": "An unexpected error occurred during import."}, 500
@@ -459,11 +509,13 @@ def get_relations(aspect_name):
     levels = list(aspect.levels.keys())
     descriptions = {name: desc for name, desc in aspect.levels.items()}
     options = eudoxa.AL_RELATION_OPTIONS
+    # closure=1: relations implied by the closure (reachability index) instead of as set
+    derived = request.args.get("closure", "0") != "0"
 
     cells = {}
     for la in levels:
         for lb in levels:
-            rel = mgr.get_aspect_level_relation(aspect_name, la, lb)
+            rel = mgr.get_aspect_level_relation(aspect_name, la, lb, derived=derived)
             cells[f"{la}|||{lb}"] = rel if rel is not NotImplemented else eudoxa.UNDEFINED
 
     return {"levels": levels, "descriptions": descriptions, "options": options, "cells": cells}, 200
@@ -563,6 +615,14 @@ def _fmt_al_coll(entry):
     )
 
 
+def _fmt_batch_coll(change, entry, fmt):
+    """A batch collision, prefixed with the change that caused it unless
+    fmt already shows that change as the origin."""
+    if entry[0] == "SETREL":
+        return fmt(entry)
+    return f"{change}: {fmt(entry)}"
+
+
 @app.patch("/api/aspects/<aspect_name>/relations/<la>/<lb>")
 def patch_relation(aspect_name, la, lb):
     mgr = load_manager_or_400()
@@ -581,9 +641,11 @@ def patch_relation(aspect_name, la, lb):
         return {"error": str(e)}, 404
 
     if colls:
+        core = mgr.conflict_core(mgr.aspect_level_relation_entries(aspect_name, la, lb, rel))
         return {
             "message": "Relation rejected",
-            "colls": [_fmt_al_coll(e) for e in colls]
+            "colls": [_fmt_al_coll(e) for e in colls],
+            "core":  [_fmt_al_tokens(c) for c in core]
         }, 409
 
     save_manager(mgr)
@@ -600,50 +662,84 @@ def batch_patch_relations(aspect_name):
     """Apply a batch of aspect level relation changes atomically.
     Body: { "changes": [{ "la": "...", "lb": "...", "relation": "..." }, ...] }
     On success:   { "adds": [...], "inferred_adds": [...] }
-    On collision: { "colls": [...] }, 409
+    On collision: { "colls": [...], "core": [...] }, 409
     """
     mgr = load_manager_or_400()
-    if aspect_name not in mgr.aspects:
-        return {"error": f"Aspect '{aspect_name}' not found"}, 404
+    triples, error = _al_batch_changes(mgr, aspect_name, request.get_json(force=True))
+    if error:
+        return error
+
+    # ── Apply all changes as one transaction; nothing changes on collision ───
+    try:
+        adds, colls, inferred_adds = mgr.try_set_aspect_level_relations(aspect_name, triples)
+    except ValueError as e:
+        return {"error": str(e)}, 404
+
+    if colls:
+        return _al_batch_colls(mgr, aspect_name, triples, colls), 409
+
+    save_manager(mgr)
+    return {
+        "adds":          [_fmt_al_entry(e) for e in adds],
+        "inferred_adds": [_fmt_al_entry(e) for e in inferred_adds]
+    }, 200
+
+
+@app.post("/api/aspects/<aspect_name>/relations/preview")
+def preview_relations(aspect_name):
+    """Dry run of /api/aspects/<name>/relations/batch: what the changes
+    would infer or collide with. Nothing is applied or saved. Body as for
+    the batch; unsets cannot be previewed.
+    Response: { "inferred_adds": [...], "colls": [...], "core": [...] }
+    """
+    mgr = load_manager_or_400()
+    triples, error = _al_batch_changes(mgr, aspect_name, request.get_json(force=True))
+    if error:
+        return error
+    try:
+        inferred_adds, colls = mgr.preview_aspect_level_relations(aspect_name, triples)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    if colls:
+        return {"inferred_adds": [], **_al_batch_colls(mgr, aspect_name, triples, colls)}, 200
+    return {"inferred_adds": [_fmt_al_entry(e) for e in inferred_adds],
+            "colls": [], "core": []}, 200
 
-    data    = request.get_json(force=True)
-    changes = data.get("changes", [])
 
+def _al_batch_changes(mgr, aspect_name, data):
+    """Validate the changes of a level relation batch body before any is
+    applied. Returns (triples, None) with (la, lb, relation) per change,
+    or (None, error_response)."""
+    if aspect_name not in mgr.aspects:
+        return None, ({"error": f"Aspect '{aspect_name}' not found"}, 404)
+    changes = data.get("changes", [])
     if not changes:
-        return {"error": "No changes provided"}, 400
+        return None, ({"error": "No changes provided"}, 400)
 
     aspect = mgr.aspects[aspect_name]
-
     for ch in changes:
         if ch.get("relation", eudoxa.UNDEFINED) not in eudoxa.AL_RELATION_OPTIONS:
-            return {"error": f"Invalid relation: {ch.get('relation')!r}"}, 400
+            return None, ({"error": f"Invalid relation: {ch.get('relation')!r}"}, 400)
         for lvl in (ch.get("la"), ch.get("lb")):
             if lvl and lvl not in aspect.levels:
-                return {"error": f"Level '{lvl}' not found in aspect '{aspect_name}'"}, 404
-
-    all_adds          = []
-    all_inferred_adds = []
-
-    for ch in changes:
-        la, lb, rel = ch["la"], ch["lb"], ch["relation"]
-        try:
-            adds, colls, inferred_adds = mgr.try_set_aspect_level_relation(
-                aspect_name, la, lb, rel
-            )
-        except ValueError as e:
-            return {"error": str(e)}, 404
+                return None, ({"error": f"Level '{lvl}' not found in aspect '{aspect_name}'"}, 404)
 
-        if colls:
-            return {"colls": [_fmt_al_coll(c) for c in colls]}, 409
+    return [(ch["la"], ch["lb"], ch["relation"]) for ch in changes], None
 
-        all_adds.extend(adds)
-        all_inferred_adds.extend(inferred_adds)
 
-    save_manager(mgr)
-    return {
-        "adds":          [_fmt_al_entry(e) for e in all_adds],
-        "inferred_adds": [_fmt_al_entry(e) for e in all_inferred_adds]
-    }, 200
+def _al_batch_colls(mgr, aspect_name, triples, colls):
+    """{colls, core} for the (k, coll_entry) collisions of a level batch."""
+    core = mgr.conflict_core([
+        e for la, lb, rel in triples[:min(k for k, _ in colls) + 1]
+        for e in mgr.aspect_level_relation_entries(aspect_name, la, lb, rel)
+    ])
+    return {"colls": [
+        _fmt_batch_coll(_fmt_al_origin("SETREL", [aspect_name, la, rel, lb]),
+                        entry, _fmt_al_coll)
+        for k, entry in colls
+        for la, lb, rel in [triples[k]]
+    ], "core": [_fmt_al_tokens(c) for c in core]}
 
 
 @app.patch("/api/aspects/<aspect_name>/levels/<level_name>")
@@ -727,6 +823,7 @@ def delete_aspect(aspect_name):
 @app.get("/api/vdiff-matrix/<an1>/<an2>")
 def get_vdiff_matrix(an1, an2):
     """Return the value-difference comparison sub-matrix for aspect pair (an1, an2).
+    Query param: closure=1 to derive order_rel from the VDCM closure (default: 0).
     Response: { row_labels, col_labels,
                 cells: [[{order_rel, raw_rel, diagonal}, ...], ...] }
     """
@@ -737,6 +834,11 @@ def get_vdiff_matrix(an1, an2):
         return {"error": f"Aspect '{an2}' not found"}, 404
 
     vdcm = mgr.vdiff_comparison_matrix
+    # closure=1: order from the reachability index instead of the set cells
+    if request.args.get("closure", "0") != "0":
+        lookup = mgr.derived_relations()
+    else:
+        lookup = lambda vd1, vd2: eudoxa.get_vdiff_relation(vdcm, vd1, vd2)
 
     def derive_order(raw_fwd, raw_bwd):
         T, F = eudoxa.TRUE, eudoxa.FALSE
@@ -758,10 +860,9 @@ def get_vdiff_matrix(an1, an2):
         row = []
         for cv in col_vdiffs:
             raw_fwd = eudoxa.get_vdiff_relation(vdcm, rv, cv)
-            raw_bwd = eudoxa.get_vdiff_relation(vdcm, cv, rv)
             diag    = (an1 == an2 and rv == cv)
             row.append({
-                "order_rel": derive_order(raw_fwd, raw_bwd),
+                "order_rel": derive_order(lookup(rv, cv), lookup(cv, rv)),
                 "raw_rel":   raw_fwd,
                 "diagonal":  diag,
             })
@@ -835,6 +936,54 @@ def get_vdiff_classification(aspect_name):
     }, 200
 
 
+@app.get("/api/undecided-ranking")
+def get_undecided_ranking():
+    """Rank undecided comparisons by how many relations answering them would
+    infer, so the most informative ones can be asked first.
+    Query params: sample (default 200), limit (default 20), seed (optional).
+    Response: { candidates, evaluated, incomplete,
+                ranking: [{vd1, vd2, level, answers, expected, worst}, ...] }
+    vd1/vd2 are [aspect, from_level, to_level] ("*" for ◬); level is
+    [aspect, la, lb] for a level relation, else null.
+    """
+    mgr = load_manager_or_400()
+    try:
+        sample = int(request.args.get("sample", 200))
+        limit = int(request.args.get("limit", 20))
+        seed = request.args.get("seed")
+        seed = int(seed) if seed is not None else None
+    except ValueError:
+        return {"error": "sample, limit and seed must be integers."}, 400
+
+    budget = eudoxa.ClosureBudget(seconds=_CLOSURE_TIME_LIMIT)
+    try:
+        result = mgr.rank_undecided(sample=sample, limit=limit, seed=seed, budget=budget)
+    except ValueError as e:
+        return {"error": str(e)}, 409
+
+    def vd_json(vd):
+        if vd.natural_zero():
+            return ["*", "*", "*"]
+        return [vd.aspect_name, vd.from_level, vd.to_level]
+
+    return {
+        "candidates": result["candidates"],
+        "evaluated":  result["evaluated"],
+        "incomplete": budget.reason,
+        "ranking": [
+            {
+                "vd1":      vd_json(r["vd1"]),
+                "vd2":      vd_json(r["vd2"]),
+                "level":    list(r["level"]) if r["level"] else None,
+                "answers":  r["answers"],
+                "expected": r["expected"],
+                "worst":    r["worst"],
+            }
+            for r in result["ranking"]
+        ],
+    }, 200
+
+
 # ── VDIFF formatting helpers (shared by single and batch endpoints) ──────────
 
 def _make_vd(asp, la, lb):
@@ -858,6 +1007,11 @@ def _fmt_entry(entry):
     return f"{origin_str} \u2192 {_fmt_tokens(result_items)}"
 
 
+def _fmt_vd_change(vd1, rel, vd2):
+    rel_label = rel if rel else "\u2014"
+    return f"Set {vd1!r} {rel_label} {vd2!r}"
+
+
 def _fmt_coll(entry):
     _, _, coll = entry  # entry is [origin_type, origin_detail, coll]
     vd1_c, old_rel, vd2_c, new_rel_c = coll
@@ -898,7 +1052,9 @@ def patch_vdiff_relation(an1, l1a, l1b, an2, l2a, l2b):
         return {"error": str(e)}, 500
 
     if colls:
-        return {"colls": [_fmt_coll(c) for c in colls]}, 409
+        core = mgr.conflict_core(mgr.vdiff_order_relation_entries(vd1, vd2, order_rel))
+        return {"colls": [_fmt_coll(c) for c in colls],
+                "core":  [_fmt_tokens(c) for c in core]}, 409
 
     save_manager(mgr)
     return {
@@ -907,67 +1063,100 @@ def patch_vdiff_relation(an1, l1a, l1b, an2, l2a, l2b):
     }, 200
 
 
-@app.post("/api/vdiff-matrix/batch")
-def batch_patch_vdiff_relations():
-    """Apply a batch of vdiff order relation changes atomically.
-    Body: { "changes": [{ "an1", "l1a", "l1b", "an2", "l2a", "l2b", "relation" }, ...] }
-    Changes are applied sequentially; if any causes a collision the whole batch
-    is aborted (manager is not saved) and 409 is returned with collision details.
-    Response on success:  { "adds": [...], "inferred_adds": [...] }
-    Response on collision: { "colls": [...] }, 409
-    """
-    mgr     = load_manager_or_400()
-    data    = request.get_json(force=True)
+def _vdiff_batch_changes(mgr, data):
+    """Validate the changes of a vdiff batch body before any is applied.
+    Returns (triples, None) with (vd1, vd2, relation) per change, or
+    (None, error_response)."""
     changes = data.get("changes", [])
-
     if not changes:
-        return {"error": "No changes provided"}, 400
+        return None, ({"error": "No changes provided"}, 400)
 
     valid_rels = (eudoxa.GT, eudoxa.GTE, eudoxa.DEQ,
                   eudoxa.LTE, eudoxa.LT, eudoxa.UNDEFINED)
-
-    # ── Validate all changes before applying any ─────────────────────────────
     for ch in changes:
         if ch.get("relation", "") not in valid_rels:
-            return {"error": f"Invalid relation: {ch.get('relation')!r}"}, 400
+            return None, ({"error": f"Invalid relation: {ch.get('relation')!r}"}, 400)
         for asp, la, lb in [(ch["an1"], ch["l1a"], ch["l1b"]),
                             (ch["an2"], ch["l2a"], ch["l2b"])]:
             if asp not in mgr.aspects:
-                return {"error": f"Aspect '{asp}' not found"}, 404
+                return None, ({"error": f"Aspect '{asp}' not found"}, 404)
             if la != "*" and la not in mgr.aspects[asp].levels:
-                return {"error": f"Level '{la}' not found in aspect '{asp}'"}, 404
+                return None, ({"error": f"Level '{la}' not found in aspect '{asp}'"}, 404)
             if lb != "*" and lb not in mgr.aspects[asp].levels:
-                return {"error": f"Level '{lb}' not found in aspect '{asp}'"}, 404
+                return None, ({"error": f"Level '{lb}' not found in aspect '{asp}'"}, 404)
 
-    # ── Apply changes sequentially; abort all on first collision ─────────────
-    all_adds          = []
-    all_inferred_adds = []
+    return [(_make_vd(ch["an1"], ch["l1a"], ch["l1b"]),
+             _make_vd(ch["an2"], ch["l2a"], ch["l2b"]),
+             ch["relation"]) for ch in changes], None
 
-    for ch in changes:
-        vd1 = _make_vd(ch["an1"], ch["l1a"], ch["l1b"])
-        vd2 = _make_vd(ch["an2"], ch["l2a"], ch["l2b"])
-        try:
-            adds, colls, inferred_adds = mgr.try_set_vdiff_order_relation(
-                vd1, vd2, ch["relation"]
-            )
-        except Exception as e:
-            logger.exception("Failed to set vdiff relation in batch")
-            return {"error": str(e)}, 500
 
-        if colls:
-            # Collision — abort entire batch (manager not saved)
-            return {"colls": [_fmt_coll(c) for c in colls]}, 409
+def _vdiff_batch_colls(mgr, triples, colls):
+    """{colls, core} for the (k, coll_entry) collisions of a vdiff batch."""
+    core = mgr.conflict_core([
+        e for vd1, vd2, rel in triples[:min(k for k, _ in colls) + 1]
+        for e in mgr.vdiff_order_relation_entries(vd1, vd2, rel)
+    ])
+    return {"colls": [
+        _fmt_batch_coll(_fmt_vd_change(vd1, rel, vd2), entry, _fmt_coll)
+        for k, entry in colls
+        for vd1, vd2, rel in [triples[k]]
+    ], "core": [_fmt_tokens(c) for c in core]}
+
+
+@app.post("/api/vdiff-matrix/batch")
+def batch_patch_vdiff_relations():
+    """Apply a batch of vdiff order relation changes atomically.
+    Body: { "changes": [{ "an1", "l1a", "l1b", "an2", "l2a", "l2b", "relation" }, ...] }
+    Changes are applied sequentially; if any causes a collision the whole batch
+    is aborted (manager is not saved) and 409 is returned with collision details.
+    Response on success:  { "adds": [...], "inferred_adds": [...] }
+    Response on collision: { "colls": [...], "core": [...] }, 409
+    """
+    mgr = load_manager_or_400()
+    triples, error = _vdiff_batch_changes(mgr, request.get_json(force=True))
+    if error:
+        return error
+
+    # ── Apply all changes as one transaction; nothing changes on collision ───
+    try:
+        adds, colls, inferred_adds = mgr.try_set_vdiff_order_relations(triples)
+    except Exception as e:
+        logger.exception("Failed to set vdiff relations in batch")
+        return {"error": str(e)}, 500
 
-        all_adds.extend(adds)
-        all_inferred_adds.extend(inferred_adds)
+    if colls:
+        # Collision — abort entire batch (manager not saved)
+        return _vdiff_batch_colls(mgr, triples, colls), 409
 
     save_manager(mgr)
     return {
-        "adds":          [_fmt_entry(a) for a in all_adds],
-        "inferred_adds": [_fmt_entry(a) for a in all_inferred_adds]
+        "adds":          [_fmt_entry(a) for a in adds],
+        "inferred_adds": [_fmt_entry(a) for a in inferred_adds]
     }, 200
 
 
+@app.post("/api/vdiff-matrix/preview")
+def preview_vdiff_relations():
+    """Dry run of /api/vdiff-matrix/batch: what the changes would infer or
+    collide with, from the warm closure plus their delta. Nothing is
+    applied or saved. Body as for the batch; unsets cannot be previewed.
+    Response: { "inferred_adds": [...], "colls": [...], "core": [...] }
+    """
+    mgr = load_manager_or_400()
+    triples, error = _vdiff_batch_changes(mgr, request.get_json(force=True))
+    if error:
+        return error
+    try:
+        inferred_adds, colls = mgr.preview_vdiff_order_relations(triples)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    if colls:
+        return {"inferred_adds": [], **_vdiff_batch_colls(mgr, triples, colls)}, 200
+    return {"inferred_adds": [_fmt_entry(a) for a in inferred_adds],
+            "colls": [], "core": []}, 200
+
+
 @app.get("/api/dominance-graph")
 def get_dominance_graph():
     """Return confirmed and possible dominance edges, plus node completeness.
@@ -1,6 +1,23 @@
 from typing import Dict, List, Tuple, Type
 
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping, MutableMapping, Sequence
+
+import base64
+import bisect
+import hashlib
+import heapq
+import json
 import logging
+import os
+import random
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -232,6 +249,72 @@ def _vdiff_key(vd: VDiff) -> VDiff:
     """Normalise any natural-zero vdiff to the single NATURAL_ZERO sentinel."""
     return NATURAL_ZERO if vd.natural_zero() else vd
 
+class _OverlayRow(MutableMapping):
+    """One row of a VdcmOverlay: reads fall through to the base row,
+    writes go to the overlay's delta."""
+
+    def __init__(self, overlay: 'VdcmOverlay', key: VDiff, base_row: Dict):
+        self._overlay = overlay
+        self._key = key
+        self._base = base_row
+
+    def __getitem__(self, k2):
+        delta = self._overlay.delta.get(self._key)
+        if delta is not None and k2 in delta:
+            return delta[k2]
+        return self._base[k2]
+
+    def __setitem__(self, k2, rel):
+        self._base[k2]   # KeyError → not initialised, as for a plain row
+        self._overlay.delta.setdefault(self._key, {})[k2] = rel
+
+    def __delitem__(self, k2):
+        raise TypeError("vdcm entries are unset, not deleted")
+
+    def __iter__(self):
+        return iter(self._base)
+
+    def __len__(self):
+        return len(self._base)
+
+class VdcmOverlay(Mapping):
+    """Copy-on-write view of a vdcm for staging changes.
+
+    Reads (vdcm[vd1][vd2], .get, iteration) see base with the staged
+    writes applied; writes land in delta, a dict of only the changed
+    entries, and base is untouched until commit(). Staging therefore costs
+    O(changes) instead of a copy of every row. Works wherever a vdcm is
+    expected (get/set_vdiff_relation, VDiffIds.encode, closure()).
+    """
+
+    def __init__(self, base: Dict[VDiff, Dict[VDiff, str]]):
+        self.base = base
+        self.delta: Dict[VDiff, Dict[VDiff, str]] = {}
+
+    def __getitem__(self, k1) -> _OverlayRow:
+        return _OverlayRow(self, k1, self.base[k1])
+
+    def __iter__(self):
+        return iter(self.base)
+
+    def __len__(self):
+        return len(self.base)
+
+    def changes(self):
+        """Yield (vd1, vd2, rel) for every staged entry."""
+        for k1, row in self.delta.items():
+            for k2, rel in row.items():
+                yield (k1, k2, rel)
+
+    def commit(self):
+        """Write the staged entries into base and start over."""
+        for k1, k2, rel in self.changes():
+            self.base[k1][k2] = rel
+        self.delta = {}
+
+    def discard(self):
+        self.delta = {}
+
 def get_vdiff_relation(vdcm, vd1: VDiff, vd2: VDiff,
                        default: str = UNDEFINED) -> str:
     """Look up the relation between vd1 and vd2 in vdcm.
@@ -320,17 +403,2661 @@ def app_ac(origin: List, ac: Tuple, adds: List, colls: List) -> Tuple:
         colls.append([origin[0], origin[1], coll])
     return (adds, colls)
 
+# ── Closure engine ────────────────────────────────────────────────────────────
+# The closure runs on dense integer vdiff ids (see VDiffIds) and small-int
+# relation codes stored in one flat row-major bytearray, instead of hashing
+# VDiff objects into a dict-of-dicts on every lookup.
+
+REL_UNDEFINED, REL_TRUE, REL_FALSE = 0, 1, 2
+REL_CODES = {UNDEFINED: REL_UNDEFINED, TRUE: REL_TRUE, FALSE: REL_FALSE}
+CODE_RELS = (UNDEFINED, TRUE, FALSE)
+
+# Rule codes carried by closure events; CLOSURE_RULES[code] is the origin label.
+CLOSURE_RULES = ('DiffP', 'NegDiffP', 'TransP', 'InvP_R', 'InvP_L',
+                 'NegTransP', 'NegTransP_DEQ_L', 'NegTransP_DEQ_R',
+                 'NegInvP_L', 'NegInvP_R')
+(R_DIFFP, R_NEGDIFFP, R_TRANSP, R_INVP_R, R_INVP_L,
+ R_NEGTRANSP, R_NEGTRANSP_DEQ_L, R_NEGTRANSP_DEQ_R,
+ R_NEGINVP_L, R_NEGINVP_R) = range(len(CLOSURE_RULES))
+
+# Relation labels shown between the premise vdiffs of each rule's origin
+RULE_PREMISE_RELS = (
+    (TRUE,), (FALSE,),
+    (TRUE, TRUE), (TRUE, TRUE), (TRUE, TRUE),
+    (FALSE, FALSE), (DEQ, FALSE), (FALSE, DEQ),
+    (FALSE, FALSE), (FALSE, FALSE),
+)
+
+# The mirror of a cell x ? y is inv(y) ? inv(x). The rules are closed under
+# mirroring: the mirror of a rule instance is an instance of MIRROR_RULES[rule]
+# whose premises are the mirrored premises, so the closure of a mirror-closed
+# matrix is mirror-closed. (A single fact does not imply its mirror; InvP_*
+# and NegInvP_* derive it only when a zero anchor holds.)
+MIRROR_RULES = (R_DIFFP, R_NEGDIFFP, R_TRANSP, R_INVP_L, R_INVP_R,
+                R_NEGTRANSP, R_NEGTRANSP_DEQ_R, R_NEGTRANSP_DEQ_L,
+                R_NEGINVP_R, R_NEGINVP_L)
+
+_DEFINED_CODE = re.compile(b'[\x01\x02]')
+
+class VDiffIds:
+    """Dense integer ids for every vdiff of a set of aspects.
+
+    NATURAL_ZERO is always id 0; each Δ(c,d) with c != d gets the next id
+    in aspect and level order. inv[i] is the id of the inverse vdiff and
+    pair[a][c][d] the id of Δ(c,d) in the a-th aspect (level ordinals, the
+    diagonal maps to 0), so DiffP needs no VDiff objects at all.
+
+    The ids from len(self) on are aliases of ◬, one per Δ(c,c) in aspect
+    and level order (zeros[a][c]); only OrderedClosureEngine events use
+    them, to name the natural zero as reference_closure() shows it.
+    labels[i] is the vdiff shown for any id or alias, real(i) its id.
+    """
+
+    def __init__(self, aspects: Dict[str, 'Aspect']):
+        self._build(self.signature_of(aspects))
+
+    def _build(self, signature: tuple):
+        self.signature = signature
+        self.aspect_names: List[str] = [name for name, _ in signature]
+        self.vdiffs: List[VDiff] = [NATURAL_ZERO]
+        self.aspect: List[int] = [-1]   # aspect ordinal per id, -1 for ◬
+        self.frm: List[int] = [-1]      # from-level ordinal per id
+        self.to: List[int] = [-1]       # to-level ordinal per id
+        self.pair: List[List[List[int]]] = []
+        self.zeros: List[List[int]] = []
+        zero_labels = []
+        for a, (name, levels) in enumerate(signature):
+            grid = [[0] * len(levels) for _ in levels]
+            for c, lc in enumerate(levels):
+                for d, ld in enumerate(levels):
+                    if c != d:
+                        grid[c][d] = len(self.vdiffs)
+                        self.vdiffs.append(VDiff(name, lc, ld))
+                        self.aspect.append(a)
+                        self.frm.append(c)
+                        self.to.append(d)
+            self.pair.append(grid)
+            self.zeros.append([len(zero_labels) + c for c in range(len(levels))])
+            zero_labels += [VDiff(name, lc, lc) for lc in levels]
+        n = len(self.vdiffs)
+        self.zeros = [[n + k for k in row] for row in self.zeros]
+        self.labels: List[VDiff] = self.vdiffs + zero_labels
+        self.ids: Dict[VDiff, int] = {vd: i for i, vd in enumerate(self.vdiffs)}
+        self.inv: List[int] = [0] + [
+            self.pair[self.aspect[i]][self.to[i]][self.frm[i]]
+            for i in range(1, len(self.vdiffs))
+        ]
+
+    @classmethod
+    def from_signature(cls, signature: tuple) -> 'VDiffIds':
+        """Id table built from a signature instead of the aspects."""
+        ids = cls.__new__(cls)
+        ids._build(signature)
+        return ids
+
+    def subset(self, aspects: List[int]) -> 'VDiffIds':
+        """Id table of ◬ and the vdiffs of the given aspect ordinals only.
+        Its glob list maps each of its ids to the id in this table."""
+        sub = VDiffIds.from_signature(tuple(self.signature[a] for a in aspects))
+        sub.glob = [self.ids[vd] for vd in sub.vdiffs]
+        return sub
+
+    @staticmethod
+    def signature_of(aspects: Dict[str, 'Aspect']) -> tuple:
+        """Aspect/level structure the ids were built from."""
+        return tuple((name, tuple(asp.levels)) for name, asp in aspects.items())
+
+    def __len__(self):
+        return len(self.vdiffs)
+
+    def real(self, i: int) -> int:
+        """The id of i, which may be an alias of ◬."""
+        return i if i < len(self.vdiffs) else 0
+
+    def mirror_closed(self, codes: bytearray) -> bool:
+        """True if every defined cell x ? y of codes has its mirror
+        inv(y) ? inv(x) defined with the same relation."""
+        n = len(self.vdiffs)
+        m = np.frombuffer(bytes(codes), dtype=np.uint8).reshape(n, n)
+        inv = np.asarray(self.inv, dtype=np.intp)
+        return bool(np.array_equal(m, m.T[np.ix_(inv, inv)]))
+
+    def id_of(self, vd: VDiff):
+        """Id of vd (natural zeros normalised), or None if it is unknown."""
+        return self.ids.get(_vdiff_key(vd))
+
+    def encode(self, vdcm) -> bytearray:
+        """Return the flat n × n REL_* code matrix of vdcm. Entries for
+        vdiffs that are not part of the id table are ignored."""
+        n = len(self.vdiffs)
+        codes = bytearray(n * n)
+        ids = self.ids
+        for k1, row in vdcm.items():
+            i = ids.get(k1)
+            if i is None:
+                continue
+            base = i * n
+            for k2, rel in row.items():
+                if rel != UNDEFINED:
+                    j = ids.get(k2)
+                    if j is not None:
+                        codes[base + j] = REL_CODES.get(rel, REL_UNDEFINED)
+        return codes
+
+    def entry(self, event) -> Tuple:
+        """Translate a ClosureEngine event into (origin, add, coll) in the
+        list format used by app_ac: origin = [rule_label, origin_detail]."""
+        rule, premises, i, j, code, old = event
+        vds = self.labels
+        detail = [vds[premises[0]]]
+        for rel, p in zip(RULE_PREMISE_RELS[rule], premises[1:]):
+            detail += [rel, vds[p]]
+        origin = [CLOSURE_RULES[rule], detail]
+        if old == REL_UNDEFINED:
+            return (origin, [vds[i], CODE_RELS[code], vds[j]], None)
+        return (origin, None, [vds[i], CODE_RELS[old], vds[j], CODE_RELS[code]])
+
+class ProvenanceLog(Sequence):
+    """The facts a closure added, with their rule origins, stored compactly.
+
+    One record per engine event in typed parallel arrays over the ids of a
+    VDiffIds table: rule index, up to three premise ids (-1 when unused),
+    conclusion ids and relation code — about 22 bytes per fact. Reading an
+    item decodes it into the [origin_type, origin_detail, add] list that
+    app_ac would have stored, so the VDiff lists exist only while a caller
+    (e.g. the API formatters) looks at them.
+    """
+
+    def __init__(self, ids: 'VDiffIds'):
+        self.ids = ids
+        self.rule = array('B')
+        self.premises = (array('i'), array('i'), array('i'))
+        self.i = array('i')
+        self.j = array('i')
+        self.code = array('B')
+
+    def record(self, event):
+        """Append an add event (rule, premises, i, j, code, REL_UNDEFINED)."""
+        rule, premises, i, j, code, _ = event
+        self.rule.append(rule)
+        for k, column in enumerate(self.premises):
+            column.append(premises[k] if k < len(premises) else -1)
+        self.i.append(i)
+        self.j.append(j)
+        self.code.append(code)
+
+    def copy(self) -> 'ProvenanceLog':
+        log = ProvenanceLog(self.ids)
+        log.extend(self)
+        return log
+
+    def extend(self, other: 'ProvenanceLog'):
+        """Append the records of another log over the same ids."""
+        self.rule.extend(other.rule)
+        for mine, theirs in zip(self.premises, other.premises):
+            mine.extend(theirs)
+        self.i.extend(other.i)
+        self.j.extend(other.j)
+        self.code.extend(other.code)
+
+    def clear(self):
+        self.truncate(0)
+
+    def truncate(self, size: int):
+        """Drop the records from index size on."""
+        for column in (self.rule, *self.premises, self.i, self.j, self.code):
+            del column[size:]
+
+    def replace(self, k: int, derivation: Tuple):
+        """Give record k another (rule, premises) for the same cell."""
+        rule, premises = derivation
+        self.rule[k] = rule
+        for m, column in enumerate(self.premises):
+            column[k] = premises[m] if m < len(premises) else -1
+
+    def encode(self) -> str:
+        """The records as a compact string (zlib-compressed little-endian
+        columns, base64); see decode()."""
+        columns = [self.rule, *self.premises, self.i, self.j, self.code]
+        if sys.byteorder != 'little':
+            columns = [array(c.typecode, c) for c in columns]
+            for c in columns:
+                c.byteswap()
+        data = b''.join(c.tobytes() for c in columns)
+        return base64.b64encode(zlib.compress(data)).decode('ascii')
+
+    @classmethod
+    def decode(cls, ids: 'VDiffIds', text: str) -> 'ProvenanceLog':
+        """Records written by encode() over the same ids, or None if text
+        is not such a string."""
+        log = cls(ids)
+        columns = [log.rule, *log.premises, log.i, log.j, log.code]
+        try:
+            data = zlib.decompress(base64.b64decode(text))
+        except (ValueError, zlib.error):
+            return None
+        size = sum(c.itemsize for c in columns)
+        if len(data) % size:
+            return None
+        count, start = len(data) // size, 0
+        for c in columns:
+            end = start + count * c.itemsize
+            c.frombytes(data[start:end])
+            if sys.byteorder != 'little':
+                c.byteswap()
+            start = end
+        n = len(ids.labels)
+        if count and not (max(log.rule) < len(CLOSURE_RULES) and max(log.code) <= REL_FALSE and
+                          all(-1 <= min(c) and max(c) < n for c in log.premises) and
+                          all(0 <= min(c) and max(c) < n for c in (log.i, log.j))):
+            return None
+        return log
+
+    def event(self, k: int) -> Tuple:
+        """The engine event of record k."""
+        premises = tuple(p for p in (c[k] for c in self.premises) if p >= 0)
+        return (self.rule[k], premises, self.i[k], self.j[k], self.code[k], REL_UNDEFINED)
+
+    def cells(self):
+        """Yield (i, j, code) for every record, without decoding."""
+        return zip(self.i, self.j, self.code)
+
+    def __len__(self) -> int:
+        return len(self.rule)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[m] for m in range(*k.indices(len(self)))]
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(k)
+        origin, add, _ = self.ids.entry(self.event(k))
+        return [origin[0], origin[1], add]
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+class RelationIndex:
+    """Successor / predecessor adjacency of the defined relations, split by
+    REL_TRUE and REL_FALSE, so closure joins only visit pairs that are
+    actually related instead of scanning a whole row or column."""
+
+    def __init__(self, n: int):
+        self.succ = (None, [set() for _ in range(n)], [set() for _ in range(n)])
+        self.pred = (None, [set() for _ in range(n)], [set() for _ in range(n)])
+
+    def add(self, i: int, j: int, code: int):
+        self.succ[code][i].add(j)
+        self.pred[code][j].add(i)
+
+    def discard(self, i: int, j: int, code: int):
+        self.succ[code][i].discard(j)
+        self.pred[code][j].discard(i)
+
+    def successors(self, i: int, code: int) -> List[int]:
+        """All j with i code j (a snapshot, safe to iterate while adding)."""
+        return list(self.succ[code][i])
+
+    def predecessors(self, j: int, code: int) -> List[int]:
+        """All i with i code j (a snapshot, safe to iterate while adding)."""
+        return list(self.pred[code][j])
+
+class ClosureBudget:
+    """Time / step budget, cancellation token and progress sink for one
+    closure computation.
+
+    seconds bounds the wall-clock time from start(), steps the number of
+    facts derived; either may be None. cancel() may be called from another
+    thread. progress, if given, is called with the budget at the start of
+    every engine round, when round, derived and pending (the facts still
+    to be joined in that round: an estimate of the remaining work) are
+    current.
+
+    Engines stop at the next check once the budget is spent; the closure is
+    then incomplete and reason is 'cancelled', 'deadline' or 'steps'.
+    """
+
+    def __init__(self, seconds: float = None, steps: int = None, progress=None):
+        self.seconds = seconds
+        self.steps = steps
+        self.progress = progress
+        self.round = 0
+        self.derived = 0
+        self.pending = 0
+        self.reason = None
+        self._cancelled = False
+        self._deadline = None
+
+    def start(self):
+        if self.seconds is not None:
+            self._deadline = time.monotonic() + self.seconds
+
+    def cancel(self):
+        self._cancelled = True
+
+    @property
+    def incomplete(self) -> bool:
+        return self.reason is not None
+
+    def ok(self) -> bool:
+        """False (with reason set) once the budget is spent."""
+        if self.reason is None:
+            if self._cancelled:
+                self.reason = 'cancelled'
+            elif self._deadline is not None and time.monotonic() > self._deadline:
+                self.reason = 'deadline'
+            elif self.steps is not None and self.derived >= self.steps:
+                self.reason = 'steps'
+        return self.reason is None
+
+    def spend(self) -> bool:
+        """Count one derived fact; False once the budget is spent."""
+        self.derived += 1
+        return self.ok()
+
+    def report(self, pending: int) -> bool:
+        """Start the next round with pending facts to join."""
+        self.round += 1
+        self.pending = pending
+        if self.progress is not None:
+            self.progress(self)
+        return self.ok()
+
+class ClosureStats:
+    """Opt-in instrumentation of one closure computation.
+
+    Per rule (indexed like CLOSURE_RULES): attempts, the rule instances
+    the engine tried, and firings, those that added a fact. lookups counts
+    matrix cells examined for conclusions (one per attempt in the
+    semi-naive engine, n² per rule and round in the NumPy engine). rounds
+    counts engine rounds, summed over components; seconds accumulates
+    wall-clock time per phase. on_round, if given, is called with the
+    stats at the start of every round.
+
+    Instrumentation costs a little time, so closure() only collects stats
+    when it is given a ClosureStats or EudoxaManager.closure_hook is set.
+    """
+
+    def __init__(self, on_round=None):
+        self.on_round = on_round
+        self.engine = None
+        self.cached = False
+        self.rounds = 0
+        self.attempts = [0] * len(CLOSURE_RULES)
+        self.firings = [0] * len(CLOSURE_RULES)
+        self.collisions = 0
+        self.lookups = 0
+        self.seconds: Dict[str, float] = {}
+
+    def round(self, pending: int):
+        """Start the next engine round with pending facts to join."""
+        self.rounds += 1
+        if self.on_round is not None:
+            self.on_round(self)
+
+    def add_time(self, phase: str, since: float):
+        """Add the time since the perf_counter() value since to phase."""
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + time.perf_counter() - since
+
+    def record(self, event):
+        """Count an engine event that reached the caller."""
+        if event[5] != REL_UNDEFINED:
+            self.collisions += 1
+        else:
+            self.firings[event[0]] += 1
+
+    def to_dict(self) -> dict:
+        """JSON-ready summary, with the per-rule counts keyed by rule label."""
+        return {
+            "engine": self.engine,
+            "cached": self.cached,
+            "rounds": self.rounds,
+            "lookups": self.lookups,
+            "collisions": self.collisions,
+            "rules": {label: {"attempts": self.attempts[r], "firings": self.firings[r]}
+                      for r, label in enumerate(CLOSURE_RULES)},
+            "seconds": {phase: round(s, 6) for phase, s in self.seconds.items()},
+        }
+
+    def __str__(self):
+        rules = ", ".join(f"{label} {self.firings[r]}/{self.attempts[r]}"
+                          for r, label in enumerate(CLOSURE_RULES) if self.attempts[r])
+        phases = ", ".join(f"{phase} {s:.3f}s" for phase, s in self.seconds.items())
+        return (f"closure[{self.engine}{' cached' if self.cached else ''}]: "
+                f"{self.rounds} rounds, {self.lookups} lookups, {sum(self.firings)} facts, "
+                f"{self.collisions} collisions; fired/attempted: {rules or '-'}; {phases}")
+
+class ClosureEngine:
+    """Semi-naive closure of an int-coded relation matrix.
+
+    codes is the flat row-major n × n REL_* matrix over the ids of a
+    VDiffIds table and is updated in place as facts are derived.
+
+    With a ClosureBudget, propagate() reports every round to it and stops
+    early (without a collision) once it is spent. With a ClosureStats in
+    stats it counts rounds and every rule instance it tries.
+    """
+
+    check_every = 1024
+    # Set by EudoxaManager.closure_runner() when the closure is instrumented
+    stats: 'ClosureStats' = None
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, budget: ClosureBudget = None):
+        self.ids = ids
+        self.n = len(ids)
+        self.codes = codes
+        self.budget = budget
+        self.index = RelationIndex(self.n)
+        for i, j, code in self.facts():
+            self.index.add(i, j, code)
+
+    def facts(self):
+        """Yield (i, j, code) for every defined cell, in row-major order."""
+        n, codes = self.n, self.codes
+        for m in _DEFINED_CODE.finditer(codes):
+            p = m.start()
+            yield (p // n, p % n, codes[p])
+
+    def run(self):
+        """Close the whole matrix: propagate() with every defined cell as
+        the initial delta. A mirror-closed matrix (see MIRROR_RULES) is
+        closed from one cell of each mirror pair, in mirrored mode."""
+        if self.ids.mirror_closed(self.codes):
+            inv, n = self.ids.inv, self.n
+            return self.propagate([(i, j, code) for i, j, code in self.facts()
+                                   if i * n + j <= inv[j] * n + inv[i]], mirrored=True)
+        return self.propagate(list(self.facts()))
+
+    def propagate(self, delta, mirrored: bool = False):
+        """Run the fixpoint from delta, a list of (i, j, code) facts that
+        are already in the matrix. Each round joins only the facts derived
+        in the previous round against the full matrix.
+
+        Yields (rule, premises, i, j, code, old) for every conclusion that
+        changes the matrix (old == REL_UNDEFINED, the fact is added) or
+        contradicts it (old is the clashing code — a collision; the cell is
+        left unchanged and callers normally stop iterating).
+
+        mirrored requires the matrix to be mirror-closed and delta to hold
+        at least one cell of each mirror pair to join. Each new fact then
+        brings its mirror along, derived by the mirrored rule instance, and
+        only the fact is joined: a rule instance that needs the mirror is
+        itself the mirror of one that needs the fact. That halves the joins
+        and keeps the matrix mirror-closed.
+        """
+        codes, n, index, budget, stats = self.codes, self.n, self.index, self.budget, self.stats
+        inv = self.ids.inv
+        while delta:
+            if budget is not None and not budget.report(len(delta)):
+                return
+            if stats is not None:
+                stats.round(len(delta))
+            derived = []
+            for k, (x, y, code) in enumerate(delta):
+                if budget is not None and k % self.check_every == 0 and k and not budget.ok():
+                    return
+                conclusions = self.consequences(x, y, code)
+                if stats is not None:
+                    conclusions = self._counted(conclusions, stats)
+                for rule, premises, i, j, c in conclusions:
+                    p = i * n + j
+                    old = codes[p]
+                    if old == c:
+                        continue
+                    if old == REL_UNDEFINED:
+                        codes[p] = c
+                        index.add(i, j, c)
+                        derived.append((i, j, c))
+                    yield (rule, premises, i, j, c, old)
+                    if mirrored and old == REL_UNDEFINED:
+                        mi, mj = inv[j], inv[i]
+                        q = mi * n + mj
+                        mold = codes[q]
+                        if mold == c:
+                            continue
+                        if mold == REL_UNDEFINED:
+                            codes[q] = c
+                            index.add(mi, mj, c)
+                        yield (MIRROR_RULES[rule], tuple(inv[x] for x in reversed(premises)),
+                               mi, mj, c, mold)
+            delta = derived
+
+    @staticmethod
+    def _counted(conclusions, stats: 'ClosureStats'):
+        """Pass conclusions through, counting each as an attempt of its rule
+        and one lookup of the conclusion cell."""
+        attempts = stats.attempts
+        for conclusion in conclusions:
+            attempts[conclusion[0]] += 1
+            stats.lookups += 1
+            yield conclusion
+
+    def consequences(self, x: int, y: int, code: int):
+        """Yield (rule, premises, i, j, code) for every rule instance that
+        uses the fact x code y as one of its premises, joined against the
+        current matrix. premises are the ids shown in the rule's origin."""
+        T, F = REL_TRUE, REL_FALSE
+        if code == T:
+            # DiffP: cd⊒ef ==> ce⊒df (fact as the only premise)
+            for ce, df in self.diff_pairs(x, y):
+                yield (R_DIFFP, (x, y), ce, df, T)
+        elif code == F:
+            # NegDiffP: cd⋣ef ==> fd⋣ec (fact as the only premise; the
+            # origin shows the conclusion, as it always has)
+            for fd, ec in self.neg_diff_pairs(x, y):
+                yield (R_NEGDIFFP, (fd, ec), fd, ec, F)
+        yield from self.joins(x, y, code)
+
+    def joins(self, x: int, y: int, code: int):
+        """The consequences of x code y under the transitive and inverse
+        rules, TransP to NegInvP_R, whose premises are (ab, cd, ef)."""
+        T, F = REL_TRUE, REL_FALSE
+        codes, n = self.codes, self.n
+        inv = self.ids.inv
+        succ, pred = self.index.successors, self.index.predecessors
+        if code == T:
+            # Fact as ab⊒cd
+            ab, cd = x, y
+            for ef in succ(cd, T):
+                yield (R_TRANSP, (ab, cd, ef), ab, ef, T)
+                if ef == 0:
+                    yield (R_INVP_R, (ab, cd, ef), inv[cd], inv[ab], T)
+                if ab == 0:
+                    yield (R_INVP_L, (ab, cd, ef), inv[ef], inv[cd], T)
+            # Fact as cd⊒ef
+            cd, ef = x, y
+            for ab in pred(cd, T):
+                yield (R_TRANSP, (ab, cd, ef), ab, ef, T)
+                if ef == 0:
+                    yield (R_INVP_R, (ab, cd, ef), inv[cd], inv[ab], T)
+                if ab == 0:
+                    yield (R_INVP_L, (ab, cd, ef), inv[ef], inv[cd], T)
+            # x≜y: the fact is either half of the ≜ premise of NegTransP_DEQ_*
+            if codes[y * n + x] == T:
+                for ef in succ(y, F): # x≜y & y⋣ef ==> x⋣ef
+                    yield (R_NEGTRANSP_DEQ_L, (x, y, ef), x, ef, F)
+                for ef in succ(x, F): # y≜x & x⋣ef ==> y⋣ef
+                    yield (R_NEGTRANSP_DEQ_L, (y, x, ef), y, ef, F)
+                for ab in pred(x, F): # ab⋣x & x≜y ==> ab⋣y
+                    yield (R_NEGTRANSP_DEQ_R, (ab, x, y), ab, y, F)
+                for ab in pred(y, F): # ab⋣y & y≜x ==> ab⋣x
+                    yield (R_NEGTRANSP_DEQ_R, (ab, y, x), ab, x, F)
+        elif code == F:
+            # Fact as ab⋣cd
+            ab, cd = x, y
+            for ef in succ(cd, T):
+                if codes[ef * n + cd] == T: # ab⋣cd & cd≜ef ==> ab⋣ef
+                    yield (R_NEGTRANSP_DEQ_R, (ab, cd, ef), ab, ef, F)
+            for ef in succ(cd, F):
+                yield (R_NEGTRANSP, (ab, cd, ef), ab, ef, F)
+                if ab == 0:
+                    yield (R_NEGINVP_L, (ab, cd, ef), inv[ef], inv[cd], F)
+                if ef == 0:
+                    yield (R_NEGINVP_R, (ab, cd, ef), inv[cd], inv[ab], F)
+            # Fact as cd⋣ef
+            cd, ef = x, y
+            for ab in pred(cd, T):
+                if codes[cd * n + ab] == T: # ab≜cd & cd⋣ef ==> ab⋣ef
+                    yield (R_NEGTRANSP_DEQ_L, (ab, cd, ef), ab, ef, F)
+            for ab in pred(cd, F):
+                yield (R_NEGTRANSP, (ab, cd, ef), ab, ef, F)
+                if ab == 0:
+                    yield (R_NEGINVP_L, (ab, cd, ef), inv[ef], inv[cd], F)
+                if ef == 0:
+                    yield (R_NEGINVP_R, (ab, cd, ef), inv[cd], inv[ab], F)
+
+    def derivations(self, x: int, y: int, code: int):
+        """Yield (rule, premises) for every rule instance that concludes the
+        fact x code y in one step from facts currently in the matrix.
+
+        The backward counterpart of consequences(): DiffP and NegDiffP are
+        involutions on (x, y), the inverse rules are undone through inv,
+        and the transitive rules intersect adjacency sets.
+        """
+        T, F = REL_TRUE, REL_FALSE
+        codes, n = self.codes, self.n
+        inv = self.ids.inv
+        succ, pred = self.index.succ, self.index.pred
+        if code == T:
+            for cd, ef in self.diff_pairs(x, y):
+                if codes[cd * n + ef] == T:
+                    yield (R_DIFFP, (cd, ef))
+            for cd in succ[T][x] & pred[T][y]:
+                yield (R_TRANSP, (x, cd, y))
+            ab, cd = inv[y], inv[x]   # ab⊒cd & cd⊒◬ ==> inv(cd)⊒inv(ab)
+            if codes[ab * n + cd] == T and codes[cd * n] == T:
+                yield (R_INVP_R, (ab, cd, 0))
+            cd, ef = inv[y], inv[x]   # ◬⊒cd & cd⊒ef ==> inv(ef)⊒inv(cd)
+            if codes[cd] == T and codes[cd * n + ef] == T:
+                yield (R_INVP_L, (0, cd, ef))
+        elif code == F:
+            for cd, ef in self.neg_diff_pairs(x, y):
+                if codes[cd * n + ef] == F:
+                    yield (R_NEGDIFFP, (x, y))
+            for cd in succ[F][x] & pred[F][y]:
+                yield (R_NEGTRANSP, (x, cd, y))
+            for cd in succ[T][x] & pred[T][x] & pred[F][y]:
+                yield (R_NEGTRANSP_DEQ_L, (x, cd, y))
+            for cd in succ[F][x] & succ[T][y] & pred[T][y]:
+                yield (R_NEGTRANSP_DEQ_R, (x, cd, y))
+            cd, ef = inv[y], inv[x]   # ◬⋣cd & cd⋣ef ==> inv(ef)⋣inv(cd)
+            if codes[cd] == F and codes[cd * n + ef] == F:
+                yield (R_NEGINVP_L, (0, cd, ef))
+            ab, cd = inv[y], inv[x]   # ab⋣cd & cd⋣◬ ==> inv(cd)⋣inv(ab)
+            if codes[ab * n + cd] == F and codes[cd * n] == F:
+                yield (R_NEGINVP_R, (ab, cd, 0))
+
+    def _level_pairs(self, x: int, y: int):
+        """Yield (a, grid, c, d, e, f) with Δ(c,d) = x and Δ(e,f) = y within
+        the a-th aspect, as enumerated by the DiffP / NegDiffP phase of
+        reference_closure(). ◬ stands for every Δ(c,c) of the aspect."""
+        ids = self.ids
+        ax, ay = ids.aspect[x], ids.aspect[y]
+        if ax >= 0 and ay >= 0 and ax != ay:
+            return
+        if ax >= 0:
+            aspects = (ax,)
+        elif ay >= 0:
+            aspects = (ay,)
+        else:
+            aspects = range(len(ids.pair))
+        for a in aspects:
+            grid = ids.pair[a]
+            cds = [(ids.frm[x], ids.to[x])] if ax >= 0 else [(c, c) for c in range(len(grid))]
+            efs = [(ids.frm[y], ids.to[y])] if ay >= 0 else [(e, e) for e in range(len(grid))]
+            for c, d in cds:
+                for e, f in efs:
+                    yield (a, grid, c, d, e, f)
+
+    def diff_pairs(self, x: int, y: int):
+        """DiffP conclusions (ce, df) of the premise x⊒y."""
+        for _, grid, c, d, e, f in self._level_pairs(x, y):
+            yield (grid[c][e], grid[d][f])
+
+    def neg_diff_pairs(self, x: int, y: int):
+        """NegDiffP conclusions (fd, ec) of the premise x⋣y."""
+        for _, grid, c, d, e, f in self._level_pairs(x, y):
+            yield (grid[f][d], grid[e][c])
+
+class OrderedClosureEngine(ClosureEngine):
+    """Semi-naive closure that derives every fact by the same rule instance,
+    and in the same order, as reference_closure().
+
+    The reference sweeps passes of two phases over fixed enumerations:
+    DiffP / NegDiffP at each (aspect, c, d, e, f), then the other rules at
+    each (cd, ab, ef) of vd_enum_verbose(), reading ab ? cd before its ef
+    loop. A fact written earlier in a pass is seen later in the same pass,
+    so each rule instance has a time, the first (pass, position) at which
+    all its premises are visible, and the reference records a cell by the
+    instance with the earliest time. This engine joins each new fact
+    against the facts derived before it, as ClosureEngine does, but
+    schedules the instances in a heap by that time and derives them in
+    time order.
+
+    ◬ has one position per Δ(c,c); an instance with ◬ in a premise takes
+    the earliest one it can, and its event names that Δ(c,c) by an alias
+    id (see VDiffIds), so origins and adds decode to the VDiff objects the
+    reference lists. Like the reference, run() ends after the instances at
+    the position of the first collision, which may add facts as well.
+    """
+
+    # Order of the rules within one (cd, ab, ef) step of the second phase
+    STEP = (0, 0, 0, 1, 2, 0, 0, 0, 1, 2)
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, budget: ClosureBudget = None):
+        super().__init__(ids, codes, budget)
+        # A pass has one slot per (a, c, d, e, f) of the first phase, then
+        # one per (cd, ab) — where ab ? cd is read — followed by one per ef
+        self.sizes = [len(grid) for grid in ids.pair]
+        self.p1_start, self.v_start = [], []
+        p1 = v = 0
+        for m in self.sizes:
+            self.p1_start.append(p1)
+            self.v_start.append(v)
+            p1 += m ** 4
+            v += m * m
+        self.p1, self.v = p1, v
+        self.span = 4 * (p1 + v * v * (v + 1))
+        # Position of each vdiff in vd_enum_verbose(); ◬ has one per Δ(c,c),
+        # in the order of its aliases
+        self.position = [None] + [self.v_start[a] + c * self.sizes[a] + d
+                            for a, c, d in zip(ids.aspect[1:], ids.frm[1:], ids.to[1:])]
+        self.zero_positions = [start + c * m + c for start, m in zip(self.v_start, self.sizes)
+                        for c in range(m)]
+        self.when: Dict[int, int] = {}
+
+    def run(self):
+        codes, n, index, budget, stats = self.codes, self.n, self.index, self.budget, self.stats
+        real, span = self.ids.real, self.span
+        heap, best = [], {}
+        for x, y, code in list(self.facts()):
+            self._schedule(x, y, code, heap, best)
+        current, abort, k, last = -1, None, 0, None
+        while heap:
+            entry = heapq.heappop(heap)
+            if entry == last:   # the same instance, joined from two of its premises
+                continue
+            last = entry
+            when, rule, premises, si, sj, code = entry
+            if abort is not None and when // 4 != abort:
+                return
+            if when // span != current:   # the next pass of the reference
+                current = when // span
+                if budget is not None and not budget.report(len(heap) + 1):
+                    return
+                if stats is not None:
+                    stats.round(len(heap) + 1)
+            k += 1
+            if budget is not None and k % self.check_every == 0 and not budget.ok():
+                return
+            i, j = real(si), real(sj)
+            p = i * n + j
+            old = codes[p]
+            if old == code:
+                continue
+            if old == REL_UNDEFINED:
+                codes[p] = code
+                index.add(i, j, code)
+                self.when[p] = when
+            else:
+                abort = when // 4
+            yield (rule, premises, si, sj, code, old)
+            if old == REL_UNDEFINED:
+                self._schedule(i, j, code, heap, best)
+
+    def _schedule(self, x: int, y: int, code: int, heap: List, best: Dict):
+        """Push the rule instances that use x code y, with the facts derived
+        so far as their other premises, by the time they fire."""
+        codes, n, ids, stats = self.codes, self.n, self.ids, self.stats
+        span, inv, zeros = self.span, ids.inv, ids.zeros
+        w = self.when.get(x * n + y, -1)
+        pass_, seen = (w // span, w % span // 4) if w >= 0 else (0, -1)
+        for a, grid, c, d, e, f in self._level_pairs(x, y):
+            if code == REL_TRUE:   # cd⊒ef ==> ce⊒df
+                i, j = grid[c][e], grid[d][f]
+            else:                  # cd⋣ef ==> fd⋣ec
+                i, j = grid[f][d], grid[e][c]
+            if stats is not None:
+                stats.attempts[R_DIFFP if code == REL_TRUE else R_NEGDIFFP] += 1
+                stats.lookups += 1
+            if codes[i * n + j] == code:
+                continue
+            m = self.sizes[a]
+            slot = self.p1_start[a] + ((c * m + d) * m + e) * m + f
+            when = (pass_ if seen < slot else pass_ + 1) * span + 4 * slot + 1
+            label = lambda u, v: grid[u][v] if u != v else zeros[a][u]
+            if code == REL_TRUE:
+                event = (R_DIFFP, (label(c, d), label(e, f)), label(c, e), label(d, f))
+            else:
+                fd, ec = label(f, d), label(e, c)
+                event = (R_NEGDIFFP, (fd, ec), fd, ec)
+            self._push(heap, best, when, event, i * n + j, code)
+        for rule, (ab, cd, ef), i, j, c in self.joins(x, y, code):
+            if stats is not None:
+                stats.attempts[rule] += 1
+                stats.lookups += 1
+            if codes[i * n + j] == c:
+                continue
+            when, (ab, cd, ef) = self._step_time(rule, ab, cd, ef)
+            if rule in (R_INVP_R, R_NEGINVP_R):     # conclusion inv(cd) ? inv(ab)
+                si, sj = cd if cd >= n else inv[cd], ab if ab >= n else inv[ab]
+            elif rule in (R_INVP_L, R_NEGINVP_L):   # conclusion inv(ef) ? inv(cd)
+                si, sj = ef if ef >= n else inv[ef], cd if cd >= n else inv[cd]
+            else:
+                si, sj = ab, ef
+            self._push(heap, best, when, (rule, (ab, cd, ef), si, sj), i * n + j, c)
+
+    def _step_time(self, rule: int, ab: int, cd: int, ef: int) -> Tuple:
+        """Time of a second-phase instance and its premises (ab, cd, ef)
+        with each ◬ replaced by the alias of the position it fires at."""
+        n, v, p1, span, when = self.n, self.v, self.p1, self.span, self.when
+        outer = when.get(ab * n + cd, -1)   # read before the ef loop
+        inner = [when.get(cd * n + ef, -1)]
+        if rule == R_NEGTRANSP_DEQ_L:
+            inner.append(when.get(cd * n + ab, -1))
+        elif rule == R_NEGTRANSP_DEQ_R:
+            inner.append(when.get(ef * n + cd, -1))
+        step = self.STEP[rule]
+        if ab and cd and ef:
+            # One position: the first pass that has seen every premise there
+            position = self.position
+            read = p1 + (position[cd] * v + position[ab]) * (v + 1)
+            pass_ = 0
+            for w, slot in ((outer, read), *((w, read + position[ef] + 1) for w in inner)):
+                if w >= 0:
+                    p, t = divmod(w, span)
+                    if t >= 4 * slot:
+                        p += 1
+                    if p > pass_:
+                        pass_ = p
+            return (pass_ * span + 4 * (read + position[ef] + 1) + 1 + step, (ab, cd, ef))
+        # The first position (cd, ab, ef) after every premise of the last pass
+        seen = [(w // span, w % span // 4) if w >= 0 else (0, -1) for w in (outer, *inner)]
+        pass_ = max(p for p, _ in seen)
+        after = (-1,)
+        for k, (p, slot) in enumerate(seen):
+            if p == pass_ and slot >= p1:
+                block, e = divmod(slot - p1, v + 1)
+                after = max(after, (block // v, block % v, v if k == 0 else e - 1))
+        options = [[self.position[r]] if r else self.zero_positions for r in (cd, ab, ef)]
+        first = _first_after(options, after)
+        if first is None:
+            pass_ += 1
+            first = (0, 0, 0)
+        q = [pos[k] for pos, k in zip(options, first)]
+        slot = p1 + (q[0] * v + q[1]) * (v + 1) + q[2] + 1
+        alias = [r if r else n + k for r, k in zip((cd, ab, ef), first)]
+        return (pass_ * span + 4 * slot + 1 + step, (alias[1], alias[0], alias[2]))
+
+    @staticmethod
+    def _push(heap: List, best: Dict, when: int, event: Tuple, p: int, code: int):
+        """Schedule event for cell p unless an earlier position already
+        concludes code there; instances at the same position all fire, as
+        the reference records every collision of its last step."""
+        key = p * 3 + code
+        earliest = best.get(key)
+        if earliest is not None:
+            if earliest // 4 < when // 4:
+                return
+            when_min = min(earliest, when)
+        else:
+            when_min = when
+        best[key] = when_min
+        heapq.heappush(heap, (when, *event, code))
+
+def _first_after(options: List[List[int]], after: Tuple):
+    """Indexes (i, j, k) of the lexicographically first position
+    (options[0][i], options[1][j], options[2][k]) after the tuple after,
+    or None. Each options list is sorted."""
+    first, second, third = options
+    i = bisect.bisect_left(first, after[0]) if len(after) == 3 else 0
+    if len(after) == 3 and i < len(first) and first[i] == after[0]:
+        j = bisect.bisect_left(second, after[1])
+        if j < len(second) and second[j] == after[1]:
+            k = bisect.bisect_right(third, after[2])
+            if k < len(third):
+                return (i, j, k)
+            j += 1
+        if j < len(second):
+            return (i, j, 0)
+        i += 1
+    return (i, 0, 0) if i < len(first) else None
+
+class NumpyClosureEngine:
+    """Vectorised closure of an int-coded relation matrix.
+
+    The TRUE and FALSE relations are held as two n × n NumPy boolean
+    matrices. Each round applies every rule to the matrices of the previous
+    round at once: TransP / NegTransP and the ≜ variants as boolean matrix
+    products, InvP / NegInvP as index-permuted ORs over the inv table, and
+    DiffP / NegDiffP as gathers through precomputed per-aspect index arrays.
+    Rounds repeat until nothing new is derived.
+
+    run() yields the same events as ClosureEngine.propagate(). Conclusions
+    of round k only cite premises from rounds < k, so every origin is
+    well-founded; a collision is reported for the first conflicting cell
+    (row-major) of the first round that produces one.
+
+    With a ClosureStats in stats, every cell of a rule's conclusion matrix
+    counts as an attempt of that rule, and the phases 'rules' (computing
+    the conclusion matrices) and 'origins' (attributing the new cells and
+    finding their premises) are timed.
+    """
+
+    # Set by EudoxaManager.closure_runner() when the closure is instrumented
+    stats: 'ClosureStats' = None
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, budget: ClosureBudget = None):
+        self.ids = ids
+        self.n = n = len(ids)
+        self.codes = codes
+        self.budget = budget
+        m = np.frombuffer(bytes(codes), dtype=np.uint8).reshape(n, n)
+        self.T = m == REL_TRUE
+        self.F = m == REL_FALSE
+        self.inv = np.asarray(ids.inv, dtype=np.intp)
+        # Union-find over the ≜ edges seen so far (see deq_classes)
+        self.deq_parent = list(range(n))
+        self.deq_seen = np.zeros((n, n), dtype=bool)
+        # DiffP: T(Δcd, Δef) ==> T(Δce, Δdf); NegDiffP: F(Δcd, Δef) ==> F(Δfd, Δec)
+        src_i, src_j, t_i, t_j, f_i, f_j = ([] for _ in range(6))
+        for grid in ids.pair:
+            g = np.asarray(grid, dtype=np.intp).reshape(len(grid), len(grid))
+            c, d, e, f = np.indices(g.shape * 2).reshape(4, -1)
+            src_i.append(g[c, d]); src_j.append(g[e, f])
+            t_i.append(g[c, e]); t_j.append(g[d, f])
+            f_i.append(g[f, d]); f_j.append(g[e, c])
+        cat = lambda parts: np.concatenate(parts) if parts else np.zeros(0, dtype=np.intp)
+        self.diff_src = (cat(src_i), cat(src_j))
+        self.diff_t = (cat(t_i), cat(t_j))
+        self.diff_f = (cat(f_i), cat(f_j))
+
+    @staticmethod
+    def _product(A, B, classes=None):
+        """Boolean matrix product A·B (BLAS float product, thresholded).
+
+        With classes = (reps, cls) from deq_classes() the product is taken
+        over the class representatives only and expanded back; this is
+        exact because members of a class have identical rows and columns.
+        """
+        if classes is not None:
+            reps, cls = classes
+            Aq = A[np.ix_(reps, reps)].astype(np.float32)
+            Bq = B[np.ix_(reps, reps)].astype(np.float32)
+            return ((Aq @ Bq) > 0)[np.ix_(cls, cls)]
+        return (A.astype(np.float32) @ B.astype(np.float32)) > 0
+
+    def deq_classes(self, T, F):
+        """The ≜ classes of the current matrices, for collapsing products.
+
+        Vdiffs linked by chains of mutual ⊒ (including the class of ◬) are
+        kept in a union-find rooted at the smallest id. T only grows during
+        a run, so each call unions just the ≜ edges that are new since the
+        last one. A vdiff whose T and F rows and columns still differ from
+        its root's (the class has not settled yet) is kept on its own.
+        Returns (reps, cls): the representative ids and, per id, the index
+        of its representative in reps; or None when nothing collapses.
+        """
+        n = len(T)
+        E = T & T.T
+        new = np.argwhere(np.triu(E & ~self.deq_seen, 1))
+        self.deq_seen = E
+        parent = self.deq_parent
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+        for i, j in new.tolist():
+            a, b = find(i), find(j)
+            if a != b:
+                parent[max(a, b)] = min(a, b)
+        label = np.fromiter((find(x) for x in range(n)), dtype=np.intp, count=n)
+        if np.array_equal(label, np.arange(n)):
+            return None
+        settled = ((T == T[label]).all(axis=1) & (T.T == T.T[label]).all(axis=1) &
+                   (F == F[label]).all(axis=1) & (F.T == F.T[label]).all(axis=1))
+        label = np.where(settled, label, np.arange(n))
+        reps, cls = np.unique(label, return_inverse=True)
+        if len(reps) == n:
+            return None
+        return (reps, cls)
+
+    def _inverse_image(self, M):
+        """R with R[x, y] = M[inv y, inv x]: InvP-style conclusions of M."""
+        inv = self.inv
+        return M.T[np.ix_(inv, inv)]
+
+    def _diff(self, P, dst):
+        """Scatter P[src] through the DiffP index arrays onto dst cells."""
+        R = np.zeros_like(P)
+        hit = P[self.diff_src]
+        R[dst[0][hit], dst[1][hit]] = True
+        return R
+
+    def local_conclusions(self, T, F):
+        """(T', F'): the TRUE and FALSE conclusions of the rules that need
+        no matrix product (DiffP, InvP_*, NegDiffP, NegInvP_*) over T and
+        F at once."""
+        zT, zF = T[:, 0], F[:, 0]
+        return (self._diff(T, self.diff_t) | self._inverse_image(T & zT[None, :]) |
+                self._inverse_image(T[0, :][:, None] & T),
+                self._diff(F, self.diff_f) | self._inverse_image(F[0, :][:, None] & F) |
+                self._inverse_image(F & zF[None, :]))
+
+    def _candidates(self, T, F):
+        """Per-rule conclusion matrices of one round, in CLOSURE_RULES order
+        of precedence for origins: (rule, code, matrix)."""
+        E = T & T.T
+        zT, zF = T[:, 0], F[:, 0]
+        classes = self.deq_classes(T, F)
+        return [
+            (R_DIFFP, REL_TRUE, self._diff(T, self.diff_t)),
+            (R_TRANSP, REL_TRUE, self._product(T, T, classes)),
+            (R_INVP_R, REL_TRUE, self._inverse_image(T & zT[None, :])),
+            (R_INVP_L, REL_TRUE, self._inverse_image(T[0, :][:, None] & T)),
+            (R_NEGDIFFP, REL_FALSE, self._diff(F, self.diff_f)),
+            (R_NEGTRANSP, REL_FALSE, self._product(F, F, classes)),
+            (R_NEGTRANSP_DEQ_L, REL_FALSE, self._product(E, F, classes)),
+            (R_NEGTRANSP_DEQ_R, REL_FALSE, self._product(F, E, classes)),
+            (R_NEGINVP_L, REL_FALSE, self._inverse_image(F[0, :][:, None] & F)),
+            (R_NEGINVP_R, REL_FALSE, self._inverse_image(F & zF[None, :])),
+        ]
+
+    def _premises(self, rule, ii, jj, T, F):
+        """Origin premise ids for the conclusions (ii, jj) of rule, using
+        the matrices T and F of the previous round."""
+        inv = self.inv
+        if rule in (R_TRANSP, R_NEGTRANSP, R_NEGTRANSP_DEQ_L, R_NEGTRANSP_DEQ_R):
+            left, right = {
+                R_TRANSP: (T, T), R_NEGTRANSP: (F, F),
+                R_NEGTRANSP_DEQ_L: (T & T.T, F), R_NEGTRANSP_DEQ_R: (F, T & T.T),
+            }[rule]
+            mid = np.empty(len(ii), dtype=np.intp)
+            for s in range(0, len(ii), 1024):
+                rows = left[ii[s:s + 1024]] & right.T[jj[s:s + 1024]]
+                mid[s:s + 1024] = rows.argmax(axis=1)
+            return [(a, c, e) for a, c, e in zip(ii.tolist(), mid.tolist(), jj.tolist())]
+        if rule in (R_INVP_R, R_NEGINVP_R):     # (inv c, inv a) from ab, cd, ◬
+            return [(a, c, 0) for a, c in zip(inv[jj].tolist(), inv[ii].tolist())]
+        if rule in (R_INVP_L, R_NEGINVP_L):     # (inv e, inv c) from ◬, cd, ef
+            return [(0, c, e) for c, e in zip(inv[jj].tolist(), inv[ii].tolist())]
+        if rule == R_NEGDIFFP:
+            return list(zip(ii.tolist(), jj.tolist()))
+        # R_DIFFP: the first premise cell that scatters onto each conclusion
+        hit = np.flatnonzero(T[self.diff_src])
+        dst = self.diff_t[0][hit] * self.n + self.diff_t[1][hit]
+        flat, first = np.unique(dst, return_index=True)
+        pos = np.searchsorted(flat, ii * self.n + jj)
+        src = hit[first[pos]]
+        return list(zip(self.diff_src[0][src].tolist(), self.diff_src[1][src].tolist()))
+
+    def _events(self, rule, code, ii, jj, old, T, F):
+        for premises, i, j in zip(self._premises(rule, ii, jj, T, F), ii.tolist(), jj.tolist()):
+            yield (rule, premises, i, j, code, old)
+
+    def run(self):
+        """Run to the fixpoint, yielding (rule, premises, i, j, code, old)
+        events like ClosureEngine.propagate(); stops after a collision or
+        when the budget is spent."""
+        T, F, stats = self.T, self.F, self.stats
+        pending = int(np.count_nonzero(T) + np.count_nonzero(F))
+        while True:
+            if self.budget is not None and not self.budget.report(pending):
+                return
+            if stats is not None:
+                stats.round(pending)
+                start = time.perf_counter()
+            cands = self._candidates(T, F)
+            if stats is not None:
+                stats.add_time('rules', start)
+                for rule, _, C in cands:
+                    stats.attempts[rule] += int(np.count_nonzero(C))
+                    stats.lookups += C.size
+            newT, newF = np.zeros_like(T), np.zeros_like(F)
+            for _, code, C in cands:
+                if code == REL_TRUE:
+                    newT |= C
+                else:
+                    newF |= C
+            newT &= ~T
+            newF &= ~F
+            clash = (newT & F) | (newF & T) | (newT & newF)
+            if clash.any():
+                i, j = (int(k) for k in np.unravel_index(np.argmax(clash), clash.shape))
+                if not F[i, j]:
+                    # i⊒j holds (or is derived this round too) and i⋣j clashes with it
+                    if newT[i, j]:
+                        rule = next(r for r, c, C in cands if c == REL_TRUE and C[i, j])
+                        yield from self._events(rule, REL_TRUE, np.array([i]), np.array([j]),
+                                                REL_UNDEFINED, T, F)
+                    code, old = REL_FALSE, REL_TRUE
+                else:
+                    code, old = REL_TRUE, REL_FALSE
+                rule = next(r for r, c, C in cands if c == code and C[i, j])
+                yield from self._events(rule, code, np.array([i]), np.array([j]), old, T, F)
+                return
+            if not newT.any() and not newF.any():
+                break
+            # Attribute every new cell to the first rule (in cands order) producing it
+            start = time.perf_counter()
+            events = []
+            for code, new in ((REL_TRUE, newT), (REL_FALSE, newF)):
+                left = new.copy()
+                for rule, c, C in cands:
+                    if c != code:
+                        continue
+                    mine = left & C
+                    if mine.any():
+                        left &= ~mine
+                        ii, jj = np.nonzero(mine)
+                        events.extend(self._events(rule, code, ii, jj, REL_UNDEFINED, T, F))
+            events.sort(key=lambda ev: (ev[2], ev[3], ev[4]))
+            if stats is not None:
+                stats.add_time('origins', start)
+            pending = len(events)
+            yield from events
+            T, F = T | newT, F | newF
+            self.T, self.F = T, F
+            self.codes[:] = (T * np.uint8(REL_TRUE) + F * np.uint8(REL_FALSE)).tobytes()
+
+class ReferenceClosureEngine:
+    """EudoxaManager.reference_closure() behind the backend interface.
+
+    The matrix is decoded into a scratch manager with the aspects of ids,
+    closed by the naive fixpoint and the result translated back into
+    events, so the executable specification can be selected and compared
+    like any other backend. It is slow and only honours the budget between
+    its events; it is not meant for production use. With stats, only its
+    conclusions are counted as attempts, in a single round.
+    """
+
+    # Set by EudoxaManager.closure_runner() when the closure is instrumented
+    stats: 'ClosureStats' = None
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, budget: ClosureBudget = None):
+        self.ids = ids
+        self.n = len(ids)
+        self.codes = codes
+        self.budget = budget
+
+    def run(self):
+        ids, n, codes = self.ids, self.n, self.codes
+        vds = ids.vdiffs
+        mgr = EudoxaManager()
+        for name, levels in ids.signature:
+            aspect = Aspect(name, str)
+            aspect.levels = dict.fromkeys(levels)
+            mgr.aspects[name] = aspect
+        mgr.vdiff_comparison_matrix = {
+            vd1: {vd2: CODE_RELS[codes[i * n + j]] for j, vd2 in enumerate(vds)}
+            for i, vd1 in enumerate(vds)
+        }
+        if self.stats is not None:
+            self.stats.round(0)
+        closure, adds, colls = mgr.reference_closure()
+        codes[:] = ids.encode(closure)
+        for (rule, detail, (vd1, rel, vd2)) in adds:
+            yield self._event(rule, detail, vd1, vd2, REL_CODES[rel], REL_UNDEFINED)
+        for (rule, detail, (vd1, old, vd2, rel)) in colls[:1]:
+            yield self._event(rule, detail, vd1, vd2, REL_CODES[rel], REL_CODES[old])
+
+    def _event(self, rule: str, detail: List, vd1: VDiff, vd2: VDiff,
+               code: int, old: int) -> Tuple:
+        id_of = self.ids.id_of
+        premises = tuple(id_of(vd) for vd in detail[0::2])
+        r = CLOSURE_RULES.index(rule)
+        if self.stats is not None:
+            self.stats.attempts[r] += 1
+            self.stats.lookups += 1
+        return (r, premises, id_of(vd1), id_of(vd2), code, old)
+
 from itertools import product
 
 import openpyxl
 
+# Closure backends by name. A backend is a class constructed as
+# backend(ids, codes, budget=None) over a VDiffIds table and
+# its flat REL_* code matrix; run() yields (rule, premises, i, j, code, old)
+# events, ends after the first collision and leaves codes closed in place.
+# Every backend must derive the same cells as reference_closure(); check a
+# new one with compare_closure_engines() before registering it.
+CLOSURE_BACKENDS = {'python': ClosureEngine, 'numpy': NumpyClosureEngine,
+                    'reference': ReferenceClosureEngine}
+
+def register_closure_backend(name: str, backend: Type):
+    """Make backend selectable as closure(engine=name) and include it in
+    compare_closure_engines() runs."""
+    if not callable(getattr(backend, 'run', None)):
+        raise ValueError(f"Closure backend '{name}' has no run() method.")
+    CLOSURE_BACKENDS[name] = backend
+
+class LevelOrderClosure:
+    """Closes one aspect whose only relations are level relations.
+
+    When every defined cell off the diagonal relates a vdiff to ◬ (what
+    set_aspect_level_relation writes), the closure is determined by orders
+    on the levels and needs no joins. With
+
+      P  the reflexive-transitive closure of c ⪰ d (Δ(c,d)⊒◬ or ◬⊒Δ(d,c)),
+      E  = P ∩ Pᵀ, the levels equal under P,
+      S  the transitive closure of c ≺ d (Δ(c,d)⋣◬ or ◬⋣Δ(d,c)) with
+         E-equal levels substituted at either end,
+
+    the closed matrix has c ⪰ d and c ≺ d on both sides of ◬ and
+
+      Δ(c,d)⊒Δ(e,f)  iff  c⪰d and f⪰e             (through ◬)
+                      or  c⪰e and f⪰d             (DiffP)
+      Δ(c,d)⋣Δ(e,f)  iff  through(c,d,e,f)        (through ◬)
+                      or  through(f,d,e,c)        (NegDiffP)
+
+    where through(c,d,e,f) is c≺d and f≺e, c∼d and f≺e, or c≺d and e∼f
+    (the NegTransP and NegTransP_DEQ_* cases of ComponentClosureEngine's
+    lift). ⋣ composes only with ⋣ and ≜ under the rules, so a weak step
+    does not extend S. run() derives the cells in four rounds — P, S, the
+    cells through ◬ and their DiffP / NegDiffP images — as instances of
+    the closure rules whose premises were derived in an earlier step, so
+    the events are those of a backend and origins stay well-founded.
+
+    If the orders conflict, the matrix is closed by backend instead, so a
+    collision is found and reported exactly as before.
+    """
+
+    # Set by EudoxaManager.closure_runner() when the closure is instrumented
+    stats: 'ClosureStats' = None
+
+    def __init__(self, ids: VDiffIds, codes: bytearray,
+                 backend: Type = ClosureEngine, budget: ClosureBudget = None):
+        self.ids = ids
+        self.n = len(ids)
+        self.codes = codes
+        self.backend = backend
+        self.budget = budget
+
+    @staticmethod
+    def applies(ids: VDiffIds, codes: bytearray) -> bool:
+        """True if ids has a single aspect and codes defines nothing but
+        Δ⊒Δ on the diagonal and cells between a vdiff and ◬."""
+        if len(ids.pair) != 1:
+            return False
+        n = len(ids)
+        m = np.frombuffer(bytes(codes), dtype=np.uint8).reshape(n, n)
+        return bool((m.diagonal() == REL_TRUE).all() and
+                    np.count_nonzero(m[1:, 1:]) == n - 1)
+
+    @staticmethod
+    def _transitive(R):
+        """Transitive closure of a boolean matrix, by repeated squaring."""
+        while True:
+            step = R | (R.astype(np.int64) @ R.astype(np.int64) > 0)
+            if np.array_equal(step, R):
+                return R
+            R = step
+
+    def orders(self) -> Tuple:
+        """(col, row, P, E, S): col[c, d] and row[c, d] are the codes of
+        Δ(c,d) ? ◬ and ◬ ? Δ(c,d), P, E and S the level orders above as
+        L × L boolean arrays."""
+        T, F, n = REL_TRUE, REL_FALSE, self.n
+        grid = np.asarray(self.ids.pair[0], dtype=np.intp)
+        m = np.frombuffer(bytes(self.codes), dtype=np.uint8).reshape(n, n)
+        col, row = m[grid, 0], m[0, grid]
+        P = self._transitive((col == T) | (row.T == T) | np.eye(len(grid), dtype=bool))
+        E = P & P.T
+        S0 = ((col == F) | (row.T == F)).astype(np.int64)
+        Ei = E.astype(np.int64)
+        S = self._transitive(Ei @ S0 @ Ei > 0)
+        return col, row, P, E, S
+
+    def masks(self, P, E, S) -> Tuple:
+        """Boolean m × m masks over the vdiffs other than ◬ (id - 1): the
+        ⊒ and ⋣ cells through ◬ and their DiffP / NegDiffP images."""
+        fr = np.asarray(self.ids.frm[1:], dtype=np.intp)
+        to = np.asarray(self.ids.to[1:], dtype=np.intp)
+        ge, le = P[fr, to], P[to, fr]           # x⊒◬, ◬⊒x
+        lt, gt, eq = S[fr, to], S[to, fr], E[fr, to]   # x⋣◬, ◬⋣x, x≜◬
+        c, d = fr[:, None], to[:, None]         # x = Δ(c,d)
+        e, f = fr[None, :], to[None, :]         # y = Δ(e,f)
+        through = {
+            R_TRANSP: ge[:, None] & le[None, :],
+            R_NEGTRANSP: lt[:, None] & gt[None, :],
+            R_NEGTRANSP_DEQ_L: eq[:, None] & gt[None, :],
+            R_NEGTRANSP_DEQ_R: lt[:, None] & eq[None, :],
+        }
+        images = {
+            R_DIFFP: P[c, e] & P[f, d],
+            R_NEGDIFFP: S[c, e] & (S[f, d] | E[f, d]) | S[f, d] & E[e, c],
+        }
+        return through, images
+
+    def _conflict(self, P, S, through, images):
+        """A cell (i, j) that the orders give both codes, or None."""
+        clash = np.argwhere(P & S)              # Δ(c,d)⊒◬ and Δ(c,d)⋣◬
+        if len(clash):
+            c, d = clash[0]
+            return (self.ids.pair[0][c][d], 0)
+        positive = through[R_TRANSP] | images[R_DIFFP]
+        negative = (through[R_NEGTRANSP] | through[R_NEGTRANSP_DEQ_L] |
+                    through[R_NEGTRANSP_DEQ_R] | images[R_NEGDIFFP])
+        clash = np.argwhere(positive & negative)
+        if len(clash):
+            x, y = clash[0]
+            return (int(x) + 1, int(y) + 1)
+        return None
+
+    def conflict(self):
+        """A cell (i, j) whose closure collides, or None if the closure is
+        consistent; decided from the orders without running."""
+        _, _, P, E, S = self.orders()
+        return self._conflict(P, S, *self.masks(P, E, S))
+
+    def run(self):
+        codes, n, budget, stats = self.codes, self.n, self.budget, self.stats
+        col, row, P, E, S = self.orders()
+        through, images = self.masks(P, E, S)
+        if self._conflict(P, S, through, images) is not None:
+            engine = self.backend(self.ids, codes, budget)
+            if stats is not None:
+                engine.stats = stats
+            yield from engine.run()
+            return
+        phases = (self._order(col, row), self._strict(col, row, E),
+                  self._through_zero(through), self._diff_images(images))
+        pending = 0
+        for phase in phases:
+            if budget is not None and not budget.report(pending):
+                return
+            if stats is not None:
+                stats.round(pending)
+            pending = 0
+            for rule, premises, i, j, code in phase:
+                if stats is not None:
+                    stats.attempts[rule] += 1
+                    stats.lookups += 1
+                p = i * n + j
+                if codes[p] == code:
+                    continue
+                codes[p] = code
+                pending += 1
+                yield (rule, premises, i, j, code, REL_UNDEFINED)
+
+    def _order(self, col, row):
+        """c ⪰ d on both sides of ◬ for the given pairs, then for the
+        transitive closure (Warshall): Δ(i,k)⊒◬ gives Δ(i,j)⊒Δ(k,j) by
+        DiffP, and with Δ(k,j)⊒◬ that gives Δ(i,j)⊒◬ by TransP."""
+        T, grid, inv = REL_TRUE, self.ids.pair[0], self.ids.inv
+        L = len(grid)
+        P = [[c == d or col[c, d] == T or row[d, c] == T for d in range(L)] for c in range(L)]
+        for c in range(L):
+            for d in range(L):
+                if c != d and P[c][d]:
+                    cd = grid[c][d]
+                    if col[c, d] == T:      # Δ(c,d)⊒◬ & ◬⊒◬ ==> ◬⊒Δ(d,c)
+                        yield (R_INVP_R, (cd, 0, 0), 0, inv[cd], T)
+                    else:                   # ◬⊒◬ & ◬⊒Δ(d,c) ==> Δ(c,d)⊒◬
+                        yield (R_INVP_L, (0, 0, inv[cd]), cd, 0, T)
+        for k in range(L):
+            for i in range(L):
+                if i == k or not P[i][k]:
+                    continue
+                for j in range(L):
+                    if j == k or j == i or P[i][j] or not P[k][j]:
+                        continue
+                    P[i][j] = True
+                    ij, kj = grid[i][j], grid[k][j]
+                    yield (R_DIFFP, (grid[i][k], 0), ij, kj, T)
+                    yield (R_TRANSP, (ij, kj, 0), ij, 0, T)
+                    yield (R_INVP_R, (ij, 0, 0), 0, inv[ij], T)
+
+    def _strict(self, col, row, E):
+        """c ≺ d on both sides of ◬ (NegDiffP turns Δ(c,d)⋣◬ into
+        ◬⋣Δ(d,c) and back) for the given pairs, for E-equal levels at
+        either end (NegTransP_DEQ_L with the ≜ from DiffP), then for the
+        transitive closure: ◬⋣Δ(k,i) gives Δ(i,j)⋣Δ(k,j) by NegDiffP, and
+        with Δ(k,j)⋣◬ that gives Δ(i,j)⋣◬ by NegTransP."""
+        T, F, grid, inv = REL_TRUE, REL_FALSE, self.ids.pair[0], self.ids.inv
+        L = len(grid)
+
+        def halves(c, d):
+            cd = grid[c][d]
+            if col[c, d] == F:
+                return [(R_NEGDIFFP, (0, inv[cd]), 0, inv[cd], F)]
+            return [(R_NEGDIFFP, (cd, 0), cd, 0, F)]
+
+        S = [[col[c, d] == F or row[d, c] == F for d in range(L)] for c in range(L)]
+        for c in range(L):
+            for d in range(L):
+                if S[c][d]:
+                    yield from halves(c, d)
+        for a, b in [(a, b) for a in range(L) for b in range(L) if S[a][b]]:
+            ab = grid[a][b]
+            for c in range(L):
+                if c != a and E[a, c] and not S[c][b]:
+                    S[c][b] = True
+                    cb = grid[c][b]
+                    yield (R_DIFFP, (grid[c][a], 0), cb, ab, T)
+                    yield (R_DIFFP, (grid[a][c], 0), ab, cb, T)
+                    yield (R_NEGTRANSP_DEQ_L, (cb, ab, 0), cb, 0, F)
+                    yield (R_NEGDIFFP, (0, inv[cb]), 0, inv[cb], F)
+        for a, b in [(a, b) for a in range(L) for b in range(L) if S[a][b]]:
+            ab = grid[a][b]
+            for d in range(L):
+                if d != b and E[b, d] and not S[a][d]:
+                    S[a][d] = True
+                    ad = grid[a][d]
+                    yield (R_DIFFP, (0, grid[d][b]), ad, ab, T)
+                    yield (R_DIFFP, (0, grid[b][d]), ab, ad, T)
+                    yield (R_NEGTRANSP_DEQ_L, (ad, ab, 0), ad, 0, F)
+                    yield (R_NEGDIFFP, (0, inv[ad]), 0, inv[ad], F)
+        for k in range(L):
+            for i in range(L):
+                if not S[i][k]:
+                    continue
+                for j in range(L):
+                    if S[i][j] or not S[k][j]:
+                        continue
+                    S[i][j] = True
+                    ij, kj = grid[i][j], grid[k][j]
+                    yield (R_NEGDIFFP, (ij, kj), ij, kj, F)
+                    yield (R_NEGTRANSP, (ij, kj, 0), ij, 0, F)
+                    yield (R_NEGDIFFP, (0, inv[ij]), 0, inv[ij], F)
+
+    @staticmethod
+    def _through_zero(through):
+        """x rel y from x rel ◬ and ◬ rel y, as in ComponentClosureEngine._lift."""
+        for rule, mask in through.items():
+            code = REL_TRUE if rule == R_TRANSP else REL_FALSE
+            for x, y in zip(*np.nonzero(mask)):
+                x, y = int(x) + 1, int(y) + 1
+                yield (rule, (x, 0, y), x, y, code)
+
+    def _diff_images(self, images):
+        """Δ(c,d)⊒Δ(e,f) by DiffP from Δ(c,e)⊒Δ(d,f) and Δ(c,d)⋣Δ(e,f) by
+        NegDiffP from Δ(f,d)⋣Δ(e,c), premises derived through ◬."""
+        grid, frm, to = self.ids.pair[0], self.ids.frm, self.ids.to
+        for x, y in zip(*np.nonzero(images[R_DIFFP])):
+            x, y = int(x) + 1, int(y) + 1
+            yield (R_DIFFP, (grid[frm[x]][frm[y]], grid[to[x]][to[y]]), x, y, REL_TRUE)
+        for x, y in zip(*np.nonzero(images[R_NEGDIFFP])):
+            x, y = int(x) + 1, int(y) + 1
+            yield (R_NEGDIFFP, (x, y), x, y, REL_FALSE)
+
+class ComponentClosureEngine:
+    """Runs a backend separately on each independent part of the matrix.
+
+    Aspects are joined into a component when a defined relation links two
+    of their (non-◬) vdiffs; ◬ belongs to every component but does not
+    join them. Every component is closed on its own with ◬ included, then
+    the cells between components are filled by lifting through ◬, the
+    only vdiff they share:
+
+      x⊒y  iff  x⊒◬ and ◬⊒y                                    (TransP)
+      x⋣y  iff  x⋣◬ and ◬⋣y          (NegTransP)
+             or x≜◬ and ◬⋣y          (NegTransP_DEQ_L)
+             or x⋣◬ and ◬≜y          (NegTransP_DEQ_R)
+
+    A collision across components implies one inside a component, so
+    only components are checked. run() yields events in global ids like
+    the backend itself, and codes ends up closed as well. The budget is
+    shared by the component runs; nothing is lifted once it is spent, and
+    so is the stats object, which also times the 'components' split.
+
+    With level_orders, a component of one aspect with level relations
+    only is closed by LevelOrderClosure instead of the backend.
+    """
+
+    # Set by EudoxaManager.closure_runner() when the closure is instrumented
+    stats: 'ClosureStats' = None
+
+    def __init__(self, ids: VDiffIds, codes: bytearray,
+                 backend: Type = ClosureEngine, budget: ClosureBudget = None,
+                 level_orders: bool = False):
+        self.ids = ids
+        self.n = len(ids)
+        self.codes = codes
+        self.backend = backend
+        self.budget = budget
+        self.level_orders = level_orders
+
+    def components(self) -> List[List[int]]:
+        """Aspect ordinals of each component, ordered by first aspect."""
+        ids = self.ids
+        parent = list(range(len(ids.pair)))
+        def find(a):
+            while parent[a] != a:
+                parent[a] = parent[parent[a]]
+                a = parent[a]
+            return a
+        n = self.n
+        for m in _DEFINED_CODE.finditer(self.codes):
+            i, j = divmod(m.start(), n)
+            if i and j:
+                parent[find(ids.aspect[i])] = find(ids.aspect[j])
+        groups: Dict[int, List[int]] = {}
+        for a in range(len(parent)):
+            groups.setdefault(find(a), []).append(a)
+        return list(groups.values())
+
+    def _engine(self, ids: VDiffIds, codes: bytearray):
+        if self.level_orders and LevelOrderClosure.applies(ids, codes):
+            engine = LevelOrderClosure(ids, codes, self.backend, self.budget)
+        else:
+            engine = self.backend(ids, codes, self.budget)
+        if self.stats is not None:
+            engine.stats = self.stats
+        return engine
+
+    def run(self):
+        start = time.perf_counter()
+        components = self.components()
+        if self.stats is not None:
+            self.stats.add_time('components', start)
+        if len(components) <= 1:
+            yield from self._engine(self.ids, self.codes).run()
+            return
+        n = self.n
+        full = np.frombuffer(self.codes, dtype=np.uint8).reshape(n, n)
+        members = []
+        for aspects in components:
+            sub = self.ids.subset(aspects)
+            glob = np.asarray(sub.glob, dtype=np.intp)
+            sub_codes = bytearray(full[np.ix_(glob, glob)].tobytes())
+            for rule, premises, i, j, code, old in self._engine(sub, sub_codes).run():
+                g = sub.glob
+                yield (rule, tuple(g[p] for p in premises), g[i], g[j], code, old)
+                if old != REL_UNDEFINED:
+                    return
+            if self.budget is not None and not self.budget.ok():
+                return
+            m = len(sub)
+            full[np.ix_(glob, glob)] = np.frombuffer(sub_codes, dtype=np.uint8).reshape(m, m)
+            members.append(sub.glob[1:])
+        yield from self._lift(members, full)
+
+    def _lift(self, members: List[List[int]], full):
+        """Cross-component events, lifted through ◬."""
+        T, F, stats = REL_TRUE, REL_FALSE, self.stats
+        col, row = full[:, 0].tobytes(), full[0, :].tobytes()   # x rel ◬, ◬ rel y
+        for p, xs in enumerate(members):
+            for q, ys in enumerate(members):
+                if p == q:
+                    continue
+                if stats is not None:
+                    stats.lookups += len(xs) * len(ys)
+                for x in xs:
+                    tx, fx = col[x] == T, col[x] == F
+                    ex = tx and row[x] == T
+                    if not (tx or fx):
+                        continue
+                    for y in ys:
+                        ty, fy = row[y] == T, row[y] == F
+                        if tx and ty:
+                            rule, code = R_TRANSP, T
+                        elif fx and fy:
+                            rule, code = R_NEGTRANSP, F
+                        elif ex and fy:
+                            rule, code = R_NEGTRANSP_DEQ_L, F
+                        elif fx and ty and col[y] == T:
+                            rule, code = R_NEGTRANSP_DEQ_R, F
+                        else:
+                            continue
+                        full[x, y] = code
+                        if stats is not None:
+                            stats.attempts[rule] += 1
+                        yield (rule, (x, 0, y), x, y, code, REL_UNDEFINED)
+
+class PointQuery:
+    """Single-cell questions about the closure of an int-coded matrix,
+    answered without closing all of it.
+
+    A query only touches the components (see ComponentClosureEngine) of
+    the two vdiffs. Each component is closed lazily: its engine run is
+    kept suspended and resumed only until the asked cell is defined, so a
+    relation that holds is usually found after a fraction of the run, and
+    everything derived so far is remembered for later queries. Only an
+    undecided cell needs its component run to the end. Cells between
+    components are lifted through ◬ as in ComponentClosureEngine._lift.
+
+    codes is not modified. After a collision in a component its run stops;
+    answers then reflect the facts derived before it, as closure() does.
+    """
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, backend: Type = ClosureEngine):
+        self.ids = ids
+        self.n = len(ids)
+        self.codes = bytes(codes)
+        self.backend = backend
+        self.component_of: Dict[int, int] = {}
+        for k, aspects in enumerate(ComponentClosureEngine(ids, self.codes).components()):
+            for a in aspects:
+                self.component_of[a] = k
+        self._runs: Dict[int, List] = {}
+
+    def _run(self, k: int) -> List:
+        """[local ids, cells, suspended events] of component k."""
+        run = self._runs.get(k)
+        if run is None:
+            aspects = sorted(a for a, c in self.component_of.items() if c == k)
+            sub = self.ids.subset(aspects)
+            m, n, glob = len(sub), self.n, sub.glob
+            cells = bytearray(m * m)
+            for li, gi in enumerate(glob):
+                cells[li * m:(li + 1) * m] = bytes(self.codes[gi * n + gj] for gj in glob)
+            local = {g: li for li, g in enumerate(glob)}
+            run = self._runs[k] = [local, cells, self.backend(sub, bytearray(cells)).run()]
+        return run
+
+    def _cell(self, k: int, i: int, j: int) -> int:
+        """Code of the global cell (i, j) inside component k, resuming its
+        run until the cell is defined or the run ends."""
+        local, cells, events = self._run(k)
+        m = int(len(cells) ** 0.5)
+        p = local[i] * m + local[j]
+        while cells[p] == REL_UNDEFINED and events is not None:
+            event = next(events, None)
+            if event is None or event[5] != REL_UNDEFINED:
+                events = self._runs[k][2] = None
+                break
+            cells[event[2] * m + event[3]] = event[4]
+        return cells[p]
+
+    def relation(self, i: int, j: int) -> int:
+        """REL_* code of i ? j in the closure."""
+        ki = self.component_of.get(self.ids.aspect[i])
+        kj = self.component_of.get(self.ids.aspect[j])
+        if ki is None and kj is None:   # ◬ ? ◬
+            return self.codes[i * self.n + j]
+        if ki is None or kj is None or ki == kj:
+            return self._cell(ki if kj is None else kj, i, j)
+        T, F = REL_TRUE, REL_FALSE
+        x0, y0 = self._cell(ki, i, 0), self._cell(kj, 0, j)
+        if x0 == T and y0 == T:
+            return T
+        if y0 == F and (x0 == F or (x0 == T and self._cell(ki, 0, i) == T)):
+            return F
+        if x0 == F and y0 == T and self._cell(kj, j, 0) == T:
+            return F
+        return REL_UNDEFINED
+
+class ReachabilityIndex:
+    """Constant-time relations of the closure of an int-coded matrix, read
+    from compact labels instead of an n × n closure.
+
+    The matrix is split into components as in ComponentClosureEngine and
+    each component is closed and reduced to labels on its own:
+
+      level orders   a component of one aspect with level relations only
+                     keeps the L × L orders P, E and S of LevelOrderClosure
+                     and reads a cell from its characterisation;
+      ⊒ classes      any other component keeps the ≜ class of each vdiff,
+                     with the classes numbered in topological order of the
+                     condensed ⊒ DAG, and the ⊒ and ⋣ relations between
+                     classes as packed bit rows (the closure is uniform
+                     within a class);
+      cells          a component whose run collided, or that the class
+                     labels would not reproduce, keeps its closed cells.
+
+    Cells between components are lifted through ◬ (as in PointQuery) from
+    the closed x ? ◬ and ◬ ? y codes, which are kept for every vdiff and
+    for ◬ itself. Memory is
+    O(n) plus the labels, and building never holds more than the closed
+    cells of the largest component.
+
+    codes is not modified. After a collision in a component its run stops;
+    answers then reflect the facts derived before it, as closure() does.
+    """
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, backend: Type = ClosureEngine):
+        self.ids = ids
+        self.n = n = len(ids)
+        full = np.frombuffer(bytes(codes), dtype=np.uint8).reshape(n, n)
+        self.col = bytearray(full[:, 0].tobytes())     # x ? ◬
+        self.row = bytearray(full[0, :].tobytes())     # ◬ ? y
+        self.part = [-1] * n                            # component of each vdiff
+        self.label = [0] * n                            # class or local id
+        self.labels: List[Tuple] = []
+        for aspects in ComponentClosureEngine(ids, full.tobytes()).components():
+            sub = ids.subset(aspects)
+            glob = np.asarray(sub.glob, dtype=np.intp)
+            sub_codes = bytearray(full[np.ix_(glob, glob)].tobytes())
+            k = len(self.labels)
+            for g in sub.glob[1:]:
+                self.part[g] = k
+            labels = None
+            if LevelOrderClosure.applies(sub, sub_codes):
+                labels = self._level_labels(sub, sub_codes)
+            if labels is None:
+                labels = self._class_labels(sub, sub_codes, backend)
+            self.labels.append(labels)
+
+    def _level_labels(self, sub: VDiffIds, sub_codes: bytearray):
+        """('levels', P, E, S) as nested lists, or None if the orders conflict."""
+        closure = LevelOrderClosure(sub, sub_codes)
+        _, _, P, E, S = closure.orders()
+        if closure._conflict(P, S, *closure.masks(P, E, S)) is not None:
+            return None
+        for x, g in enumerate(sub.glob[1:], 1):
+            c, d = sub.frm[x], sub.to[x]
+            self.col[g] = REL_TRUE if P[c, d] else REL_FALSE if S[c, d] else REL_UNDEFINED
+            self.row[g] = REL_TRUE if P[d, c] else REL_FALSE if S[d, c] else REL_UNDEFINED
+        if len(P) and P[0, 0]:  # ◬⊒◬ through DiffP of any Δ(c,d)⊒Δ(c,d)
+            self.col[0] = self.row[0] = REL_TRUE
+        return ('levels', P.tolist(), E.tolist(), S.tolist())
+
+    def _class_labels(self, sub: VDiffIds, sub_codes: bytearray, backend: Type):
+        """('classes', ⊒ rows, ⋣ rows) over the ≜ classes of the closed
+        component, or ('cells', closed cells, m) where classes do not fit."""
+        collided = False
+        for event in backend(sub, sub_codes).run():
+            if event[5] != REL_UNDEFINED:
+                collided = True
+                break
+        m = len(sub)
+        closed = np.frombuffer(bytes(sub_codes), dtype=np.uint8).reshape(m, m)
+        for x, g in enumerate(sub.glob[1:], 1):
+            self.col[g], self.row[g] = closed[x, 0], closed[0, x]
+        if closed[0, 0] != REL_UNDEFINED:
+            self.col[0] = self.row[0] = closed[0, 0]
+        if not collided:
+            ge, nge = closed == REL_TRUE, closed == REL_FALSE
+            first = (ge & ge.T).argmax(axis=1)         # least ≜ member
+            reps, cls = np.unique(first, return_inverse=True)
+            reach = ge[np.ix_(reps, reps)]
+            # Reaching a class reaches all it reaches: more below = earlier
+            order = np.argsort(-reach.sum(axis=1), kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            reach, neg = reach[np.ix_(order, order)], nge[np.ix_(reps, reps)][np.ix_(order, order)]
+            cls = rank[cls]
+            if (np.array_equal(reach[np.ix_(cls, cls)], ge) and
+                    np.array_equal(neg[np.ix_(cls, cls)], nge)):
+                for x, g in enumerate(sub.glob[1:], 1):
+                    self.label[g] = int(cls[x])
+                return ('classes', [bytes(r) for r in np.packbits(reach, axis=1)],
+                        [bytes(r) for r in np.packbits(neg, axis=1)])
+        for x, g in enumerate(sub.glob[1:], 1):
+            self.label[g] = x
+        return ('cells', bytes(sub_codes), m)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the labels in bytes (n × n for a closure)."""
+        size = 3 * self.n
+        for labels in self.labels:
+            if labels[0] == 'levels':
+                size += 3 * len(labels[1]) ** 2
+            elif labels[0] == 'classes':
+                size += sum(map(len, labels[1])) + sum(map(len, labels[2]))
+            else:
+                size += len(labels[1])
+        return size
+
+    def relation(self, i: int, j: int) -> int:
+        """REL_* code of i ? j in the closure."""
+        if i == 0:
+            return self.row[j]
+        if j == 0:
+            return self.col[i]
+        T, F = REL_TRUE, REL_FALSE
+        k = self.part[i]
+        if k != self.part[j]:
+            x0, y0 = self.col[i], self.row[j]
+            if x0 == T and y0 == T:
+                return T
+            if y0 == F and (x0 == F or (x0 == T and self.row[i] == T)):
+                return F
+            if x0 == F and y0 == T and self.col[j] == T:
+                return F
+            return REL_UNDEFINED
+        labels = self.labels[k]
+        if labels[0] == 'classes':
+            a, b = self.label[i], self.label[j]
+            bit = 0x80 >> (b & 7)
+            if a <= b and labels[1][a][b >> 3] & bit:
+                return T
+            return F if labels[2][a][b >> 3] & bit else REL_UNDEFINED
+        if labels[0] == 'cells':
+            return labels[1][self.label[i] * labels[2] + self.label[j]]
+        _, P, E, S = labels
+        frm, to = self.ids.frm, self.ids.to
+        c, d, e, f = frm[i], to[i], frm[j], to[j]
+        if P[c][d] and P[f][e] or P[c][e] and P[f][d]:
+            return T
+        if (S[f][e] and (S[c][d] or E[c][d]) or S[c][d] and E[e][f] or
+                S[c][e] and (S[f][d] or E[f][d]) or S[f][d] and E[e][c]):
+            return F
+        return REL_UNDEFINED
+
+def _premise_cells(engine: ClosureEngine, rule: int, premises: Tuple, i: int, j: int,
+                   known) -> List[Tuple]:
+    """The (i, j, code) cells an event of rule used. known(p) tells whether
+    the cell at offset p was defined before the event; it picks the
+    premise of a NegDiffP event, whose origin shows the conclusion."""
+    if rule == R_DIFFP:
+        return [(premises[0], premises[1], REL_TRUE)]
+    if rule == R_NEGDIFFP:
+        n = engine.n
+        for cd, ef in engine.neg_diff_pairs(i, j):
+            if engine.codes[cd * n + ef] == REL_FALSE and known(cd * n + ef):
+                return [(cd, ef, REL_FALSE)]
+        return []
+    cells = []
+    for rel, (x, y) in zip(RULE_PREMISE_RELS[rule], zip(premises, premises[1:])):
+        if rel == DEQ:
+            cells += [(x, y, REL_TRUE), (y, x, REL_TRUE)]
+        else:
+            cells.append((x, y, REL_CODES[rel]))
+    return cells
+
+def conflict_core(ids: VDiffIds, codes: bytearray) -> List[Tuple]:
+    """A minimal set of the defined cells of codes whose closure collides,
+    as (i, j, code) facts; empty if the closure of codes is consistent.
+
+    One semi-naive run records, for every derived cell, the event that
+    first derived it. The support of the collision is traced back through
+    those events to defined cells, so it only contains facts that took
+    part in the collision, and reduced by _minimal_core(). Diagonal cells
+    (the Δ⊒Δ axiom) are never part of the core. WarmClosure.explain()
+    traces the same way through a warm closure's records, without a run.
+    """
+    n = len(ids)
+    engine = ClosureEngine(ids, bytearray(codes))
+    first: Dict[int, Tuple] = {}   # offset -> (k, rule, premises) of its first derivation
+    clash = None
+    for k, event in enumerate(engine.run()):
+        rule, premises, i, j, code, old = event
+        if old != REL_UNDEFINED:
+            clash = (k, event)
+            break
+        first[i * n + j] = (k, rule, premises)
+    if clash is None:
+        return []
+
+    def support(cells):
+        core, seen = set(), set()
+        todo = list(cells)
+        while todo:
+            i, j, code = todo.pop()
+            p = i * n + j
+            if (p, code) in seen:
+                continue
+            seen.add((p, code))
+            derived = first.get(p)
+            if derived is None:
+                if i != j:
+                    core.add((i, j, code))
+                continue
+            k, rule, premises = derived
+            known = lambda q, k=k: q not in first or first[q][0] < k
+            todo += _premise_cells(engine, rule, premises, i, j, known)
+        return core
+
+    k, (rule, premises, i, j, code, old) = clash
+    known = lambda q: q not in first or first[q][0] < k
+    return _minimal_core(ids, support([(i, j, old)] + _premise_cells(engine, rule, premises,
+                                                                     i, j, known)))
+
+def _minimal_core(ids: VDiffIds, core) -> List[Tuple]:
+    """Reduce the colliding facts core (i, j, code) by a deletion filter:
+    every fact whose removal still leaves a collision is dropped. A check
+    closes only the remaining facts, plus the Δ⊒Δ diagonal, over the
+    vdiffs of the aspects they mention (VDiffIds.subset); aspects without
+    a fact add nothing that could collide."""
+    def collides(facts) -> bool:
+        sub = ids.subset(sorted({ids.aspect[x] for i, j, _ in facts for x in (i, j) if x}))
+        local = {g: x for x, g in enumerate(sub.glob)}
+        m = len(sub)
+        test = bytearray(m * m)
+        test[::m + 1] = bytes([REL_TRUE]) * m
+        for i, j, code in facts:
+            p = local[i] * m + local[j]
+            if test[p] not in (REL_UNDEFINED, code):
+                return True
+            test[p] = code
+        return any(ev[5] != REL_UNDEFINED for ev in ClosureEngine(sub, test).run())
+
+    core = sorted(core)
+    if not collides(core):   # cannot happen for a well-founded trace; keep it unreduced
+        return core
+    for fact in list(core):
+        rest = [f for f in core if f != fact]
+        if collides(rest):
+            core = rest
+    return core
+
+class ConsistencyChecker:
+    """Decides whether the closure of a code matrix collides, without
+    running a closure engine, and names a cell that it would give both
+    codes.
+
+    A matrix with the Δ⊒Δ diagonal (every expanded vdcm) is decided by
+    saturation, alternating two passes that work on whole matrices:
+
+    1. Transitive: the ⊒ graph of the TRUE cells is condensed into its
+       strongly connected components (Tarjan); the vdiffs of one are ≜ by
+       TransP. FALSE cells become edges between components, and a path of
+       them is a derived ⋣ (NegTransP, joined inside a component by
+       NegTransP_DEQ_*). A ⋣ path from a component to one it also reaches
+       by ⊒, or a cycle of them, is a collision. Both reachabilities are
+       bitsets per component over the condensations, so the pass is
+       near-linear in the cells it is given, and it closes them under
+       those rules.
+    2. Local: DiffP, NegDiffP, InvP_* and NegInvP_* are applied to the
+       closed matrices at once (NumpyClosureEngine.local_conclusions). The
+       cells they add are handed to the next transitive pass.
+
+    When the local pass adds nothing, the closed matrices are the closure
+    and the answer is exact. Nothing is derived fact by fact and no
+    origins are kept.
+
+    Without the diagonal, the stages of component_conflict() decide
+    instead: components of the matrix (ComponentClosureEngine.components)
+    with level relations only from their level orders
+    (LevelOrderClosure.conflict), the others by closing them one at a time
+    with backend, up to the first collision. A collision across components
+    implies one inside a component, so that answer is exact too.
+
+    The saturation reports each round to budget, and component_conflict()
+    spends it per derived fact. A spent budget ends the check with None;
+    check budget.incomplete.
+    """
+
+    def __init__(self, ids: VDiffIds, codes: bytearray,
+                 backend: Type = ClosureEngine, budget: ClosureBudget = None):
+        self.ids = ids
+        self.n = len(ids)
+        self.codes = codes
+        self.backend = backend
+        self.budget = budget
+
+    def check(self):
+        """(i, j, old, new) for a cell whose closure gets both codes — old
+        as set or first derived — or None if the closure is consistent."""
+        n = self.n
+        if self.codes[::n + 1].count(REL_TRUE) == n:
+            cell = self.saturated_conflict()
+        else:
+            cell = self.component_conflict()
+        if cell is None or len(cell) == 4:
+            return cell
+        i, j = cell
+        old = self.codes[i * n + j] or REL_TRUE
+        return (i, j, old, REL_TRUE + REL_FALSE - old)
+
+    @staticmethod
+    def _sccs(succ: List[List[int]]) -> Tuple[List[int], int]:
+        """Strongly connected components of a graph given as successor
+        lists (iterative Tarjan). Returns (comp, count); components are
+        numbered in reverse topological order, so an edge u -> v between
+        components has comp[v] < comp[u]."""
+        n = len(succ)
+        index, low = [-1] * n, [0] * n
+        on_stack, stack, comp = [False] * n, [], [-1] * n
+        k = count = 0
+        for root in range(n):
+            if index[root] >= 0:
+                continue
+            index[root] = low[root] = k
+            k += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, 0)]
+            while work:
+                v, pos = work[-1]
+                if pos < len(succ[v]):
+                    work[-1] = (v, pos + 1)
+                    w = succ[v][pos]
+                    if index[w] < 0:
+                        index[w] = low[w] = k
+                        k += 1
+                        stack.append(w)
+                        on_stack[w] = True
+                        work.append((w, 0))
+                    elif on_stack[w]:
+                        low[v] = min(low[v], index[w])
+                    continue
+                work.pop()
+                if work:
+                    u = work[-1][0]
+                    low[u] = min(low[u], low[v])
+                if low[v] == index[v]:
+                    while True:
+                        w = stack.pop()
+                        on_stack[w] = False
+                        comp[w] = count
+                        if w == v:
+                            break
+                    count += 1
+        return comp, count
+
+    @staticmethod
+    def _bit_rows(rows: List[int], k: int):
+        """k × k boolean matrix of bitset rows."""
+        width = (k + 7) // 8
+        packed = np.frombuffer(b''.join(r.to_bytes(width, 'little') for r in rows),
+                               dtype=np.uint8).reshape(k, width)
+        return np.unpackbits(packed, axis=1, count=k, bitorder='little').astype(bool)
+
+    def _transitive(self, T, F) -> Tuple:
+        """The transitive pass over the TRUE and FALSE cells T, F (n × n
+        boolean, T with the diagonal). Returns (cell, None, None) for a
+        cell (i, j) with i ⊒ j and i ⋣ j, else (None, T', F'): T and F
+        closed under TransP, NegTransP and NegTransP_DEQ_*."""
+        n = self.n
+        succ = [np.flatnonzero(row).tolist() for row in T]
+        comp, k = self._sccs(succ)
+        comp_of = np.asarray(comp, dtype=np.intp)
+        rep = [-1] * k                          # smallest vdiff of each component
+        for v in range(n - 1, -1, -1):
+            rep[comp[v]] = v
+        # ⊒ reachability, successors first
+        true_succ: List[set] = [set() for _ in range(k)]
+        ti, tj = np.nonzero(T)
+        for a, b in zip(comp_of[ti].tolist(), comp_of[tj].tolist()):
+            if a != b:
+                true_succ[a].add(b)
+        reach = [0] * k
+        for a in range(k):
+            bits = 1 << a
+            for b in true_succ[a]:
+                bits |= reach[b]
+            reach[a] = bits
+        # ⋣ paths between components; a cycle of them is a collision
+        false_cells = list(zip(*(x.tolist() for x in np.nonzero(F))))
+        false_succ: List[List[int]] = [[] for _ in range(k)]
+        for i, j in false_cells:
+            if comp[i] == comp[j]:
+                return ((i, j), None, None)     # i ⋣ j, but i ≜ j
+            false_succ[comp[i]].append(comp[j])
+        fcomp, fk = self._sccs(false_succ)
+        if fk < k:                              # x ⋣ x, but x ⊒ x
+            sizes = [0] * fk
+            for f in fcomp:
+                sizes[f] += 1
+            a = next(a for a in range(k) if sizes[fcomp[a]] > 1)
+            return ((rep[a], rep[a]), None, None)
+        order = sorted(range(k), key=fcomp.__getitem__)
+        below = [0] * k
+        for a in order:
+            bits = 0
+            for b in false_succ[a]:
+                bits |= (1 << b) | below[b]
+            below[a] = bits
+            both = bits & reach[a]
+            if both:
+                b = (both & -both).bit_length() - 1
+                for i, j in false_cells:
+                    if comp[i] == a and comp[j] == b:
+                        return ((i, j), None, None)
+                return ((rep[a], rep[b]), None, None)
+        cells = np.ix_(comp_of, comp_of)
+        return (None, self._bit_rows(reach, k)[cells], self._bit_rows(below, k)[cells])
+
+    def transitive_conflict(self):
+        """The transitive pass alone over the cells of codes: a cell (i, j)
+        with i ⊒ j by TransP and i ⋣ j by the negative transitive rules,
+        or None. Relies on the Δ⊒Δ diagonal; without it the pass is
+        skipped."""
+        n = self.n
+        if self.codes[::n + 1].count(REL_TRUE) != n:
+            return None
+        m = np.frombuffer(bytes(self.codes), dtype=np.uint8).reshape(n, n)
+        return self._transitive(m == REL_TRUE, m == REL_FALSE)[0]
+
+    def saturated_conflict(self):
+        """Transitive and local passes in turn until neither adds a cell:
+        a cell (i, j) that the closure gives both codes, or None if there
+        is none (or the budget ran out). Needs the Δ⊒Δ diagonal."""
+        n, budget = self.n, self.budget
+        m = np.frombuffer(bytes(self.codes), dtype=np.uint8).reshape(n, n)
+        T, F = m == REL_TRUE, m == REL_FALSE
+        local = NumpyClosureEngine(self.ids, self.codes)
+        pending = int(np.count_nonzero(T) + np.count_nonzero(F))
+        while True:
+            if budget is not None and not budget.report(pending):
+                return None
+            cell, closed_t, closed_f = self._transitive(T, F)
+            if cell is not None:
+                return cell
+            new_t, new_f = local.local_conclusions(closed_t, closed_f)
+            new_t &= ~closed_t
+            new_f &= ~closed_f
+            clash = (new_t & closed_f) | (new_f & closed_t) | (new_t & new_f)
+            if clash.any():
+                return tuple(int(x) for x in np.unravel_index(np.argmax(clash), clash.shape))
+            if not new_t.any() and not new_f.any():
+                return None
+            # Only the new cells; the transitive ones follow from T and F again
+            T |= new_t
+            F |= new_f
+            pending = int(np.count_nonzero(new_t) + np.count_nonzero(new_f))
+
+    def component_conflict(self):
+        """The component stages, for a matrix without the diagonal: (i, j)
+        from a level order, (i, j, old, new) from a collision event, or
+        None."""
+        ids, n = self.ids, self.n
+        full = np.frombuffer(bytes(self.codes), dtype=np.uint8).reshape(n, n)
+        for aspects in ComponentClosureEngine(ids, self.codes).components():
+            sub = ids.subset(aspects)
+            glob = np.asarray(sub.glob, dtype=np.intp)
+            sub_codes = bytearray(full[np.ix_(glob, glob)].tobytes())
+            g = sub.glob
+            if LevelOrderClosure.applies(sub, sub_codes):
+                cell = LevelOrderClosure(sub, sub_codes).conflict()
+                if cell is not None:
+                    return (g[cell[0]], g[cell[1]])
+                continue
+            budget = self.budget
+            for rule, premises, i, j, code, old in self.backend(
+                    sub, sub_codes, budget).run():
+                if old != REL_UNDEFINED:
+                    return (g[i], g[j], old, code)
+                if budget is not None and not budget.spend():
+                    return None
+        return None
+
+class ClosureCache:
+    """Bounded LRU cache of closure() results keyed by a vdcm fingerprint.
+
+    An entry is held packed over the ids of its matrix: the closed relation
+    codes, the adds as a ProvenanceLog and the collisions with their vdiffs
+    as ids (see _pack). get() unpacks a fresh (closure, adds, colls), so a
+    cached entry never changes. In memory at most maxsize entries and
+    maxbytes of packed data are kept, least recently used first out.
+
+    If directory is set, entries are also written there so they outlive
+    the process; the app puts it next to the session store. Each file is
+    plain JSON (ids signature, base64 codes, encoded log) behind a BLAKE2b
+    checksum, at most maxsize files are kept, oldest first out, and a file
+    that does not check out or decode is a cache miss.
+    """
+
+    def __init__(self, maxsize: int = 32, directory: str = None, maxbytes: int = 64 << 20):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.directory = directory
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    @staticmethod
+    def _pack(result: Tuple) -> Tuple:
+        """(ids, codes, adds, colls) of a closure() result: colls as
+        [rule_label, detail, coll] with every vdiff replaced by its id."""
+        closure, adds, colls = result
+        ids = adds.ids
+        packed_colls = []
+        if colls:
+            label_ids = {vd: k for k, vd in enumerate(ids.labels)}
+            as_ids = lambda entry: [x if isinstance(x, str) else label_ids[x] for x in entry]
+            packed_colls = [[rule, as_ids(detail), as_ids(coll)] for rule, detail, coll in colls]
+        return (ids, bytes(ids.encode(closure)), adds.copy(), packed_colls)
+
+    @staticmethod
+    def _unpack(packed: Tuple) -> Tuple:
+        ids, codes, adds, colls = packed
+        vds, n = ids.vdiffs, len(ids)
+        closure = {vd: dict(zip(vds, [CODE_RELS[c] for c in codes[i * n:(i + 1) * n]]))
+                   for i, vd in enumerate(vds)}
+        labels = ids.labels
+        as_vdiffs = lambda entry: [x if isinstance(x, str) else labels[x] for x in entry]
+        return (closure, adds.copy(),
+                [[rule, as_vdiffs(detail), as_vdiffs(coll)] for rule, detail, coll in colls])
+
+    @staticmethod
+    def _size(packed: Tuple) -> int:
+        """Approximate memory held by a packed entry, in bytes."""
+        _, codes, adds, colls = packed
+        return len(codes) + 22 * len(adds) + 64 * len(colls)
+
+    def _remember(self, key: str, packed: Tuple):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._bytes -= self._size(old)
+        self._entries[key] = packed
+        self._bytes += self._size(packed)
+        while self._entries and (len(self._entries) > self.maxsize or self._bytes > self.maxbytes):
+            self._bytes -= self._size(self._entries.popitem(last=False)[1])
+
+    def _dumps(self, key: str, packed: Tuple) -> bytes:
+        ids, codes, adds, colls = packed
+        body = json.dumps({
+            "key": key,
+            "signature": [[name, list(levels)] for name, levels in ids.signature],
+            "codes": base64.b64encode(zlib.compress(codes)).decode("ascii"),
+            "adds": adds.encode(),
+            "colls": colls,
+        }).encode("utf-8")
+        return hashlib.blake2b(body, digest_size=16).hexdigest().encode("ascii") + b"\n" + body
+
+    def _loads(self, key: str, data: bytes) -> Tuple:
+        """The packed entry stored for key in data; raises on anything else."""
+        digest, body = data.split(b"\n", 1)
+        if digest.decode("ascii") != hashlib.blake2b(body, digest_size=16).hexdigest():
+            raise ValueError("checksum mismatch")
+        stored = json.loads(body)
+        if stored["key"] != key:
+            raise ValueError("key mismatch")
+        ids = VDiffIds.from_signature(
+            tuple((name, tuple(levels)) for name, levels in stored["signature"]))
+        codes = zlib.decompress(base64.b64decode(stored["codes"]))
+        if len(codes) != len(ids) ** 2 or (codes and max(codes) > REL_FALSE):
+            raise ValueError("bad relation codes")
+        adds = ProvenanceLog.decode(ids, stored["adds"])
+        if adds is None:
+            raise ValueError("bad provenance log")
+        labels = len(ids.labels)
+        for rule, detail, coll in stored["colls"]:
+            if rule not in CLOSURE_RULES or not all(
+                    isinstance(x, str) or 0 <= x < labels for x in detail + coll):
+                raise ValueError("bad collision")
+        return (ids, codes, adds, stored["colls"])
+
+    def get(self, key: str):
+        """Return a fresh copy of the cached (closure, adds, colls), or None."""
+        packed = self._entries.get(key)
+        if packed is not None:
+            self._entries.move_to_end(key)
+        elif self.directory:
+            try:
+                with open(self._path(key), "rb") as f:
+                    packed = self._loads(key, f.read())
+            except FileNotFoundError:
+                return None
+            except Exception as e:
+                # Whatever is in the file, it is not an entry we wrote
+                logger.warning(f"Closure cache entry {key} unreadable: {e!r}")
+                return None
+            self._remember(key, packed)
+        else:
+            return None
+        return self._unpack(packed)
+
+    def put(self, key: str, result: Tuple):
+        """Store a (closure, adds, colls) result whose adds is a ProvenanceLog."""
+        packed = self._pack(result)
+        self._remember(key, packed)
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = self._path(key) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self._dumps(key, packed))
+            os.replace(tmp_path, self._path(key))
+            files = sorted((os.path.join(self.directory, name)
+                            for name in os.listdir(self.directory) if name.endswith(".json")),
+                           key=os.path.getmtime)
+            for path in files[:-self.maxsize]:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"Closure cache write failed: {e}")
+
+    def clear(self):
+        """Forget every entry, in memory and on disk."""
+        self._entries.clear()
+        self._bytes = 0
+        if self.directory and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    os.remove(os.path.join(self.directory, name))
+
+class WarmClosure:
+    """Materialised closure of a vdcm, kept alongside the raw matrix and
+    extended incrementally as relations are asserted.
+
+    Holds a ClosureEngine whose codes are the closed matrix, so asserting a
+    fact only joins that fact (and what it derives) against the closure.
+    colls is non-empty if the raw matrix was already contradictory when
+    the closure was built; such a closure cannot be extended.
+
+    log holds one derivation of every derived cell as a ProvenanceLog
+    record, and at[p] the index of the record of the cell at offset p (-1
+    for base and undefined cells). A record's premises were derived by
+    earlier records or are base cells, so tracing records back always ends
+    at base cells. Records of cells that were taken back stay in log until
+    it is compacted.
+    """
+
+    # retract() gives up (returns None) once more than this fraction of the
+    # derived cells has lost its support; rebuilding is cheaper from there
+    rebuild_fraction = 0.25
+
+    def __init__(self, ids: VDiffIds, codes: bytearray, log: ProvenanceLog = None):
+        self.ids = ids
+        self.engine = ClosureEngine(ids, codes)
+        self.colls: List = []
+        n = len(ids)
+        self.log = ProvenanceLog(ids) if log is None else log
+        self.at = array('i', [-1]) * (n * n)
+        for k, (i, j, _) in enumerate(self.log.cells()):
+            self.at[i * n + j] = k
+        self._users: Dict[int, List[int]] = None   # see _premise_users()
+
+    @classmethod
+    def build(cls, ids: VDiffIds, vdcm, make_engine=ClosureEngine) -> 'WarmClosure':
+        """Close vdcm from scratch with make_engine(ids, codes)."""
+        codes = ids.encode(vdcm)
+        colls = []
+        log = ProvenanceLog(ids)
+        for event in make_engine(ids, codes).run():
+            if event[5] != REL_UNDEFINED:
+                origin, _, coll = ids.entry(event)
+                app_ac(origin, (None, coll), [], colls)
+                break
+            log.record(event)
+        warm = cls(ids, codes, log)
+        warm.colls = colls
+        return warm
+
+    def cells(self):
+        """Yield (vd1, rel, vd2) for every defined cell of the closure."""
+        vds = self.ids.vdiffs
+        for i, j, code in self.engine.facts():
+            yield (vds[i], CODE_RELS[code], vds[j])
+
+    def stage(self, origin: List, entries, pending: Dict[int, int] = None) -> Tuple:
+        """Check the entries (vd1, vd2, rel) against the closure without
+        changing it. Returns (colls, delta): collisions in the format of
+        set_vdiff_relation, and the (i, j, code) facts that are new.
+        pending maps cell offsets to codes staged earlier in the same
+        transaction; it is updated with the new facts."""
+        codes, n, ids = self.engine.codes, self.engine.n, self.ids.ids
+        colls, delta = [], []
+        pending = {} if pending is None else pending
+        for vd1, vd2, rel in entries:
+            i, j = ids[_vdiff_key(vd1)], ids[_vdiff_key(vd2)]
+            code = REL_CODES[rel]
+            old = pending.get(i * n + j, codes[i * n + j])
+            if old == code:
+                continue
+            if old != REL_UNDEFINED:
+                app_ac(origin, (None, [vd1, CODE_RELS[old], vd2, rel]), [], colls)
+            else:
+                pending[i * n + j] = code
+                delta.append((i, j, code))
+        return (colls, delta)
+
+    def extend(self, delta) -> Tuple:
+        """Add the facts in delta to the closure and propagate them.
+        Returns (adds, colls) for the consequences, adds as a
+        ProvenanceLog; after a collision every change is rolled back,
+        leaving the closure as it was."""
+        adds = ProvenanceLog(self.ids)
+        mark = len(self.log)
+        changed = self._add_base(delta)
+        for event in self.engine.propagate(list(delta)):
+            if event[5] != REL_UNDEFINED:
+                self._take_back(changed, mark)
+                origin, _, coll = self.ids.entry(event)
+                return ([], [[origin[0], origin[1], coll]])
+            self._record(event)
+            adds.record(event)
+            changed.append(event[2:5])
+        return (adds, [])
+
+    def explain(self, delta, is_base) -> List[Tuple]:
+        """The cells (i, j, code) that the collision of extending the
+        closure by the facts delta rests on: a clash with a cell of the
+        closure, or the first collision of propagating delta, traced back
+        through the records to delta and base cells (is_base(i, j) as for
+        retract(); other cells without a record are base cells too).
+        Diagonal cells are left out. Empty if delta does not collide; the
+        closure is unchanged either way. Facts of delta that the closure
+        holds already are skipped."""
+        engine, at = self.engine, self.at
+        codes, n = engine.codes, engine.n
+        leaves = set(delta)
+
+        def trace(cells) -> set:
+            core, seen, todo = set(), set(), list(cells)
+            while todo:
+                cell = todo.pop()
+                if cell in seen:
+                    continue
+                seen.add(cell)
+                i, j, _ = cell
+                k = at[i * n + j]
+                if k < 0 or cell in leaves or is_base(i, j):
+                    if i != j:
+                        core.add(cell)
+                else:
+                    todo += self.premise_cells(k)
+            return core
+
+        for i, j, code in delta:
+            old = codes[i * n + j]
+            if old not in (REL_UNDEFINED, code):
+                return sorted(trace([(i, j, old)]) | {(i, j, code)})
+        delta = [(i, j, code) for i, j, code in delta if codes[i * n + j] != code]
+        mark = len(self.log)
+        changed = self._add_base(delta)
+        core = []
+        for event in engine.propagate(list(delta)):
+            rule, premises, i, j, code, old = event
+            if old != REL_UNDEFINED:
+                known = lambda q: at[q] < len(self.log)
+                core = sorted(trace([(i, j, old)] +
+                                    _premise_cells(engine, rule, premises, i, j, known)))
+                break
+            self._record(event)
+            changed.append(event[2:5])
+        self._take_back(changed, mark)
+        return core
+
+    def undo(self, delta, adds: ProvenanceLog):
+        """Take back a successful extend(delta) that returned adds."""
+        self._take_back(list(delta) + list(adds.cells()), len(self.log) - len(adds))
+
+    def _add_base(self, facts) -> List[Tuple]:
+        """Put the facts (i, j, code) into the matrix as base cells."""
+        engine = self.engine
+        codes, n, index = engine.codes, engine.n, engine.index
+        for i, j, code in facts:
+            codes[i * n + j] = code
+            index.add(i, j, code)
+        return list(facts)
+
+    def _take_back(self, cells, mark: int):
+        """Remove the cells and drop the records from index mark on, which
+        the cells' records must be (undoing an extension)."""
+        engine = self.engine
+        codes, n, index, at = engine.codes, engine.n, engine.index, self.at
+        for i, j, code in cells:
+            codes[i * n + j] = REL_UNDEFINED
+            index.discard(i, j, code)
+            at[i * n + j] = -1
+        self.log.truncate(mark)
+
+    def _record(self, event):
+        """Append the add event as the derivation of its cell."""
+        i, j = event[2], event[3]
+        k = len(self.log)
+        self.log.record(event)
+        self.at[i * self.engine.n + j] = k
+        if self._users is not None:
+            for q in self.premise_offsets(k):
+                self._users.setdefault(q, []).append(k)
+
+    def premise_cells(self, k: int) -> List[Tuple]:
+        """The (i, j, code) cells the derivation of record k uses."""
+        engine, at = self.engine, self.at
+        rule, premises, i, j, _, _ = self.log.event(k)
+        return _premise_cells(engine, rule, premises, i, j, lambda q: at[q] < k)
+
+    def premise_offsets(self, k: int) -> List[int]:
+        n = self.engine.n
+        return [x * n + y for x, y, _ in self.premise_cells(k)]
+
+    def _premise_users(self) -> Dict[int, List[int]]:
+        """Cell offset -> indices of the live records that use the cell as
+        a premise. Built on first use and kept up to date by _record();
+        may hold stale indices, which callers skip."""
+        if self._users is None:
+            users: Dict[int, List[int]] = {}
+            n, at, log = self.engine.n, self.at, self.log
+            for k, (i, j, _) in enumerate(log.cells()):
+                if at[i * n + j] == k:
+                    for q in self.premise_offsets(k):
+                        users.setdefault(q, []).append(k)
+            self._users = users
+        return self._users
+
+    def _supported(self, k: int, i: int, j: int, code: int, is_base):
+        """A derivation of the cell of record k from cells in the matrix
+        that are base cells or derived by records before k, as (rule,
+        premises); the recorded one if it still holds. None if there is
+        none."""
+        engine, at, n = self.engine, self.at, self.engine.n
+        codes = engine.codes
+        known = lambda q: at[q] < k
+        def holds(cells):
+            return bool(cells) and all(codes[x * n + y] == c and (at[x * n + y] < k or is_base(x, y))
+                                       for x, y, c in cells)
+        if holds(self.premise_cells(k)):
+            return self.log.event(k)[:2]
+        for rule, premises in engine.derivations(i, j, code):
+            if holds(_premise_cells(engine, rule, premises, i, j, known)):
+                return (rule, premises)
+        return None
+
+    def retract(self, facts, is_base) -> ProvenanceLog:
+        """Remove the base facts (i, j, code) from the closure. is_base(i, j)
+        tells whether a cell is still defined in the raw matrix; such cells
+        are never deleted.
+
+          1. Forward: the records that use a removed cell are visited in
+             record order. One that still has a derivation from base cells
+             and earlier records keeps its cell (re-pointed to that
+             derivation); the others lose theirs, and their users are
+             visited in turn. So only cells whose support really depended
+             on the removed facts are deleted.
+          2. Rederive: a deleted cell that has a one-step derivation from
+             what is left (from later records, which step 1 does not use)
+             is put back, and the engine propagates from those.
+
+        Returns the records of the removed facts that stay in the closure
+        through a derivation, as a ProvenanceLog: the only cells whose
+        status changes without leaving the closure. Returns None, leaving
+        the closure unusable, once more than rebuild_fraction of the derived
+        cells has been deleted; the caller rebuilds it then.
+        """
+        engine, log, at = self.engine, self.log, self.at
+        codes, n, index = engine.codes, engine.n, engine.index
+        users = self._premise_users()
+        limit = self.rebuild_fraction * np.count_nonzero(np.frombuffer(at, dtype=np.int32) >= 0)
+        gone: Dict[int, Tuple] = {}
+        heap: List[int] = []
+
+        def delete(i, j, code):
+            p = i * n + j
+            codes[p] = REL_UNDEFINED
+            index.discard(i, j, code)
+            at[p] = -1
+            gone[p] = (i, j, code)
+            for k in users.get(p, ()):
+                heapq.heappush(heap, k)
+
+        removed = [f for f in facts if codes[f[0] * n + f[1]] == f[2]]
+        for i, j, code in removed:
+            delete(i, j, code)
+        while heap:
+            k = heapq.heappop(heap)
+            if k >= len(log):
+                continue
+            i, j, code = log.i[k], log.j[k], log.code[k]
+            if at[i * n + j] != k:
+                continue   # stale, or deleted already
+            if is_base(i, j):   # kept as a base cell, which needs no record
+                at[i * n + j] = -1
+                continue
+            derivation = self._supported(k, i, j, code, is_base)
+            if derivation is None:
+                delete(i, j, code)
+                if len(gone) > limit:
+                    return None
+            elif derivation != self.log.event(k)[:2]:
+                log.replace(k, derivation)
+                for q in self.premise_offsets(k):
+                    users.setdefault(q, []).append(k)
+
+        rederived = []
+        for p, (i, j, code) in gone.items():
+            for rule, premises in engine.derivations(i, j, code):
+                codes[p] = code
+                index.add(i, j, code)
+                event = (rule, premises, i, j, code, REL_UNDEFINED)
+                self._record(event)
+                rederived.append(event)
+                break
+        for event in engine.propagate([ev[2:5] for ev in rederived]):
+            self._record(event)
+        kept = ProvenanceLog(self.ids)
+        for i, j, code in removed:
+            k = at[i * n + j]
+            if k >= 0:
+                kept.record(log.event(k))
+        if len(log) > 2 * np.count_nonzero(np.frombuffer(at, dtype=np.int32) >= 0) + 1024:
+            self._compact()
+        return kept
+
+    def records_of(self, facts) -> ProvenanceLog:
+        """The records of those facts (i, j, code) that the closure derives."""
+        n, at, codes = self.engine.n, self.at, self.engine.codes
+        out = ProvenanceLog(self.ids)
+        for i, j, code in facts:
+            k = at[i * n + j]
+            if k >= 0 and codes[i * n + j] == code:
+                out.record(self.log.event(k))
+        return out
+
+    def _compact(self):
+        """Drop the records of cells no longer derived by them."""
+        n, at, log = self.engine.n, self.at, self.log
+        live = [k for k, (i, j, _) in enumerate(log.cells()) if at[i * n + j] == k]
+        if len(live) == len(log):
+            return
+        compact = ProvenanceLog(self.ids)
+        for k in live:
+            event = log.event(k)
+            at[event[2] * n + event[3]] = len(compact)
+            compact.record(event)
+        self.log = compact
+        self._users = None
+
+class WarmClosureCache:
+    """Warm closures of the sessions' matrices, kept in the process between
+    requests so a manager loaded for a session does not close its matrix
+    again.
+
+    One entry per session, under the vdcm_fingerprint() of the matrix it
+    closes. take() hands the closure to one manager, which then changes it
+    in place, and keep() puts it back; at most maxsize sessions are kept,
+    least recently used first out.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+
+    def take(self, session: str, fingerprint: str) -> 'WarmClosure':
+        """Remove and return the session's closure if it closes the matrix
+        with that fingerprint, else None."""
+        entry = self._entries.pop(session, None)
+        if entry is None or entry[0] != fingerprint:
+            return None
+        return entry[1]
+
+    def keep(self, session: str, fingerprint: str, warm: 'WarmClosure'):
+        self._entries.pop(session, None)
+        self._entries[session] = (fingerprint, warm)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
 class EudoxaManager:
-    
+
+    # Default closure backend, a key of CLOSURE_BACKENDS (numpy is a hard
+    # dependency, so its engine, which collapses ≜ classes, is the default)
+    closure_engine = 'numpy'
+    # Close independent groups of aspects separately (ComponentClosureEngine)
+    closure_components = True
+    # Close aspects with level relations only from their level order
+    # (LevelOrderClosure); needs closure_components
+    closure_level_orders = True
+    # closure() results shared by all managers of the process (the app loads a
+    # new manager per request), bounded in entries and bytes; assign per
+    # instance to separate one, None disables caching
+    closure_cache: ClosureCache = ClosureCache()
+    # Warm closures of the sessions of the process, by session_key; None
+    # disables keeping them between managers
+    warm_closures: WarmClosureCache = WarmClosureCache()
+    # Called with the ClosureStats of every closure() when set (a staticmethod
+    # when set on the class); turns on instrumentation
+    closure_hook = None
+
     def __init__(self):
         logger.info('Initializing EudoxaManager')
         self.aspects: Dict[str, Aspect] = {}
         self.consequences : Dict[str, Consequence]  = {}
         self.vdiff_comparison_matrix: Dict[VDiff, Dict[VDiff, str]] = {}
+        self._vdiff_ids: VDiffIds = None
+        self._warm_closure: WarmClosure = None
+        # Session the manager was loaded for, the key of its warm closure in
+        # warm_closures (see keep_warm_closure)
+        self.session_key: str = None
+        self._point_query: PointQuery = None
+        self._reachability: ReachabilityIndex = None
 
     def has_aspect(self, aspect_name: str) -> bool:
         return aspect_name in self.aspects
@@ -888,6 +3615,8 @@ class EudoxaManager:
             for k in list(vdiff_keys):
                 row.pop(k, None)
 
+        self.invalidate_closure()
+
         # Remove level from aspect
         del aspect.levels[level]
         aspect.vdiffs = [vd for vd in aspect.vdiffs
@@ -1012,6 +3741,8 @@ class EudoxaManager:
             for k in list(vdiff_keys):
                 row.pop(k, None)
 
+        self.invalidate_closure()
+
         # Remove aspect from model
         del self.aspects[aspect_name]
 
@@ -1056,52 +3787,41 @@ class EudoxaManager:
             raise ValueError(f"Aspect level '{la}' [{a_type}] does not exist.")
         if not lb_str in a.levels:
             raise ValueError(f"Aspect level '{lb}' [{a_type}] does not exist.")
-        zero = NATURAL_ZERO
-        vd_ab = VDiff(aspect, la_str, lb_str)
-        vd_ba = VDiff(aspect, lb_str, la_str)
 
         origin = ['SETREL', [aspect, la_str, rel, lb_str]]
-        if rel == UNDEFINED:
-            app_ac(origin, self.set_vdiff_relation(vd_ab, zero, UNDEFINED), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(vd_ba, zero, UNDEFINED), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ab, UNDEFINED), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ba, UNDEFINED), adds, colls)
-        elif rel == BT:
-            app_ac(origin, self.set_vdiff_relation(vd_ab, zero, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(vd_ba, zero, FALSE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ab, FALSE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ba, TRUE), adds, colls)
-        elif rel == BTE:
-            app_ac(origin, self.set_vdiff_relation(vd_ab, zero, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ba, TRUE), adds, colls)
-        elif rel == EQ:
-            app_ac(origin, self.set_vdiff_relation(vd_ab, zero, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(vd_ba, zero, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ab, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ba, TRUE), adds, colls)
-        elif rel == WTE:
-            app_ac(origin, self.set_vdiff_relation(vd_ba, zero, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ab, TRUE), adds, colls)
-        elif rel == WT:
-            app_ac(origin, self.set_vdiff_relation(vd_ba, zero, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(vd_ab, zero, FALSE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ba, FALSE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(zero, vd_ab, TRUE), adds, colls)
+        for vd1, vd2, r in self.aspect_level_relation_entries(aspect, la_str, lb_str, rel):
+            app_ac(origin, self.set_vdiff_relation(vd1, vd2, r), adds, colls)
         return (adds, colls)
 
+    def aspect_level_relation_entries(self, aspect: str, la_str: str, lb_str: str,
+                                      rel: str) -> List[Tuple]:
+        """The vdcm entries (vd1, vd2, rel) that encode la rel lb in aspect."""
+        zero = NATURAL_ZERO
+        ab = VDiff(aspect, la_str, lb_str)
+        ba = VDiff(aspect, lb_str, la_str)
+        return {
+            UNDEFINED: [(ab, zero, UNDEFINED), (ba, zero, UNDEFINED),
+                        (zero, ab, UNDEFINED), (zero, ba, UNDEFINED)],
+            BT:  [(ab, zero, TRUE), (ba, zero, FALSE), (zero, ab, FALSE), (zero, ba, TRUE)],
+            BTE: [(ab, zero, TRUE), (zero, ba, TRUE)],
+            EQ:  [(ab, zero, TRUE), (ba, zero, TRUE), (zero, ab, TRUE), (zero, ba, TRUE)],
+            WTE: [(ba, zero, TRUE), (zero, ab, TRUE)],
+            WT:  [(ba, zero, TRUE), (ab, zero, FALSE), (zero, ba, FALSE), (zero, ab, TRUE)],
+        }.get(rel, [])
+
     def try_set_aspect_level_relation(self, aspect: str, la, lb, rel: str) -> Tuple:
-        """Validate and commit a relation addition using the closure as a staging area.
+        """Validate and commit a relation addition against the warm closure.
 
         Flow:
-          1. Compute the current closure from the matrix.
-          2. Apply the requested addition to the closure (not the matrix).
-          3. If that causes an immediate collision, reject and return it.
-          4. Recompute the closure of the staged dict.
-          5. If the recomputed closure has collisions, reject and return them.
-          6. If clean, commit only the explicit addition to the matrix.
-             Return direct adds and any inferred additions from the closure.
+          1. Check the requested entries against the warm closure.
+          2. If that causes an immediate collision, reject and return it.
+          3. Add the entries to the warm closure and propagate only their
+             consequences.
+          4. If that produces a collision, roll back and reject.
+          5. If clean, commit only the explicit addition to the matrix.
+             Return direct adds and the newly inferred additions.
+        Unsetting (rel == UNDEFINED) goes through _try_unset instead.
         """
-        import copy
         a = self.get_aspect(aspect)
         a_type = a.data_type
         la_str, lb_str = str(la), str(lb)
@@ -1112,88 +3832,386 @@ class EudoxaManager:
         if lb_str not in a.levels:
             raise ValueError(f"Aspect level '{lb}' [{a_type}] does not exist.")
 
-        # Step 1: compute current closure as the staging area
-        staged, _, _ = self.closure()
-
-        # Step 2: apply the requested addition to the staging area
-        zero  = NATURAL_ZERO
-        vd_ab = VDiff(aspect, la_str, lb_str)
-        vd_ba = VDiff(aspect, lb_str, la_str)
         origin = ['SETREL', [aspect, la_str, rel, lb_str]]
-        staged_adds, staged_colls = [], []
+        entries = self.aspect_level_relation_entries(aspect, la_str, lb_str, rel)
         if rel == UNDEFINED:
-            app_ac(origin, set_vdiff_relation(staged, vd_ab, zero, UNDEFINED), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, vd_ba, zero, UNDEFINED), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ab, UNDEFINED), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ba, UNDEFINED), staged_adds, staged_colls)
-        elif rel == BT:
-            app_ac(origin, set_vdiff_relation(staged, vd_ab, zero, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, vd_ba, zero, FALSE), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ab, FALSE), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ba, TRUE),  staged_adds, staged_colls)
-        elif rel == BTE:
-            app_ac(origin, set_vdiff_relation(staged, vd_ab, zero, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ba, TRUE),  staged_adds, staged_colls)
-        elif rel == EQ:
-            app_ac(origin, set_vdiff_relation(staged, vd_ab, zero, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, vd_ba, zero, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ab, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ba, TRUE),  staged_adds, staged_colls)
-        elif rel == WTE:
-            app_ac(origin, set_vdiff_relation(staged, vd_ba, zero, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ab, TRUE),  staged_adds, staged_colls)
-        elif rel == WT:
-            app_ac(origin, set_vdiff_relation(staged, vd_ba, zero, TRUE),  staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, vd_ab, zero, FALSE), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ba, FALSE), staged_adds, staged_colls)
-            app_ac(origin, set_vdiff_relation(staged, zero, vd_ab, TRUE),  staged_adds, staged_colls)
-
-        # Step 3: immediate collision in the staged area — reject
-        if staged_colls:
-            return ([], staged_colls, [])
-
-        # Step 4-5: recompute closure on the staged dict and check for inferred collisions
-        # Temporarily swap the matrix for the staged dict to reuse self.closure()
-        original_matrix = self.vdiff_comparison_matrix
-        self.vdiff_comparison_matrix = staged
-        _, inferred_adds, inferred_colls = self.closure()
-        self.vdiff_comparison_matrix = original_matrix
-
-        # Step 5: inferred collision — reject
-        if inferred_colls:
-            return ([], inferred_colls, [])
-
-        # Step 6: clean — commit only the explicit addition to the real matrix
+            return self._try_unset(origin, entries)
+
+        # Steps 1-4: stage on the warm closure
+        inferred_adds, colls = self._try_extend_closure(origin, entries)
+        if colls:
+            return ([], colls, [])
+
+        # Step 5: clean — commit only the explicit addition to the real matrix
         adds, colls = [], []
-        if rel == UNDEFINED:
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ab, zero, UNDEFINED), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ba, zero, UNDEFINED), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ab, UNDEFINED), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ba, UNDEFINED), adds, colls)
-        elif rel == BT:
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ab, zero, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ba, zero, FALSE), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ab, FALSE), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ba, TRUE),  adds, colls)
-        elif rel == BTE:
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ab, zero, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ba, TRUE),  adds, colls)
-        elif rel == EQ:
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ab, zero, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ba, zero, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ab, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ba, TRUE),  adds, colls)
-        elif rel == WTE:
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ba, zero, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ab, TRUE),  adds, colls)
-        elif rel == WT:
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ba, zero, TRUE),  adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, vd_ab, zero, FALSE), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ba, FALSE), adds, colls)
-            app_ac(origin, set_vdiff_relation(original_matrix, zero, vd_ab, TRUE),  adds, colls)
+        for vd1, vd2, r in entries:
+            app_ac(origin, set_vdiff_relation(self.vdiff_comparison_matrix, vd1, vd2, r),
+                   adds, colls)
+        return (adds, [], inferred_adds)
+
+    def try_set_aspect_level_relations(self, aspect: str, changes) -> Tuple:
+        """Batch form of try_set_aspect_level_relation: changes is a list of
+        (la, lb, rel) applied in order as one transaction (see _try_batch).
+        Every level is validated before anything is staged."""
+        return self._try_batch(self._aspect_level_items(aspect, changes))
+
+    def preview_aspect_level_relations(self, aspect: str, changes) -> Tuple:
+        """Dry run of try_set_aspect_level_relations (see _preview)."""
+        return self._preview(self._aspect_level_items(aspect, changes))
+
+    def _aspect_level_items(self, aspect: str, changes) -> List[Tuple]:
+        """(origin, commit_origin, entries) per change (la, lb, rel)."""
+        a = self.get_aspect(aspect)
+        if a is None:
+            raise ValueError(f"Aspect '{aspect}' does not exist.")
+        items = []
+        for la, lb, rel in changes:
+            la_str, lb_str = str(la), str(lb)
+            for lvl in (la, lb):
+                if str(lvl) not in a.levels:
+                    raise ValueError(f"Aspect level '{lvl}' [{a.data_type}] does not exist.")
+            origin = ['SETREL', [aspect, la_str, rel, lb_str]]
+            items.append((origin, origin,
+                          self.aspect_level_relation_entries(aspect, la_str, lb_str, rel)))
+        return items
+
+    def try_set_vdiff_order_relations(self, changes) -> Tuple:
+        """Batch form of try_set_vdiff_order_relation: changes is a list of
+        (vd1, vd2, order_rel) applied in order as one transaction (see
+        _try_batch)."""
+        return self._try_batch(self._vdiff_order_items(changes))
+
+    def preview_vdiff_order_relations(self, changes) -> Tuple:
+        """Dry run of try_set_vdiff_order_relations (see _preview)."""
+        return self._preview(self._vdiff_order_items(changes))
+
+    def _vdiff_order_items(self, changes) -> List[Tuple]:
+        """(origin, commit_origin, entries) per change (vd1, vd2, order_rel)."""
+        return [(['SETVDREL', [repr(vd1), rel, repr(vd2)]], ['SETREL', [vd1, rel, vd2]],
+                 self.vdiff_order_relation_entries(vd1, vd2, rel))
+                for vd1, vd2, rel in changes]
+
+    def _preview(self, items) -> Tuple:
+        """What committing items, (origin, commit_origin, entries) per
+        change, would do: (inferred_adds, colls) as from _try_batch, colls
+        as (k, coll_entry) pairs. Nothing is changed. The changes are
+        propagated on the warm closure and undone again, so a preview of a
+        clean change costs only its consequences, and one that collides is
+        attributed as in _try_extend_group.
+
+        Unsets cannot be previewed (ValueError): retracting a fact changes
+        the warm closure by delete-and-rederive, which has no undo."""
+        for origin, _, entries in items:
+            if all(r == UNDEFINED for _, _, r in entries):
+                raise ValueError("Unsetting a relation cannot be previewed.")
+        return self._try_extend_group(list(enumerate(items)), dry_run=True)
+
+    def _try_batch(self, items) -> Tuple:
+        """Apply changes atomically. items holds (origin, commit_origin,
+        entries) per change, in order.
+
+        Consecutive settings are staged on the warm closure together (with
+        entries of earlier changes of the group visible to later ones) and
+        propagated once; an unset commits the group before it and is
+        retracted by delete-and-rederive as in _try_unset.
+
+        Returns (adds, colls, inferred_adds) like the single calls, except
+        that colls holds (k, coll_entry) pairs naming items[k] as the change
+        that caused each collision. All collisions are reported; if there is
+        any, the matrix and the warm closure are left as they were.
+
+        Writes are staged in a VdcmOverlay over the matrix and committed to
+        it only when the whole batch is clean.
+        """
+        base = self.vdiff_comparison_matrix
+        matrix = self.vdiff_comparison_matrix = VdcmOverlay(base)
+        try:
+            adds, colls, inferred_adds, committed = self._run_batch(items, matrix)
+        finally:
+            self.vdiff_comparison_matrix = base
+        if colls:
+            if committed:   # the warm closure has seen part of the batch
+                self.invalidate_closure()
+            return ([], colls, [])
+        matrix.commit()
+        return (adds, [], inferred_adds)
+
+    def _run_batch(self, items, matrix: VdcmOverlay) -> Tuple:
+        """The body of _try_batch over the staged matrix. Returns (adds,
+        colls, inferred_adds, committed), committed telling whether the
+        warm closure took in any change."""
+        adds, colls = [], []
+        inferred_adds = ProvenanceLog(self.vdiff_ids())
+        committed = False
+        k = 0
+        while k < len(items) and not colls:
+            origin, commit_origin, entries = items[k]
+            if all(r == UNDEFINED for _, _, r in entries):
+                unset_adds, unset_colls, inferred = self._try_unset(origin, entries)
+                colls = [(k, c) for c in unset_colls]
+                adds += unset_adds
+                committed = True
+                k += 1
+            else:
+                end = k
+                while end < len(items) and not all(r == UNDEFINED for _, _, r in items[end][2]):
+                    end += 1
+                inferred, colls = self._try_extend_group(list(enumerate(items))[k:end])
+                if not colls:
+                    for _, commit_origin, entries in items[k:end]:
+                        for vd1, vd2, r in entries:
+                            app_ac(commit_origin, set_vdiff_relation(matrix, vd1, vd2, r),
+                                   adds, [])
+                    committed = True
+                k = end
+            if inferred:
+                inferred_adds.extend(inferred)
+        return (adds, colls, inferred_adds, committed)
+
+    def _try_extend_group(self, group, dry_run: bool = False) -> Tuple:
+        """Stage the settings in group, (k, (origin, commit_origin, entries))
+        pairs, on the warm closure and propagate them together. Returns
+        (inferred_adds, colls) with colls as (k, coll_entry); on a
+        collision the changes are extended one at a time to find the one
+        responsible for each, and the closure is left unchanged. With
+        dry_run a clean extension is undone as well."""
+        warm = self.warm_closure()
+        if warm.colls:  # The raw matrix is contradictory already
+            return ([], [(group[0][0], c) for c in warm.colls])
+        pending, colls, deltas = {}, [], []
+        for k, (origin, _, entries) in group:
+            staged_colls, delta = warm.stage(origin, entries, pending)
+            colls += [(k, c) for c in staged_colls]
+            deltas.append((k, delta))
+        if colls:
+            return ([], colls)
+        facts = [f for _, delta in deltas for f in delta]
+        inferred_adds, inferred_colls = warm.extend(facts)
+        if not inferred_colls:
+            if dry_run:
+                warm.undo(facts, inferred_adds)
+            return (inferred_adds, [])
+        done = []
+        for k, delta in deltas:
+            adds, inferred_colls = warm.extend(delta)
+            if inferred_colls:
+                colls += [(k, c) for c in inferred_colls]
+            else:
+                done.append((delta, adds))
+        for delta, adds in reversed(done):
+            warm.undo(delta, adds)
+        return ([], colls)
+
+    def _try_extend_closure(self, origin: List, entries) -> Tuple:
+        """Stage entries on the warm closure. Returns (inferred_adds, colls);
+        on success the warm closure already contains the entries and their
+        consequences, otherwise it is unchanged."""
+        warm = self.warm_closure()
+        if warm.colls:  # The raw matrix is contradictory already
+            return ([], warm.colls)
+        colls, delta = warm.stage(origin, entries)
+        if colls:
+            return ([], colls)
+        return warm.extend(delta)
+
+    def _try_unset(self, origin: List, entries) -> Tuple:
+        """Commit entries that unset relations and retract their
+        consequences from the warm closure (WarmClosure.retract), or rebuild
+        it when most of it would have to go.
+
+        Returns (adds, [], inferred_adds); inferred_adds lists the unset
+        facts that remain in the closure through a derivation, the only
+        facts that change without leaving it. If the matrix was
+        contradictory already, the unset is checked against a closure
+        recomputed from scratch and rejected if that still collides.
+        """
+        warm = self.warm_closure()
+        matrix = self.vdiff_comparison_matrix
+        if warm.colls:
+            staged = VdcmOverlay(matrix)
+            for vd1, vd2, r in entries:
+                set_vdiff_relation(staged, vd1, vd2, r)
+            self.vdiff_comparison_matrix = staged
+            try:
+                _, _, inferred_colls = self.closure()
+            finally:
+                self.vdiff_comparison_matrix = matrix
+            if inferred_colls:
+                return ([], inferred_colls, [])
+            warm = None
+
+        adds, colls, removed = [], [], []
+        ids = self.vdiff_ids().ids
+        for vd1, vd2, r in entries:
+            old_rel = get_vdiff_relation(matrix, vd1, vd2)
+            add, coll = set_vdiff_relation(matrix, vd1, vd2, r)
+            app_ac(origin, (add, coll), adds, colls)
+            if add:
+                removed.append((ids[_vdiff_key(vd1)], ids[_vdiff_key(vd2)], REL_CODES[old_rel]))
+        inferred_adds = None
+        if warm is not None:
+            base, n = warm.ids.encode(matrix), len(warm.ids)
+            def is_base(i, j):
+                return base[i * n + j] != REL_UNDEFINED
+            inferred_adds = warm.retract(removed, is_base)
+        if inferred_adds is None:
+            self.invalidate_closure()
+            inferred_adds = self.warm_closure().records_of(removed)
         return (adds, [], inferred_adds)
 
-    def get_aspect_level_relation(self, aspect: str, la, lb) -> str:
+    def conflict_core(self, entries) -> List[List]:
+        """Explain a rejected change: a minimal set of explicitly set cells,
+        from the matrix and the entries (vd1, vd2, rel) of the change, that
+        cannot hold together, as [vd1, rel, vd2] lists (see conflict_core()).
+
+        Entries are applied in order as in a batch, UNDEFINED unsetting a
+        cell, so the entries of every change up to the rejected one of a
+        batch may be passed. Returns [] if they do not collide.
+
+        When the entries only set cells, the collision is found and traced
+        by WarmClosure.explain() on the warm closure, which costs the
+        consequences of the entries rather than a closure run.
+        """
+        ids = self.vdiff_ids()
+        n = len(ids)
+        base = ids.encode(self.vdiff_comparison_matrix)
+        codes = bytearray(base)
+        delta = {}
+        for vd1, vd2, rel in entries:
+            i, j = ids.id_of(vd1), ids.id_of(vd2)
+            code, old = REL_CODES[rel], codes[i * n + j]
+            if code != REL_UNDEFINED and old not in (REL_UNDEFINED, code):
+                # Clashes with a set cell; the Δ⊒Δ diagonal is an axiom
+                existing = [] if i == j else [[vd1, CODE_RELS[old], vd2]]
+                return existing + [[vd1, rel, vd2]]
+            codes[i * n + j] = code
+            delta[(i, j, code)] = None
+        settings = all(code != REL_UNDEFINED for _, _, code in delta)
+        if settings and not self.warm_closure().colls:
+            # Trace the collision through the warm closure's records
+            core = self.warm_closure().explain(list(delta),
+                                               lambda i, j: base[i * n + j] != REL_UNDEFINED)
+            core = _minimal_core(ids, core) if core else []
+        else:
+            core = conflict_core(ids, codes)
+        vds = ids.vdiffs
+        return [[vds[i], CODE_RELS[code], vds[j]] for i, j, code in core]
+
+    def check_consistency(self, entries=(), engine: str = None,
+                          budget: ClosureBudget = None) -> List:
+        """Whether the closure of the vdcm, with the entries (vd1, vd2, rel)
+        of a staged change applied in order as in conflict_core(), is free
+        of collisions, decided by a ConsistencyChecker without computing
+        the closure. Returns None if it is, else one collision
+        [vd1, old_rel, vd2, new_rel] in the format of set_vdiff_relation.
+
+        A current warm closure answers directly when there are no entries.
+        None is also returned when budget runs out; check budget.incomplete.
+        """
+        ids = self.vdiff_ids()
+        n = len(ids)
+        warm = self._warm_closure
+        if not entries and warm is not None and warm.ids is ids:
+            return warm.colls[0][2] if warm.colls else None
+        codes = ids.encode(self.vdiff_comparison_matrix)
+        for vd1, vd2, rel in entries:
+            i, j = ids.id_of(vd1), ids.id_of(vd2)
+            code, old = REL_CODES[rel], codes[i * n + j]
+            if code != REL_UNDEFINED and old not in (REL_UNDEFINED, code):
+                return [vd1, CODE_RELS[old], vd2, rel]
+            codes[i * n + j] = code
+        name = engine or self.closure_engine
+        backend = CLOSURE_BACKENDS.get(name)
+        if backend is None:
+            raise ValueError(f"Unknown closure engine '{name}'; "
+                             f"expected one of {sorted(CLOSURE_BACKENDS)}.")
+        if budget is not None:
+            budget.start()
+        checker = ConsistencyChecker(ids, codes, backend, budget)
+        found = checker.check()
+        if found is None:
+            return None
+        i, j, old, new = found
+        vds = ids.vdiffs
+        return [vds[i], CODE_RELS[old], vds[j], CODE_RELS[new]]
+
+    def rank_undecided(self, sample: int = 200, limit: int = 20, seed=None,
+                       budget: ClosureBudget = None) -> dict:
+        """Rank undecided comparisons by how many relations answering them
+        would add to the closure, to suggest what to ask the user next.
+
+        A candidate is a pair of vdiffs that the warm closure relates in
+        neither direction, one per mirror pair; a pair with ◬ stands for
+        the level relation of the other vdiff. Up to sample candidates,
+        drawn with random.Random(seed) when there are more, are tried with
+        every complete answer (⊐ ≜ ⊏, or ≻ ∼ ≺ for a level pair): its
+        entries are staged on the warm closure, propagated and undone, so
+        an answer costs only its own consequences, never a closure.
+
+        Returns {"candidates", "evaluated", "ranking"}: the number of
+        undecided pairs, the number tried, and at most limit items
+        {"vd1", "vd2", "level", "answers", "expected", "worst"} sorted by
+        expected, the mean number of relations inferred over the answers
+        that do not collide, then by worst, their minimum. level is
+        (aspect, la, lb) for a level pair, else None; answers maps each
+        answer to its count, or None if it collides. Pairs that no answer
+        fits are left out. With a budget, only the candidates tried before
+        it ran out are ranked; check budget.incomplete.
+        Raises ValueError if the matrix is contradictory.
+        """
+        warm = self.warm_closure()
+        if warm.colls:
+            raise ValueError("The relation matrix is contradictory; resolve its collisions first.")
+        ids = warm.ids
+        n = len(ids)
+        m = np.frombuffer(bytes(warm.engine.codes), dtype=np.uint8).reshape(n, n)
+        xs, ys = np.nonzero(np.triu((m == REL_UNDEFINED) & (m.T == REL_UNDEFINED), 1))
+        # One pair of each mirror pair (x, y) ~ (inv y, inv x)
+        inv = np.asarray(ids.inv, dtype=np.intp)
+        mx, my = np.minimum(inv[ys], inv[xs]), np.maximum(inv[ys], inv[xs])
+        keep = (xs < mx) | ((xs == mx) & (ys <= my))
+        xs, ys = xs[keep].tolist(), ys[keep].tolist()
+        picks = range(len(xs))
+        if len(xs) > sample:
+            picks = sorted(random.Random(seed).sample(picks, sample))
+        if budget is not None:
+            budget.start()
+        vds = ids.vdiffs
+        ranking, evaluated = [], 0
+        for k in picks:
+            if budget is not None and not budget.ok():
+                break
+            vd1, vd2, level = vds[xs[k]], vds[ys[k]], None
+            if xs[k] == 0:   # ◬ ? Δ(c,d) is the mirror of Δ(d,c) ? ◬
+                vd = vd2.inv()
+                level = (vd.aspect_name, vd.from_level, vd.to_level)
+                options = [(rel, self.aspect_level_relation_entries(*level, rel))
+                           for rel in (BT, EQ, WT)]
+            else:
+                options = [(rel, self.vdiff_order_relation_entries(vd1, vd2, rel))
+                           for rel in (GT, DEQ, LT)]
+            answers = {}
+            for rel, entries in options:
+                colls, delta = warm.stage(['SETREL', [vd1, rel, vd2]], entries)
+                adds = None
+                if not colls:
+                    adds, colls = warm.extend(delta)
+                if colls:
+                    answers[rel] = None
+                    continue
+                answers[rel] = len(adds)
+                warm.undo(delta, adds)
+            evaluated += 1
+            counts = [c for c in answers.values() if c is not None]
+            if counts:
+                ranking.append({"vd1": vd1, "vd2": vd2, "level": level, "answers": answers,
+                                "expected": sum(counts) / len(counts), "worst": min(counts)})
+        ranking.sort(key=lambda r: (-r["expected"], -r["worst"]))
+        return {"candidates": len(xs), "evaluated": evaluated, "ranking": ranking[:limit]}
+
+    def get_aspect_level_relation(self, aspect: str, la, lb, derived: bool = False) -> str:
+        """The level relation la ? lb from Δ(la,lb) vs ◬; with derived, as
+        implied by the closure (derived_relations) instead of as set."""
         a = self.get_aspect(aspect)
         a_type = a.data_type
         la_str, lb_str = str(la), str(lb)
@@ -1205,8 +4223,9 @@ class EudoxaManager:
             raise ValueError(f"Aspect level '{lb}' [{a_type}] does not exist.")
         zero = NATURAL_ZERO
         vd_ab = VDiff(aspect, la_str, lb_str)
-        rel_ab_z = self.get_vdiff_relation(vd_ab, zero)
-        rel_z_ab = self.get_vdiff_relation(zero, vd_ab)
+        lookup = self.derived_relations() if derived else self.get_vdiff_relation
+        rel_ab_z = lookup(vd_ab, zero)
+        rel_z_ab = lookup(zero, vd_ab)
         if rel_ab_z == TRUE and rel_z_ab == FALSE:
             return BT
         elif rel_ab_z == TRUE and rel_z_ab == UNDEFINED:
@@ -1228,114 +4247,69 @@ class EudoxaManager:
     def try_set_vdiff_order_relation(self,
                                       vd1: VDiff, vd2: VDiff,
                                       order_rel: str) -> Tuple:
-        """Validate and commit a vdiff order relation using a full VDCM staging copy.
+        """Validate and commit a vdiff order relation against the warm closure.
 
         order_rel must be one of: GT ('⊐'), GTE ('⊒'), DEQ ('≜'),
                                    LTE ('⊑'), LT ('⊏'), UNDEFINED ('').
 
-        Mapping to VDCM TRUE/FALSE entries (via set_rel):
+        Mapping to VDCM TRUE/FALSE entries (via vdiff_order_relation_entries):
           ⊐  →  vd1⊒vd2  AND  vd2⋣vd1
           ⊒  →  vd1⊒vd2
           ≜  →  vd1⊒vd2  AND  vd2⊒vd1  (and mirror pairs)
           ⊑  →  vd2⊒vd1
           ⊏  →  vd2⊒vd1  AND  vd1⋣vd2
-          —  →  unset all four VDCM entries for (vd1,vd2)
+          —  →  unset both VDCM entries for (vd1,vd2)
 
         Flow (mirrors try_set_aspect_level_relation):
-          1. Deep-copy the full VDCM as staging area.
-          2. Apply set_rel to staging. Reject on immediate collision.
-          3. Recompute closure on staging. Reject on inferred collision.
-          4. If clean, commit set_rel to the real VDCM.
-             Return (adds, [], inferred_adds).
+          1. Stage the entries on the warm closure. Reject on immediate
+             or inferred collision (the warm closure is left unchanged).
+          2. If clean, commit the entries to the real VDCM.
+             Return (adds, [], inferred_adds) — inferred_adds holds the
+             consequences that were not in the closure before.
         """
-        import copy
-
-        # Decompose vd1/vd2 into (aspect, la, lb) for set_rel
-        an1, l1a, l1b = vd1.aspect_name, vd1.from_level, vd1.to_level
-        an2, l2a, l2b = vd2.aspect_name, vd2.from_level, vd2.to_level
-
         origin = ['SETVDREL', [repr(vd1), order_rel, repr(vd2)]]
-
-        # ── Step 1: deep-copy the VDCM ──────────────────────────
-        staged_matrix = copy.deepcopy(self.vdiff_comparison_matrix)
-
-        # ── Step 2: apply to staging ─────────────────────────────
-        staged_adds, staged_colls = [], []
-        original_matrix = self.vdiff_comparison_matrix
-        self.vdiff_comparison_matrix = staged_matrix
-
+        entries = self.vdiff_order_relation_entries(vd1, vd2, order_rel)
         if order_rel == UNDEFINED:
-            # Unset all four entries for this vdiff pair
-            for va, vb in [(vd1, vd2), (vd2, vd1)]:
-                app_ac(origin,
-                       set_vdiff_relation(staged_matrix, va, vb, UNDEFINED),
-                       staged_adds, staged_colls)
-                app_ac(origin,
-                       set_vdiff_relation(staged_matrix, vb, va, UNDEFINED),
-                       staged_adds, staged_colls)
-        else:
-            s_adds, s_colls = self.set_rel(an1, l1a, l1b, an2, l2a, l2b, order_rel)
-            staged_adds.extend(s_adds)
-            staged_colls.extend(s_colls)
-
-        self.vdiff_comparison_matrix = original_matrix
+            return self._try_unset(origin, entries)
 
-        # ── Step 3: immediate collision — reject ─────────────────
-        if staged_colls:
-            return ([], staged_colls, [])
+        # ── Step 1: stage on the warm closure ────────────────────
+        inferred_adds, colls = self._try_extend_closure(origin, entries)
+        if colls:
+            return ([], colls, [])
 
-        # ── Step 4: recompute closure on staging, check inferred ─
-        self.vdiff_comparison_matrix = staged_matrix
-        _, inferred_adds, inferred_colls = self.closure()
-        self.vdiff_comparison_matrix = original_matrix
-
-        if inferred_colls:
-            return ([], inferred_colls, [])
-
-        # ── Step 5: clean — commit to the real VDCM ─────────────
+        # ── Step 2: clean — commit to the real VDCM ─────────────
         adds, colls = [], []
-        if order_rel == UNDEFINED:
-            for va, vb in [(vd1, vd2), (vd2, vd1)]:
-                app_ac(origin,
-                       set_vdiff_relation(original_matrix, va, vb, UNDEFINED),
-                       adds, colls)
-                app_ac(origin,
-                       set_vdiff_relation(original_matrix, vb, va, UNDEFINED),
-                       adds, colls)
-        else:
-            c_adds, c_colls = self.set_rel(an1, l1a, l1b, an2, l2a, l2b, order_rel)
-            adds.extend(c_adds)
-            colls.extend(c_colls)
-
+        origin = ['SETREL', [vd1, order_rel, vd2]]
+        for va, vb, r in entries:
+            app_ac(origin, set_vdiff_relation(self.vdiff_comparison_matrix, va, vb, r),
+                   adds, colls)
         return (adds, [], inferred_adds)
 
     def set_vdiff_relation(self, vd1: VDiff, vd2: VDiff, new_rel: str) -> Tuple:
+        self.invalidate_closure()
         return set_vdiff_relation(self.vdiff_comparison_matrix, vd1, vd2, new_rel)
 
     def set_rel(self, a1: str, l1a, l1b, a2, l2a, l2b, rel: str) -> Tuple:
         adds, colls = [], []
         a1_ab = VDiff(a1, l1a, l1b)
-        a1_ba = VDiff(a1, l1b, l1a)
         a2_ab = VDiff(a2, l2a, l2b)
-        a2_ba = VDiff(a2, l2b, l2a)
         origin = ['SETREL', [a1_ab, rel, a2_ab]]
-        if rel == GT:
-            app_ac(origin, self.set_vdiff_relation(a1_ab, a2_ab, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(a2_ab, a1_ab, FALSE), adds, colls)
-        elif rel == GTE:
-            app_ac(origin, self.set_vdiff_relation(a1_ab, a2_ab, TRUE), adds, colls)
-        elif rel == DEQ:
-            app_ac(origin, self.set_vdiff_relation(a1_ab, a2_ab, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(a2_ab, a1_ab, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(a1_ba, a2_ba, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(a2_ba, a1_ba, TRUE), adds, colls)
-        elif rel == LTE:
-            app_ac(origin, self.set_vdiff_relation(a2_ab, a1_ab, TRUE), adds, colls)
-        elif rel == LT:
-            app_ac(origin, self.set_vdiff_relation(a2_ab, a1_ab, TRUE), adds, colls)
-            app_ac(origin, self.set_vdiff_relation(a1_ab, a2_ab, FALSE), adds, colls)
+        for vd1, vd2, r in self.vdiff_order_relation_entries(a1_ab, a2_ab, rel):
+            app_ac(origin, self.set_vdiff_relation(vd1, vd2, r), adds, colls)
         return (adds, colls)
 
+    def vdiff_order_relation_entries(self, vd1: VDiff, vd2: VDiff, rel: str) -> List[Tuple]:
+        """The vdcm entries (va, vb, rel) that encode vd1 rel vd2."""
+        return {
+            UNDEFINED: [(vd1, vd2, UNDEFINED), (vd2, vd1, UNDEFINED)],
+            GT:  [(vd1, vd2, TRUE), (vd2, vd1, FALSE)],
+            GTE: [(vd1, vd2, TRUE)],
+            DEQ: [(vd1, vd2, TRUE), (vd2, vd1, TRUE),
+                  (vd1.inv(), vd2.inv(), TRUE), (vd2.inv(), vd1.inv(), TRUE)],
+            LTE: [(vd2, vd1, TRUE)],
+            LT:  [(vd2, vd1, TRUE), (vd1, vd2, FALSE)],
+        }.get(rel, [])
+
     def pos(self, an: str, la, lb) -> bool:
         # TODO: Error handling
         return pos(VDiff(an, la, lb), self.aspects[an], self.vdiff_comparison_matrix)
@@ -1373,7 +4347,331 @@ class EudoxaManager:
             for vd2, rel in row.items():
                 yield (vd1, vd2, rel)
 
-    def closure(self):
+    def closure(self, engine: str = None, budget: ClosureBudget = None,
+                stats: ClosureStats = None):
+        """Compute the closure of the vdcm.
+
+        By default ('ordered') the OrderedClosureEngine closes the matrix,
+        encoded over the interned vdiff ids of vdiff_ids(), and the result
+        (closure, adds, colls) is the one reference_closure() returns: the
+        same adds in the same order, with the same rule origins, and the
+        collisions of the step at which the reference aborts. engine may
+        instead name a backend from CLOSURE_BACKENDS ('python' is the
+        semi-naive ClosureEngine, 'numpy' the NumpyClosureEngine), run by
+        closure_runner() as for all other closure work; it derives the
+        same cells, but by origins and in an order of its own, and stops
+        at its first collision.
+
+        Results are looked up in and stored to self.closure_cache under
+        closure_cache_key(engine).
+
+        With a ClosureBudget the computation stops once the budget is spent;
+        the result then holds only the facts derived so far, without a
+        collision, budget.incomplete is True and nothing is cached.
+
+        With a ClosureStats (or a fresh one when closure_hook is set) the
+        run is instrumented: rule attempts and firings, lookups, rounds and
+        the time of the phases 'cache', 'derive' (the whole engine run,
+        including 'encode' and any phases the engine times itself) and
+        'store'. closure_hook is then called with it.
+        """
+        engine = engine or 'ordered'
+        if stats is None and self.closure_hook is not None:
+            stats = ClosureStats()
+        if stats is not None:
+            stats.engine = engine
+        start = time.perf_counter()
+        cache = self.closure_cache
+        if cache is not None:
+            key = self.closure_cache_key(engine)
+            cached = cache.get(key)
+            if stats is not None:
+                stats.add_time('cache', start)
+            if cached is not None:
+                if stats is not None:
+                    stats.cached = True
+                    self._closure_done(stats)
+                return cached
+
+        start = time.perf_counter()
+        ids = self.vdiff_ids()
+        adds, colls = ProvenanceLog(ids), []
+        vds, real = ids.vdiffs, ids.real
+        # Shallow copy: each inner row dict is a new dict so writes don't touch self.vdiff_comparison_matrix
+        closure = {vd1: dict(row) for vd1, row in self.vdiff_comparison_matrix.items()}
+        for event in self._closure_events(engine, budget, stats):
+            rule, premises, i, j, code, old = event
+            if stats is not None:
+                stats.record(event)
+            if old != REL_UNDEFINED:
+                origin, _, coll = ids.entry(event)
+                colls.append([origin[0], origin[1], coll])
+            else:
+                adds.record(event)
+                closure.setdefault(vds[real(i)], {})[vds[real(j)]] = CODE_RELS[code]
+        if stats is not None:
+            stats.add_time('derive', start)
+            start = time.perf_counter()
+        if budget is not None and budget.incomplete:
+            logger.warning(f"Closure stopped ({budget.reason}) after {budget.round} rounds, "
+                           f"{budget.derived} facts")
+        elif cache is not None:
+            cache.put(key, (closure, adds, colls))
+            if stats is not None:
+                stats.add_time('store', start)
+        if stats is not None:
+            self._closure_done(stats)
+        return (closure, adds, colls)
+
+    def _closure_done(self, stats: ClosureStats):
+        """Hand the stats of a finished closure() to closure_hook."""
+        if self.closure_hook is not None:
+            self.closure_hook(stats)
+
+    def iter_closure(self, engine: str = None, budget: ClosureBudget = None):
+        """Stream the closure of the vdcm: yield (origin, add, coll) in the
+        app_ac format for each derivation as the engine produces it, ending
+        with the collisions if there are any (coll is set, add is None).
+
+        Nothing is accumulated, so a caller that only needs the collision
+        or one page of inferences (itertools.islice) can stop early and
+        never pays for the rest. A result already in self.closure_cache is
+        replayed; streamed results are not cached, as they may be partial.
+        """
+        cache = self.closure_cache
+        if cache is not None:
+            cached = cache.get(self.closure_cache_key(engine))
+            if cached is not None:
+                _, adds, colls = cached
+                for rule, detail, add in adds:
+                    yield ([rule, detail], add, None)
+                for rule, detail, coll in colls:
+                    yield ([rule, detail], None, coll)
+                return
+        yield from self._closure_stream(engine, budget)
+
+    def _closure_stream(self, engine: str = None, budget: ClosureBudget = None):
+        """Uncached derivation stream behind iter_closure()."""
+        ids = self.vdiff_ids()
+        for event in self._closure_events(engine, budget):
+            yield ids.entry(event)
+
+    def _closure_events(self, engine: str = None, budget: ClosureBudget = None,
+                        stats: ClosureStats = None):
+        """Raw engine events of the closure, ending after a collision (after
+        the rest of its step for the 'ordered' default, as in
+        reference_closure())."""
+        start = time.perf_counter()
+        ids = self.vdiff_ids()
+        if budget is not None:
+            budget.start()
+        codes = ids.encode(self.vdiff_comparison_matrix)
+        if stats is not None:
+            stats.add_time('encode', start)
+        ordered = engine in (None, 'ordered')
+        if ordered:
+            runner = OrderedClosureEngine(ids, codes, budget)
+            runner.stats = stats
+        else:
+            runner = self.closure_runner(ids, codes, engine, budget, stats)
+        for event in runner.run():
+            yield event
+            if event[5] != REL_UNDEFINED and not ordered: # A collision has occurred — abort
+                return
+            if budget is not None and not budget.spend():
+                return
+
+    def closure_runner(self, ids: VDiffIds, codes: bytearray, engine: str = None,
+                       budget: ClosureBudget = None, stats: ClosureStats = None):
+        """The engine that closes codes for this manager: the engine backend
+        (default self.closure_engine), run per component when
+        self.closure_components is set, and level-only aspects by
+        LevelOrderClosure when self.closure_level_orders is set too (never
+        for the 'reference' backend, which stays the plain specification). stats, if given, is set as the runner's stats
+        attribute for the backends to count into."""
+        engine = engine or self.closure_engine
+        backend = CLOSURE_BACKENDS.get(engine)
+        if backend is None:
+            raise ValueError(f"Unknown closure engine '{engine}'; "
+                             f"expected one of {sorted(CLOSURE_BACKENDS)}.")
+        if self.closure_components:
+            runner = ComponentClosureEngine(
+                ids, codes, backend, budget,
+                level_orders=self.closure_level_orders and backend is not ReferenceClosureEngine)
+        else:
+            runner = backend(ids, codes, budget)
+        if stats is not None:
+            runner.stats = stats
+        return runner
+
+    def vdcm_fingerprint(self) -> str:
+        """Content fingerprint of the vdcm: a BLAKE2b digest of the
+        aspect/level structure and the relation code of every entry."""
+        ids = self.vdiff_ids()
+        h = hashlib.blake2b(repr(ids.signature).encode("utf-8"), digest_size=16)
+        h.update(ids.encode(self.vdiff_comparison_matrix))
+        return h.hexdigest()
+
+    def closure_cache_key(self, engine: str = None) -> str:
+        """Key of closure(engine) in closure_cache: the engine, the runner
+        settings that decide origins and event order (closure_components,
+        closure_level_orders; not for the 'ordered' default) and
+        vdcm_fingerprint()."""
+        engine = engine or 'ordered'
+        if engine == 'ordered':
+            return f"{engine}-{self.vdcm_fingerprint()}"
+        mode = f"c{int(bool(self.closure_components))}l{int(bool(self.closure_level_orders))}"
+        return f"{engine}-{mode}-{self.vdcm_fingerprint()}"
+
+    def vdiff_ids(self) -> VDiffIds:
+        """Interned integer ids for the vdiffs of the current aspects.
+        Rebuilt only when the aspect/level structure has changed."""
+        if (self._vdiff_ids is None or
+                self._vdiff_ids.signature != VDiffIds.signature_of(self.aspects)):
+            self._vdiff_ids = VDiffIds(self.aspects)
+        return self._vdiff_ids
+
+    def warm_closure(self) -> WarmClosure:
+        """The materialised closure of the vdcm, built on first use and kept
+        up to date by the try_set_* methods. Any other change to the matrix
+        must call invalidate_closure()."""
+        ids = self.vdiff_ids()
+        if self._warm_closure is None or self._warm_closure.ids is not ids:
+            warm = None
+            if self.session_key is not None and self.warm_closures is not None:
+                warm = self.warm_closures.take(self.session_key, self.vdcm_fingerprint())
+            if warm is None:
+                warm = WarmClosure.build(ids, self.vdiff_comparison_matrix, self.closure_runner)
+            else:
+                # The fingerprint covers the signature; adopt the ids of the closure
+                self._vdiff_ids = warm.ids
+            self._warm_closure = warm
+            self._point_query = None
+            self._reachability = None
+        return self._warm_closure
+
+    def keep_warm_closure(self):
+        """Hand a current warm closure over to warm_closures under
+        session_key, for the next manager of the session to take; this
+        manager drops it. Call when done with the manager (the app does at
+        the end of each request)."""
+        warm = self._warm_closure
+        if (self.session_key is None or self.warm_closures is None or
+                warm is None or warm.ids is not self.vdiff_ids()):
+            return
+        self.warm_closures.keep(self.session_key, self.vdcm_fingerprint(), warm)
+        self._warm_closure = None
+
+    def invalidate_closure(self):
+        """Drop the warm closure; it is rebuilt from the matrix on next use."""
+        self._warm_closure = None
+        self._point_query = None
+        self._reachability = None
+
+    def reachability_index(self) -> ReachabilityIndex:
+        """Labels answering derived relations in constant time, for callers
+        that ask about many cells (level relation tables, vdiff matrix
+        views). Built from the matrix on first use, without an n × n
+        closure, and kept until the next invalidate_closure()."""
+        ids = self.vdiff_ids()
+        if self._reachability is None or self._reachability.ids is not ids:
+            self._reachability = ReachabilityIndex(ids, ids.encode(self.vdiff_comparison_matrix))
+        return self._reachability
+
+    def derived_relations(self):
+        """A function (vd1, vd2) -> relation in the closure of the vdcm for
+        bulk lookups: derived_vdiff_relation, answered from the reachability
+        index unless a current warm closure already holds every cell."""
+        warm = self._warm_closure
+        if warm is None or warm.ids is not self.vdiff_ids():
+            self.reachability_index()
+        return self.derived_vdiff_relation
+
+    def derived_vdiff_relation(self, vd1: VDiff, vd2: VDiff) -> str:
+        """The relation vd1 ? vd2 (TRUE, FALSE or UNDEFINED) in the closure
+        of the vdcm, without computing a full closure.
+
+        Read from the warm closure when there is a current one, else from
+        the reachability index if one has been built; otherwise answered
+        by a PointQuery over the matrix, which is kept (with what it
+        derived) until the next invalidate_closure().
+        """
+        ids = self.vdiff_ids()
+        i, j = ids.id_of(vd1), ids.id_of(vd2)
+        if i is None or j is None:
+            return UNDEFINED
+        warm = self._warm_closure
+        if warm is not None and warm.ids is ids:
+            return CODE_RELS[warm.engine.codes[i * len(ids) + j]]
+        index = self._reachability
+        if index is not None and index.ids is ids:
+            return CODE_RELS[index.relation(i, j)]
+        if self._point_query is None or self._point_query.ids is not ids:
+            self._point_query = PointQuery(ids, ids.encode(self.vdiff_comparison_matrix))
+        return CODE_RELS[self._point_query.relation(i, j)]
+
+    def compare_closure_engines(self, engines: List[str] = None,
+                                max_diffs: int = 20) -> dict:
+        """Close the vdcm with each engine (default: every key of
+        CLOSURE_BACKENDS) and diff the result against reference_closure().
+
+        The engines run through closure_runner(), so components and level orders
+        are configured as for closure(), but the cache is bypassed. Engines
+        must agree with the reference on whether there is a collision (not
+        on which one is found first); without one, on every cell of the
+        closure and on the set of cells added, each added exactly once.
+
+        Returns {"baseline": {"seconds", "collision"}, "engines": {name:
+        {"seconds", "collision", "diffs"}}}; diffs is a list of readable
+        differences, at most max_diffs, and empty when the engine agrees.
+        """
+        ids = self.vdiff_ids()
+        vds, n = ids.vdiffs, len(ids)
+        start = time.perf_counter()
+        ref_closure, ref_adds, ref_colls = self.reference_closure()
+        report = {"baseline": {"seconds": time.perf_counter() - start,
+                               "collision": bool(ref_colls)},
+                  "engines": {}}
+        ref_codes = ids.encode(ref_closure)
+        ref_cells = {(ids.id_of(vd1), ids.id_of(vd2), REL_CODES[rel])
+                     for _, _, (vd1, rel, vd2) in ref_adds}
+
+        for name in engines or list(CLOSURE_BACKENDS):
+            codes = ids.encode(self.vdiff_comparison_matrix)
+            cells, collision = [], False
+            start = time.perf_counter()
+            for event in self.closure_runner(ids, codes, name).run():
+                if event[5] != REL_UNDEFINED:
+                    collision = True
+                    break
+                cells.append(event[2:5])
+            seconds = time.perf_counter() - start
+
+            diffs = []
+            if collision != bool(ref_colls):
+                diffs.append(f"collision: reference {bool(ref_colls)}, engine {collision}")
+            elif not collision:
+                for p in range(n * n):
+                    if codes[p] != ref_codes[p]:
+                        i, j = divmod(p, n)
+                        diffs.append(f"{vds[i]} ? {vds[j]}: reference '{CODE_RELS[ref_codes[p]]}', "
+                                     f"engine '{CODE_RELS[codes[p]]}'")
+                added = set(cells)
+                for i, j, code in sorted(added ^ ref_cells):
+                    by = "engine" if (i, j, code) in added else "reference"
+                    diffs.append(f"{vds[i]} {CODE_RELS[code]} {vds[j]} added only by the {by}")
+                if len(cells) != len(added):
+                    diffs.append(f"{len(cells) - len(added)} cells added more than once")
+            if len(diffs) > max_diffs:
+                diffs[max_diffs:] = [f"... {len(diffs) - max_diffs} more"]
+            report["engines"][name] = {"seconds": seconds, "collision": collision,
+                                       "diffs": diffs}
+        return report
+
+    def reference_closure(self):
+        """Original naive fixpoint: re-run every rule over the whole matrix
+        until no entry is added. Kept as the executable specification that
+        closure() is tested against."""
         adds, colls = [], []
         # Shallow copy: each inner row dict is a new dict so writes don't touch self.vdiff_comparison_matrix
         closure = {vd1: dict(row) for vd1, row in self.vdiff_comparison_matrix.items()}
@@ -1830,9 +5128,7 @@ class EudoxaManager:
                     continue
                 vd2 = VDiff(an2, None, None) if d2 == ZDIFF_TUPLE \
                       else VDiff(an2, d2[0], d2[1])
-                add, coll = set_vdiff_relation(
-                    self.vdiff_comparison_matrix, vd1, vd2, new_rel
-                )
+                add, coll = self.set_vdiff_relation(vd1, vd2, new_rel)
                 if add:  adds.append(add)
                 if coll: collisions.append(coll)
             row += 1
@@ -1873,19 +5169,23 @@ class EudoxaManager:
         ws = wb[CONS]
         self.import_consequences_from_worksheet(ws)
 
-    def validate_and_import_workbook(self, wb, base_mgr=None) -> dict:
+    def validate_and_import_workbook(self, wb, base_mgr=None,
+                                     budget: ClosureBudget = None) -> dict:
         """Staged validate-then-commit import from an openpyxl workbook.
 
         Pipeline:
           1. Per-aspect: add aspect, levels, and relations to a temporary
              manager. Collect all per-aspect errors; cancel if any.
-          2. Compute closure on the temporary manager. Cancel on collision.
+          2. Check the closure of the temporary manager for a collision
+             (check_consistency). Cancel on collision.
           3. Import named consequences (3a strict). Cancel on any error.
           4. On full success, commit by copying temporary state into self.
 
         base_mgr: optional EudoxaManager to use as the starting state of the
                   temporary manager (for single-aspect import into an existing
                   project). Defaults to a fresh empty manager.
+        budget:   optional ClosureBudget for step 2. If it runs out the import
+                  is cancelled with closure_incomplete set to its reason.
         """
         result = {
             "success":              False,
@@ -1896,6 +5196,7 @@ class EudoxaManager:
             "skipped_asp_tabs":     [],
             "missing_asp_tabs":     [],
             "closure_collisions":   [],
+            "closure_incomplete":   None,
             "vdcm_adds":            0,
             "vdcm_add_details":     [],
             "imported_consequences": [],
@@ -2012,16 +5313,18 @@ class EudoxaManager:
                 return result
 
         # ── Step 2: closure check ───────────────────────────────────
-        _, _, closure_colls = tmp.closure()
-        if closure_colls:
-            for coll_entry in closure_colls:
-                origin_type, origin_detail, coll = coll_entry
-                vd1, old_rel, vd2, new_rel = coll
-                result["closure_collisions"].append(
-                    f"Closure collision: "
-                    f"attempted {repr(vd1)} {new_rel} {repr(vd2)} "
-                    f"conflicts with existing {repr(vd1)} {old_rel} {repr(vd2)}"
-                )
+        # Only the collision matters here: check without building the closure
+        coll = tmp.check_consistency(budget=budget)
+        if budget is not None and budget.incomplete:
+            result["closure_incomplete"] = budget.reason
+            return result
+        if coll:
+            vd1, old_rel, vd2, new_rel = coll
+            result["closure_collisions"].append(
+                f"Closure collision: "
+                f"attempted {repr(vd1)} {new_rel} {repr(vd2)} "
+                f"conflicts with existing {repr(vd1)} {old_rel} {repr(vd2)}"
+            )
             return result
 
         # ── Step 3: consequences (strict 3a) ────────────────────────
@@ -2074,6 +5377,7 @@ class EudoxaManager:
         self.aspects                 = tmp.aspects
         self.consequences            = tmp.consequences
         self.vdiff_comparison_matrix = tmp.vdiff_comparison_matrix
+        self.invalidate_closure()
         result["success"] = True
         return result
 
@@ -2177,13 +5481,32 @@ class EudoxaManager:
             tl = "" if vd.to_level  is None else str(vd.to_level)
             return f"{an}|||{fl}|||{tl}"
 
-        vdcm_out = {}
-        for vd1, row in self.vdiff_comparison_matrix.items():
-            k1 = _vd_serial(vd1)
-            vdcm_out[k1] = {_vd_serial(vd2): rel for vd2, rel in row.items()}
+        def _cells_out(ids: VDiffIds, codes: bytearray) -> Tuple[dict, dict]:
+            """Defined cells as (plain, mirrored) dicts of dicts; a cell
+            whose mirror holds the same relation stands for both in mirrored."""
+            vds, n, inv = ids.vdiffs, len(ids), ids.inv
+            plain, mirrored = {}, {}
+            for m in _DEFINED_CODE.finditer(codes):
+                p = m.start()
+                i, j = divmod(p, n)
+                code = codes[p]
+                if i == j and code == REL_TRUE:     # Δ⊒Δ, re-initialised on load
+                    continue
+                q = inv[j] * n + inv[i]
+                if q == p or codes[q] != code:
+                    out_cells = plain
+                elif p < q:
+                    out_cells = mirrored
+                else:
+                    continue
+                out_cells.setdefault(_vd_serial(vds[i]), {})[_vd_serial(vds[j])] = CODE_RELS[code]
+            return plain, mirrored
 
-        return {
-            "__schema__": 2,
+        ids = self.vdiff_ids()
+        vdcm_out, vdcm_mirrored = _cells_out(ids, ids.encode(self.vdiff_comparison_matrix))
+
+        out = {
+            "__schema__": 3,
             "aspects": {
                 name: aspect.to_dict()
                 for name, aspect in self.aspects.items()
@@ -2192,8 +5515,10 @@ class EudoxaManager:
                 short: c.to_dict()
                 for short, c in self.consequences.items()
             },
-            "vdiff_comparison_matrix": vdcm_out
+            "vdiff_comparison_matrix": vdcm_out,
+            "vdiff_comparison_mirrored": vdcm_mirrored
         }
+        return out
 
     @classmethod
     def from_dict(cls, data):
@@ -2227,11 +5552,36 @@ class EudoxaManager:
                 tl = parts[2] or None
                 return VDiff(an, fl, tl)
 
-            for k1, row in vdcm_in.items():
-                vd1 = _vd_parse(k1)
-                mgr.vdiff_comparison_matrix[vd1] = {
-                    _vd_parse(k2): rel for k2, rel in row.items()
-                }
+            def _cells_in(plain: dict, mirrored: dict):
+                """(vd1, rel, vd2) for the cells written by _cells_out, with
+                the mirror of every mirrored cell."""
+                for k1, row in plain.items():
+                    for k2, rel in row.items():
+                        yield (_vd_parse(k1), rel, _vd_parse(k2))
+                for k1, row in mirrored.items():
+                    for k2, rel in row.items():
+                        vd1, vd2 = _vd_parse(k1), _vd_parse(k2)
+                        yield (vd1, rel, vd2)
+                        yield (_vdiff_key(vd2.inv()), rel, _vdiff_key(vd1.inv()))
+
+            if schema >= 3:
+                # Schema 3: only defined cells, mirror pairs once; the rest of
+                # the matrix is initialised as expand_vdiff_comparison_matrix does
+                vdcm = mgr.vdiff_comparison_matrix
+                if any(levels for _, levels in VDiffIds.signature_of(mgr.aspects)):
+                    vds = mgr.vdiff_ids().vdiffs
+                    for vd1 in vds:
+                        vdcm[vd1] = dict.fromkeys(vds, UNDEFINED)
+                        vdcm[vd1][vd1] = TRUE
+                for vd1, rel, vd2 in _cells_in(vdcm_in,
+                                               data.get("vdiff_comparison_mirrored", {})):
+                    vdcm[_vdiff_key(vd1)][_vdiff_key(vd2)] = rel
+            else:
+                for k1, row in vdcm_in.items():
+                    vd1 = _vd_parse(k1)
+                    mgr.vdiff_comparison_matrix[vd1] = {
+                        _vd_parse(k2): rel for k2, rel in row.items()
+                    }
 
         else:
             # Schema 1 (legacy): outer keys are "a1|||a2", inner keys are
@@ -2255,4 +5605,4 @@ class EudoxaManager:
                         vdcm[k1] = {}
                     vdcm[k1][k2] = rel
 
-        return mgr
\ No newline at end of file
+        return mgr
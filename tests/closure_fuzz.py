@@ -0,0 +1,57 @@
+"""Random projects and the differential harness over closure engines.
+
+Used by tests/test_closure.py; run closure_differential() on a few hundred
+seeds before making a new engine the default."""
+import random
+from typing import List
+
+from eudoxa import (
+    EudoxaManager, AL_RELATION_OPTIONS, GT, GTE, DEQ, LTE, LT,
+)
+
+
+def random_project(seed, n_aspects: int = 3, max_levels: int = 4,
+                   n_relations: int = 5) -> EudoxaManager:
+    """A reproducible random project: aspects A0.. with 1..max_levels levels
+    and n_relations random aspect level relations and vdiff comparisons."""
+    rng = random.Random(seed)
+    mgr = EudoxaManager()
+    for i in range(n_aspects):
+        name = f"A{i}"
+        mgr.add_aspect(name, "str")
+        for level in range(rng.randint(1, max_levels)):
+            mgr.add_aspect_level(name, str(level), None)
+    names = list(mgr.aspects)
+    for _ in range(n_relations):
+        if rng.random() < 0.4:
+            an = rng.choice(names)
+            levels = list(mgr.aspects[an].levels)
+            mgr.set_aspect_level_relation(an, rng.choice(levels), rng.choice(levels),
+                                          rng.choice(AL_RELATION_OPTIONS[1:]))
+        else:
+            a1, a2 = rng.choice(names), rng.choice(names)
+            l1, l2 = list(mgr.aspects[a1].levels), list(mgr.aspects[a2].levels)
+            mgr.set_rel(a1, rng.choice(l1), rng.choice(l1),
+                        a2, rng.choice(l2), rng.choice(l2),
+                        rng.choice([GT, GTE, DEQ, LTE, LT]))
+    return mgr
+
+
+def closure_differential(seeds, engines: List[str] = None, **project) -> dict:
+    """Run compare_closure_engines() on random_project(seed, **project) for
+    every seed. Returns {"projects", "collisions", "seconds", "mismatches"}:
+    total seconds per engine (and for the "baseline" reference_closure()),
+    and (seed, engine, diffs) for every disagreement."""
+    result = {"projects": 0, "collisions": 0, "seconds": {"baseline": 0.0},
+              "mismatches": []}
+    seconds = result["seconds"]
+    for seed in seeds:
+        report = random_project(seed, **project).compare_closure_engines(engines)
+        result["projects"] += 1
+        result["collisions"] += report["baseline"]["collision"]
+        seconds["baseline"] += report["baseline"]["seconds"]
+        for name, r in report["engines"].items():
+            seconds[name] = seconds.get(name, 0.0) + r["seconds"]
+            if r["diffs"]:
+                result["mismatches"].append((seed, name, r["diffs"]))
+    return result
@@ -1,11 +1,20 @@
+import hashlib
+import itertools
 import logging
+import os
+import random
+import tempfile
 import unittest
+import unittest.mock
 from eudoxa import (
-    VDiff, EudoxaManager,
-    get_vdiff_relation, set_vdiff_relation,
+    VDiff, EudoxaManager, ClosureBudget, ClosureCache, ClosureStats, ClosureEngine, ComponentClosureEngine, ConsistencyChecker, LevelOrderClosure, NumpyClosureEngine, PointQuery, ProvenanceLog, ReachabilityIndex, WarmClosureCache, NATURAL_ZERO,
+    CLOSURE_BACKENDS, MIRROR_RULES, R_NEGTRANSP, register_closure_backend,
+    get_vdiff_relation, set_vdiff_relation, _vdiff_key,
     TRUE, FALSE, UNDEFINED,
-    GT, GTE, DEQ, LTE, LT,
+    GT, GTE, DEQ, LTE, LT, BT, BTE, EQ, WTE, WT,
+    AL_RELATION_OPTIONS, RelationIndex, REL_UNDEFINED, REL_TRUE, REL_FALSE, REL_CODES,
 )
+from tests.closure_fuzz import random_project, closure_differential
 
 logging.getLogger("eudoxa").setLevel(logging.WARNING)
 
@@ -30,6 +39,23 @@ def rel(closure, a1, l1a, l1b, a2, l2a, l2b):
     return get_vdiff_relation(closure, VDiff(a1, l1a, l1b), VDiff(a2, l2a, l2b))
 
 
+def random_mgr(seed, n_aspects=3, max_levels=4, n_relations=5):
+    """
+    Build a reproducible random project: aspects with 1..max_levels levels and
+    n_relations random aspect level relations and cross-vdiff relations.
+    """
+    return random_project(seed, n_aspects, max_levels, n_relations)
+
+
+def add_cells(adds):
+    """Reduce an adds list to the set of (vd1, rel, vd2) cells it defines,
+    with natural zeros normalised so that origins and vdiff copies don't matter."""
+    def cell(vd):
+        key = _vdiff_key(vd)
+        return (key.aspect_name, key.from_level, key.to_level)
+    return {(cell(vd1), r, cell(vd2)) for _, _, (vd1, r, vd2) in adds}
+
+
 # ── Basic / sanity ────────────────────────────────────────────────────────────
 
 class TestClosureBasic(unittest.TestCase):
@@ -391,5 +417,1360 @@ class TestClosureCollisions(unittest.TestCase):
         self.assertEqual(colls, [])
 
 
+# ── Semi-naive evaluation vs reference ────────────────────────────────────────
+
+class TestClosureMatchesReference(unittest.TestCase):
+    """closure() must return exactly what reference_closure() returns: the
+    same adds in the same order, origins included, and the same collisions."""
+
+    engine = None
+
+    def assert_same_closure(self, mgr):
+        ref_closure, ref_adds, ref_colls = mgr.reference_closure()
+        closure, adds, colls = mgr.closure(self.engine)
+        if self.engine is None:
+            self.assertEqual(list(adds), ref_adds)
+            self.assertEqual(colls, ref_colls)
+            self.assertEqual(closure, ref_closure)
+            return
+        self.assertEqual(bool(colls), bool(ref_colls))
+        if not colls:
+            self.assertEqual(closure, ref_closure)
+            self.assertEqual(add_cells(adds), add_cells(ref_adds))
+            self.assertEqual(len(adds), len(ref_adds))
+
+    def test_random_projects(self):
+        for seed in range(120):
+            with self.subTest(seed=seed):
+                self.assert_same_closure(random_mgr(seed))
+
+    def test_random_projects_dense(self):
+        for seed in range(30):
+            with self.subTest(seed=seed):
+                self.assert_same_closure(random_mgr(seed, n_aspects=2, max_levels=5,
+                                                    n_relations=8))
+
+    def test_origins_use_rule_labels(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GTE)
+        _, adds, _ = mgr.closure(self.engine)
+        transp = [a for a in adds if a[0] == 'TransP']
+        self.assertEqual(len(transp), 1)
+        ab, r1, cd, r2, ef = transp[0][1]
+        self.assertEqual((ab, cd, ef), (VDiff("A", "1", "2"), VDiff("B", "1", "2"),
+                                        VDiff("C", "1", "2")))
+        self.assertEqual(transp[0][2], [VDiff("A", "1", "2"), TRUE, VDiff("C", "1", "2")])
+
+    def test_origins_are_well_founded(self):
+        # Every premise of an add must hold before the add is made
+        for seed in range(40):
+            mgr = random_mgr(seed)
+            closure, adds, colls = mgr.closure(self.engine)
+            if colls:
+                continue
+            known = {k: dict(row) for k, row in mgr.vdiff_comparison_matrix.items()}
+            for rule, detail, (vd1, r, vd2) in adds:
+                if rule == 'DiffP':
+                    premises = [detail]
+                elif rule == 'NegDiffP': # origin shows the conclusion
+                    premises = []
+                else:
+                    premises = [detail[0:3], detail[2:5]]
+                for x, prel, y in premises:
+                    if prel == DEQ:
+                        self.assertEqual(get_vdiff_relation(known, x, y), TRUE)
+                        self.assertEqual(get_vdiff_relation(known, y, x), TRUE)
+                    else:
+                        self.assertEqual(get_vdiff_relation(known, x, y), prel,
+                                         (seed, rule, detail))
+                known[_vdiff_key(vd1)][_vdiff_key(vd2)] = r
+
+
+    def test_natural_zeros_as_the_reference_shows_them(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_rel("B", "1", "2", "A", "1", "2", GTE)
+        _, adds, _ = mgr.closure(self.engine)
+        ref_adds = mgr.reference_closure()[1]
+        self.assertIn(VDiff("A", "1", "1"), [vd for _, detail, _ in ref_adds for vd in detail])
+        if self.engine is None:
+            self.assertEqual([detail for _, detail, _ in adds], [detail for _, detail, _ in ref_adds])
+
+
+class TestPythonClosureMatchesReference(TestClosureMatchesReference):
+    """The semi-naive backend derives the same cells as reference_closure(),
+    by origins and in an order of its own."""
+
+    engine = 'python'
+
+
+class TestNumpyClosureMatchesReference(TestClosureMatchesReference):
+    """The NumPy backend must agree with reference_closure() as well."""
+
+    engine = 'numpy'
+
+
+class TestEngineHarness(unittest.TestCase):
+    """Backend registry and the differential harness over all engines."""
+
+    def test_registered_engines_agree(self):
+        result = closure_differential(range(40))
+        self.assertEqual(result["projects"], 40)
+        self.assertEqual(result["mismatches"], [])
+        self.assertEqual(set(result["seconds"]), {"baseline"} | set(CLOSURE_BACKENDS))
+
+    def test_reference_engine(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                mgr = random_mgr(seed)
+                ref_closure, ref_adds, ref_colls = mgr.reference_closure()
+                closure, adds, colls = mgr.closure('reference')
+                self.assertEqual(bool(colls), bool(ref_colls))
+                if not colls:
+                    self.assertEqual(closure, ref_closure)
+                    self.assertEqual(add_cells(adds), add_cells(ref_adds))
+
+    def test_faulty_engine_is_reported(self):
+        class NoNegTransP(ClosureEngine):
+            def run(self):
+                for event in super().run():
+                    if event[0] != R_NEGTRANSP:
+                        yield event
+        register_closure_backend('faulty', NoNegTransP)
+        try:
+            mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+            mgr.set_rel("A", "1", "2", "B", "1", "2", LT)
+            mgr.set_rel("B", "1", "2", "C", "1", "2", LT)
+            report = mgr.compare_closure_engines()
+            self.assertEqual(report["engines"]["python"]["diffs"], [])
+            diffs = report["engines"]["faulty"]["diffs"]
+            self.assertTrue(any("added only by the reference" in d for d in diffs))
+        finally:
+            del CLOSURE_BACKENDS['faulty']
+
+    def test_unknown_engine(self):
+        mgr = make_mgr({"A": ["1", "2"]})
+        with self.assertRaises(ValueError):
+            mgr.closure('no-such-engine')
+        with self.assertRaises(ValueError):
+            register_closure_backend('broken', object)
+
+
+class TestWarmClosure(unittest.TestCase):
+    """The warm closure kept by the try_set_* methods equals a fresh closure."""
+
+    def closure_cells(self, mgr):
+        closure, _, colls = mgr.closure()
+        self.assertEqual(colls, [])
+        return {(_vdiff_key(vd1), rel, _vdiff_key(vd2))
+                for vd1, row in closure.items() for vd2, rel in row.items() if rel}
+
+    def random_edit(self, rng, mgr):
+        names = list(mgr.aspects)
+        if rng.random() < 0.4:
+            an = rng.choice(names)
+            levels = list(mgr.aspects[an].levels)
+            return mgr.try_set_aspect_level_relation(an, rng.choice(levels), rng.choice(levels),
+                                                     rng.choice(AL_RELATION_OPTIONS))
+        a1, a2 = rng.choice(names), rng.choice(names)
+        l1, l2 = list(mgr.aspects[a1].levels), list(mgr.aspects[a2].levels)
+        vd1 = VDiff(a1, *rng.sample(l1, 2)) if len(l1) > 1 else VDiff(a1, None, None)
+        vd2 = VDiff(a2, *rng.sample(l2, 2)) if len(l2) > 1 else VDiff(a2, None, None)
+        return mgr.try_set_vdiff_order_relation(vd1, vd2, rng.choice([GT, GTE, DEQ, LTE, LT,
+                                                                      UNDEFINED]))
+
+    def test_tracks_random_edits(self):
+        for seed in range(30):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                mgr = random_mgr(seed, n_relations=0)
+                for _ in range(12):
+                    before = {k: dict(row) for k, row in mgr.vdiff_comparison_matrix.items()}
+                    adds, colls, _ = self.random_edit(rng, mgr)
+                    if colls:
+                        self.assertEqual(mgr.vdiff_comparison_matrix, before)
+                    cells = {(_vdiff_key(vd1), rel, _vdiff_key(vd2))
+                             for vd1, rel, vd2 in mgr.warm_closure().cells()}
+                    self.assertEqual(cells, self.closure_cells(mgr))
+
+    def test_retraction_random(self):
+        # Many assertions first, then unset them in random order
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                mgr = random_mgr(seed, n_aspects=3, max_levels=3, n_relations=0)
+                asserted = []
+                for _ in range(15):
+                    names = list(mgr.aspects)
+                    a1, a2 = rng.choice(names), rng.choice(names)
+                    vd1 = VDiff(a1, *rng.sample(list(mgr.aspects[a1].levels) * 2, 2))
+                    vd2 = VDiff(a2, *rng.sample(list(mgr.aspects[a2].levels) * 2, 2))
+                    _, colls, _ = mgr.try_set_vdiff_order_relation(vd1, vd2, rng.choice([GT, GTE, DEQ]))
+                    if not colls:
+                        asserted.append((vd1, vd2))
+                rng.shuffle(asserted)
+                for vd1, vd2 in asserted:
+                    mgr.try_set_vdiff_order_relation(vd1, vd2, UNDEFINED)
+                    cells = {(_vdiff_key(a), r, _vdiff_key(b)) for a, r, b in mgr.warm_closure().cells()}
+                    self.assertEqual(cells, self.closure_cells(mgr))
+
+    def test_retraction_keeps_alternative_support(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        a, b, c = VDiff("A", "1", "2"), VDiff("B", "1", "2"), VDiff("C", "1", "2")
+        mgr.try_set_vdiff_order_relation(a, b, GTE)
+        mgr.try_set_vdiff_order_relation(b, c, GTE)
+        mgr.try_set_vdiff_order_relation(a, c, GTE)
+        _, _, inferred = mgr.try_set_vdiff_order_relation(a, c, UNDEFINED)
+        self.assertIn((("A", "1", "2"), TRUE, ("C", "1", "2")), add_cells(inferred))
+        mgr.try_set_vdiff_order_relation(a, b, UNDEFINED)
+        self.assertNotIn((a, TRUE, c), set(mgr.warm_closure().cells()))
+
+    def chain_mgr(self):
+        # Three aspects with level chains, linked across
+        mgr = make_mgr({an: ["1", "2", "3", "4"] for an in "ABC"})
+        for an in "ABC":
+            for la, lb in (("1", "2"), ("2", "3"), ("3", "4")):
+                mgr.set_aspect_level_relation(an, la, lb, BT)
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GT)
+        mgr.set_rel("B", "2", "3", "C", "3", "4", GTE)
+        return mgr
+
+    def test_retraction_deletes_only_unsupported(self):
+        mgr = self.chain_mgr()
+        warm = mgr.warm_closure()
+        before = set(warm.cells())
+        deleted = []
+        delete = warm.engine.index.discard
+        warm.engine.index.discard = lambda i, j, code: (deleted.append((i, j)), delete(i, j, code))
+        _, _, inferred = mgr.try_set_vdiff_order_relation(VDiff("B", "2", "3"),
+                                                          VDiff("C", "3", "4"), UNDEFINED)
+        self.assertEqual(len(inferred), 0)
+        after = set(mgr.warm_closure().cells())
+        # No cell is deleted only to be derived again
+        self.assertTrue(before - after)
+        self.assertEqual(len(deleted), len(before - after))
+
+    def test_inferred_adds_are_kept_unset_facts(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        a, b, c = VDiff("A", "1", "2"), VDiff("B", "1", "2"), VDiff("C", "1", "2")
+        mgr.try_set_vdiff_order_relation(a, b, GTE)
+        mgr.try_set_vdiff_order_relation(b, c, GTE)
+        mgr.try_set_vdiff_order_relation(a, c, GTE)
+        _, _, inferred = mgr.try_set_vdiff_order_relation(a, c, UNDEFINED)
+        self.assertEqual(add_cells(inferred), {(("A", "1", "2"), TRUE, ("C", "1", "2"))})
+        _, _, inferred = mgr.try_set_vdiff_order_relation(b, c, UNDEFINED)
+        self.assertEqual(len(inferred), 0)
+
+    def test_unset_on_contradictory_matrix(self):
+        mgr = make_mgr({an: ["1", "2"] for an in "ABCD"})
+        a, b, c, d = (VDiff(an, "1", "2") for an in "ABCD")
+        for vd1, vd2 in ((a, b), (b, c), (c, a), (a, d), (d, a)):
+            mgr.try_set_vdiff_order_relation(vd1, vd2, GTE)
+        mgr.set_rel("C", "1", "2", "D", "1", "2", GT)   # d⋣c against d⊒a⊒b⊒c
+        self.assertTrue(mgr.warm_closure().colls)
+        _, colls, inferred = mgr.try_set_vdiff_order_relation(c, d, UNDEFINED)
+        self.assertEqual(colls, [])
+        # Only the unset c⊒d, still derived through a, not the whole closure
+        self.assertEqual([add for _, _, add in inferred], [[c, TRUE, d]])
+        self.assertEqual({(_vdiff_key(x), r, _vdiff_key(y)) for x, r, y in mgr.warm_closure().cells()},
+                         self.closure_cells(mgr))
+
+    def test_retraction_past_threshold_rebuilds(self):
+        mgr = self.chain_mgr()
+        warm = mgr.warm_closure()
+        warm.rebuild_fraction = 0
+        mgr.try_set_aspect_level_relation("B", "2", "3", UNDEFINED)
+        self.assertIsNot(mgr.warm_closure(), warm)
+        self.assertEqual({(_vdiff_key(a), r, _vdiff_key(b)) for a, r, b in mgr.warm_closure().cells()},
+                         self.closure_cells(mgr))
+
+    def test_records_trace_to_base_cells(self):
+        rng = random.Random(5)
+        mgr = self.chain_mgr()
+        for _ in range(20):
+            self.random_edit(rng, mgr)
+            warm, n = mgr.warm_closure(), len(mgr.vdiff_ids())
+            raw = mgr.vdiff_ids().encode(mgr.vdiff_comparison_matrix)
+            for p, k in enumerate(warm.at):
+                if k < 0:
+                    continue
+                for i, j, code in warm.premise_cells(k):
+                    self.assertEqual(warm.engine.codes[i * n + j], code)
+                    self.assertTrue(warm.at[i * n + j] < k or raw[i * n + j])
+
+    def test_inferred_adds_are_new_consequences(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.try_set_vdiff_order_relation(VDiff("A", "1", "2"), VDiff("B", "1", "2"), GTE)
+        _, _, inferred = mgr.try_set_vdiff_order_relation(VDiff("B", "1", "2"),
+                                                          VDiff("C", "1", "2"), GTE)
+        self.assertEqual(add_cells(inferred), {(("A", "1", "2"), TRUE, ("C", "1", "2"))})
+        # Asking again derives nothing new
+        _, _, inferred = mgr.try_set_vdiff_order_relation(VDiff("B", "1", "2"),
+                                                          VDiff("C", "1", "2"), GTE)
+        self.assertEqual(inferred, [])
+
+    def test_not_persisted_with_session(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        mgr.try_set_vdiff_order_relation(VDiff("A", "1", "2"), VDiff("B", "1", "2"), GTE)
+        data = mgr.to_dict()
+        self.assertFalse({"vdiff_closure", "vdiff_closure_mirrored",
+                          "vdiff_closure_provenance"} & set(data))
+        # Sessions written with the closure still load; the keys are ignored
+        data["vdiff_closure"], data["vdiff_closure_provenance"] = {"x": {}}, "not base64"
+        restored = EudoxaManager.from_dict(data)
+        self.assertIsNone(restored._warm_closure)
+        self.assertEqual({(_vdiff_key(a), r, _vdiff_key(b)) for a, r, b in restored.warm_closure().cells()},
+                         self.closure_cells(restored))
+
+    def test_kept_for_the_session(self):
+        cache = WarmClosureCache()
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.warm_closures, mgr.session_key = cache, "s1"
+        mgr.try_set_aspect_level_relation("A", "1", "2", GT)
+        mgr.try_set_vdiff_order_relation(VDiff("A", "1", "2"), VDiff("B", "1", "2"), GT)
+        warm = mgr.warm_closure()
+        data = mgr.to_dict()
+        mgr.keep_warm_closure()
+        self.assertIsNone(mgr._warm_closure)
+        # Another session, or the same one with another matrix, does not get it
+        other = EudoxaManager.from_dict(data)
+        other.warm_closures, other.session_key = cache, "s2"
+        self.assertIsNot(other.warm_closure(), warm)
+        restored = EudoxaManager.from_dict(data)
+        restored.warm_closures, restored.session_key = cache, "s1"
+        self.assertIs(restored.warm_closure(), warm)
+        self.assertIs(restored.vdiff_ids(), warm.ids)
+        # Taken, so no other manager shares it; retracting works on its provenance
+        self.assertIsNone(cache.take("s1", restored.vdcm_fingerprint()))
+        restored.try_set_vdiff_order_relation(VDiff("A", "1", "2"), VDiff("B", "1", "2"), UNDEFINED)
+        self.assertEqual({(_vdiff_key(a), r, _vdiff_key(b)) for a, r, b in restored.warm_closure().cells()},
+                         self.closure_cells(restored))
+        restored.keep_warm_closure()
+        stale = EudoxaManager.from_dict(data)
+        stale.warm_closures, stale.session_key = cache, "s1"
+        self.assertIsNot(stale.warm_closure(), warm)
+        self.assertEqual({(_vdiff_key(a), r, _vdiff_key(b)) for a, r, b in stale.warm_closure().cells()},
+                         self.closure_cells(stale))
+
+    def test_session_cache_is_bounded(self):
+        cache = WarmClosureCache(maxsize=2)
+        for sid in "abc":
+            mgr = make_mgr({"A": ["1", "2"]})
+            mgr.warm_closures, mgr.session_key = cache, sid
+            mgr.warm_closure()
+            mgr.keep_warm_closure()
+        self.assertEqual(list(cache._entries), ["b", "c"])
+
+    def test_direct_setter_invalidates(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        mgr.warm_closure()
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GT)
+        self.assertIsNone(mgr._warm_closure)
+
+
+class TestComponents(unittest.TestCase):
+    """Aspects linked only through ◬ are closed separately and lifted."""
+
+    def test_components_split_on_natural_zero(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("B", "1", "2", BT)
+        mgr.set_rel("A", "1", "2", "C", "1", "2", GTE)
+        ids = mgr.vdiff_ids()
+        engine = ComponentClosureEngine(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        self.assertEqual(engine.components(), [[0, 2], [1]])
+
+    def test_lifted_cells_match_reference(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", EQ)
+        mgr.set_aspect_level_relation("B", "1", "2", WT)
+        closure, adds, colls = mgr.closure()
+        ref_closure, ref_adds, _ = mgr.reference_closure()
+        self.assertEqual(colls, [])
+        self.assertEqual(closure, ref_closure)
+        self.assertEqual(add_cells(adds), add_cells(ref_adds))
+        # A: Δ(1,2) ⊐ ◬ and B: ◬ ⊐ Δ(1,2), so Δ(1,2) in A ⊒ Δ(1,2) in B across components
+        self.assertEqual(rel(closure, "A", "1", "2", "B", "1", "2"), TRUE)
+        self.assertEqual(rel(closure, "B", "1", "2", "A", "1", "2"), FALSE)
+
+    def test_same_as_undecomposed(self):
+        for seed in range(30):
+            mgr = random_mgr(seed, n_aspects=4, n_relations=3)
+            mgr.closure_cache = None
+            mgr.closure_components = False
+            expected = mgr.closure()
+            mgr.closure_components = True
+            closure, adds, colls = mgr.closure()
+            self.assertEqual(bool(colls), bool(expected[2]), seed)
+            if not colls:
+                self.assertEqual(closure, expected[0], seed)
+                self.assertEqual(add_cells(adds), add_cells(expected[1]), seed)
+
+
+class TestLevelOrders(unittest.TestCase):
+    """Aspects with level relations only are closed from their level order."""
+
+    def level_mgr(self, seed):
+        """One aspect with random level relations and single ◬ cells."""
+        rng = random.Random(seed)
+        levels = [str(k) for k in range(rng.randint(2, 6))]
+        mgr = make_mgr({"A": levels})
+        for _ in range(rng.randint(1, 2 * len(levels))):
+            la, lb = rng.sample(levels, 2)
+            if rng.random() < 0.7:
+                mgr.set_aspect_level_relation("A", la, lb, rng.choice([BT, BTE, EQ, WTE, WT]))
+            else:
+                vd = VDiff("A", la, lb)
+                x, y = (vd, NATURAL_ZERO) if rng.random() < 0.5 else (NATURAL_ZERO, vd)
+                set_vdiff_relation(mgr.vdiff_comparison_matrix, x, y, rng.choice([TRUE, FALSE]))
+        return mgr
+
+    def test_applies(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        ids = mgr.vdiff_ids()
+        self.assertFalse(LevelOrderClosure.applies(ids, ids.encode(mgr.vdiff_comparison_matrix)))
+        sub = ids.subset([0])
+        codes = ids.encode(mgr.vdiff_comparison_matrix)
+        n = len(ids)
+        sub_codes = bytearray(codes[g * n + h] for g in sub.glob for h in sub.glob)
+        self.assertTrue(LevelOrderClosure.applies(sub, sub_codes))
+        mgr.set_rel("A", "1", "3", "A", "2", "3", GTE)
+        sub_codes = bytearray(ids.encode(mgr.vdiff_comparison_matrix)[g * n + h]
+                              for g in sub.glob for h in sub.glob)
+        self.assertFalse(LevelOrderClosure.applies(sub, sub_codes))
+
+    def test_matches_engine(self):
+        # Same closure and collisions as ClosureEngine, and every event is a
+        # rule instance over cells derived before it
+        for seed in range(300):
+            with self.subTest(seed=seed):
+                mgr = self.level_mgr(seed)
+                ids = mgr.vdiff_ids()
+                n = len(ids)
+                codes = ids.encode(mgr.vdiff_comparison_matrix)
+                expected = bytearray(codes)
+                collides = any(ev[5] != REL_UNDEFINED for ev in ClosureEngine(ids, expected).run())
+                check = ClosureEngine(ids, bytearray(codes))
+                events = list(LevelOrderClosure(ids, codes).run())
+                self.assertEqual(any(ev[5] != REL_UNDEFINED for ev in events), collides)
+                if collides:
+                    continue
+                self.assertEqual(codes, expected)
+                for rule, premises, i, j, code, old in events:
+                    self.assertIn((rule, premises), set(check.derivations(i, j, code)))
+                    check.codes[i * n + j] = code
+                    check.index.add(i, j, code)
+
+    def test_closure_matches_reference(self):
+        for seed in range(40):
+            with self.subTest(seed=seed):
+                mgr = self.level_mgr(seed)
+                ref_closure, ref_adds, ref_colls = mgr.reference_closure()
+                closure, adds, colls = mgr.closure()
+                self.assertEqual(bool(colls), bool(ref_colls))
+                if not colls:
+                    self.assertEqual(closure, ref_closure)
+                    self.assertEqual(add_cells(adds), add_cells(ref_adds))
+                    self.assertEqual(len(adds), len(ref_adds))
+
+    def test_stats(self):
+        mgr = make_mgr({"A": ["1", "2", "3", "4"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", EQ)
+        mgr.set_aspect_level_relation("A", "3", "4", BTE)
+        mgr.closure_cache = None
+        stats = ClosureStats()
+        _, adds, _ = mgr.closure('python', stats=stats)
+        self.assertEqual(stats.rounds, 4)
+        self.assertEqual(sum(stats.firings), len(adds))
+        mgr.closure_level_orders = False
+        general = ClosureStats()
+        mgr.closure('python', stats=general)
+        self.assertEqual(sum(general.firings), len(adds))
+        self.assertLess(sum(stats.attempts), sum(general.attempts))
+
+
+class TestDeqClasses(unittest.TestCase):
+    """The NumPy engine collapses ≜ classes, kept in a union-find, before
+    its transitive products."""
+
+    def test_equal_levels_collapse_with_natural_zero(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", EQ)
+        mgr.set_aspect_level_relation("A", "2", "3", EQ)
+        mgr.set_aspect_level_relation("B", "1", "2", BT)
+        ids = mgr.vdiff_ids()
+        engine = NumpyClosureEngine(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        for _ in engine.run():
+            pass
+        reps, cls = engine.deq_classes(engine.T, engine.F)
+        a_ids = [i for i in range(1, len(ids)) if ids.aspect[i] == 0]
+        self.assertEqual({int(reps[cls[i]]) for i in a_ids}, {0})
+        self.assertNotEqual(int(reps[cls[ids.id_of(VDiff("B", "1", "2"))]]), 0)
+
+    def test_no_classes_without_equivalences(self):
+        mgr = make_mgr({"A": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        ids = mgr.vdiff_ids()
+        engine = NumpyClosureEngine(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        self.assertIsNone(engine.deq_classes(engine.T, engine.F))
+
+    def test_incremental_classes_match_fresh(self):
+        # Classes unioned round by round equal those of the closed matrix
+        for seed in range(30):
+            mgr = random_mgr(seed, n_aspects=2, max_levels=5, n_relations=8)
+            ids = mgr.vdiff_ids()
+            engine = NumpyClosureEngine(ids, ids.encode(mgr.vdiff_comparison_matrix))
+            if any(ev[5] != REL_UNDEFINED for ev in engine.run()):
+                continue
+            fresh = NumpyClosureEngine(ids, engine.codes)
+            got = engine.deq_classes(engine.T, engine.F)
+            expected = fresh.deq_classes(fresh.T, fresh.F)
+            with self.subTest(seed=seed):
+                if expected is None:
+                    self.assertIsNone(got)
+                else:
+                    self.assertEqual([a.tolist() for a in got], [a.tolist() for a in expected])
+
+    def test_default_backend_collapses(self):
+        # The warm closure and checks run on the collapsing NumPy backend
+        self.assertIs(CLOSURE_BACKENDS[EudoxaManager.closure_engine], NumpyClosureEngine)
+        mgr = make_mgr({"A": ["1", "2"]})
+        mgr.closure_components = False
+        runner = mgr.closure_runner(mgr.vdiff_ids(), bytearray(len(mgr.vdiff_ids()) ** 2))
+        self.assertIsInstance(runner, NumpyClosureEngine)
+
+
+class TestClosureBudget(unittest.TestCase):
+    """A spent budget stops closure() with a partial, uncached result."""
+
+    def make(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2", "3"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", BT)
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.closure_cache = ClosureCache()
+        return mgr
+
+    def test_step_budget(self):
+        for engine in ("python", "numpy"):
+            mgr = self.make()
+            budget = ClosureBudget(steps=3)
+            closure, adds, colls = mgr.closure(engine, budget=budget)
+            self.assertTrue(budget.incomplete)
+            self.assertEqual(budget.reason, "steps")
+            self.assertEqual((len(adds), colls), (3, []))
+            full = mgr.closure(engine)[1]
+            self.assertEqual(add_cells(adds) - add_cells(full), set())
+            self.assertGreater(len(full), 3)
+
+    def test_cancel_and_deadline(self):
+        mgr = self.make()
+        budget = ClosureBudget()
+        budget.cancel()
+        self.assertEqual(mgr.closure(budget=budget)[1], [])
+        self.assertEqual(budget.reason, "cancelled")
+        budget = ClosureBudget(seconds=-1)
+        mgr.closure(budget=budget)
+        self.assertEqual(budget.reason, "deadline")
+        self.assertEqual(len(mgr.closure_cache._entries), 0)
+
+    def test_progress_and_complete_run(self):
+        mgr = self.make()
+        rounds = []
+        budget = ClosureBudget(seconds=60, progress=lambda b: rounds.append((b.round, b.pending)))
+        result = mgr.closure(budget=budget)
+        self.assertFalse(budget.incomplete)
+        self.assertEqual(budget.derived, len(result[1]))
+        self.assertEqual([r for r, _ in rounds], list(range(1, len(rounds) + 1)))
+        self.assertTrue(all(pending > 0 for _, pending in rounds))
+        self.assertEqual(result[0], mgr.reference_closure()[0])
+
+
+
+class TestClosureStats(unittest.TestCase):
+    """Opt-in rule counters, rounds and phase times of closure()."""
+
+    def make(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2", "3"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", BT)
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.closure_cache = ClosureCache()
+        return mgr
+
+    def test_counters(self):
+        for engine in ("python", "numpy", "reference"):
+            with self.subTest(engine=engine):
+                mgr = self.make()
+                rounds = []
+                stats = ClosureStats(on_round=lambda s: rounds.append(s.rounds))
+                _, adds, colls = mgr.closure(engine, stats=stats)
+                self.assertEqual(stats.engine, engine)
+                self.assertEqual(sum(stats.firings), len(adds))
+                self.assertEqual(stats.collisions, len(colls))
+                for rule, label in enumerate(stats.to_dict()["rules"]):
+                    self.assertGreaterEqual(stats.attempts[rule], stats.firings[rule], label)
+                self.assertEqual(rounds, list(range(1, stats.rounds + 1)))
+                self.assertGreaterEqual(stats.lookups, sum(stats.attempts))
+                self.assertIn("derive", stats.seconds)
+                self.assertFalse(stats.cached)
+
+    def test_collision_counted(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GTE)
+        mgr.set_rel("A", "1", "2", "C", "1", "2", LT)
+        stats = ClosureStats()
+        _, _, colls = mgr.closure(stats=stats)
+        self.assertTrue(colls)
+        self.assertEqual(stats.collisions, 1)
+
+    def test_hook(self):
+        mgr = self.make()
+        seen = []
+        mgr.closure_hook = seen.append
+        try:
+            mgr.closure()
+            mgr.closure()
+        finally:
+            del mgr.closure_hook
+        self.assertEqual([s.cached for s in seen], [False, True])
+        summary = seen[0].to_dict()
+        self.assertEqual(summary["rules"]["TransP"]["firings"], seen[0].firings[2])
+        self.assertIn("TransP", str(seen[0]))
+        self.assertEqual(len(mgr.closure_cache._entries), 1)
+
+class TestIterClosure(unittest.TestCase):
+    """iter_closure() streams the derivations closure() accumulates."""
+
+    def test_stream_matches_closure(self):
+        for seed in range(20):
+            mgr = random_mgr(seed)
+            mgr.closure_cache = None
+            _, adds, colls = mgr.closure()
+            streamed = [(origin, add, coll) for origin, add, coll in mgr.iter_closure()]
+            self.assertEqual([[o[0], o[1], a] for o, a, _ in streamed if a], adds, seed)
+            self.assertEqual([[o[0], o[1], c] for o, _, c in streamed if c], colls, seed)
+
+    def test_stops_at_collision_and_replays_cache(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GTE)
+        mgr.set_vdiff_relation(VDiff("A", "1", "2"), VDiff("C", "1", "2"), FALSE)
+        mgr.closure_cache = ClosureCache()
+        streamed = list(mgr.iter_closure())
+        self.assertIsNotNone(streamed[-1][2])
+        self.assertTrue(all(coll is None for _, _, coll in streamed[:-1]))
+        mgr.closure()
+        self.assertEqual(list(mgr.iter_closure()), streamed)
+
+    def test_page_through_inferences(self):
+        mgr = make_mgr({"A": ["1", "2", "3", "4"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", BT)
+        mgr.set_aspect_level_relation("A", "3", "4", BT)
+        mgr.closure_cache = None
+        page = list(itertools.islice(mgr.iter_closure(), 5))
+        self.assertEqual(page, list(mgr.iter_closure())[:5])
+
+
+class TestProvenanceLog(unittest.TestCase):
+    """closure() and the warm closure record adds in a ProvenanceLog."""
+
+    def test_decodes_to_app_ac_entries(self):
+        mgr = random_mgr(5)
+        mgr.closure_cache = None
+        ids = mgr.vdiff_ids()
+        log = ProvenanceLog(ids)
+        entries = []
+        for event in ClosureEngine(ids, ids.encode(mgr.vdiff_comparison_matrix)).run():
+            if event[5] != REL_UNDEFINED:
+                break
+            log.record(event)
+            origin, add, _ = ids.entry(event)
+            entries.append([origin[0], origin[1], add])
+        self.assertGreater(len(log), 2)
+        self.assertEqual(log, entries)
+        self.assertEqual(log[-1], entries[-1])
+        self.assertEqual(log[1:3], entries[1:3])
+        self.assertEqual([log.event(k)[2:5] for k in range(len(log))], list(log.cells()))
+
+    def test_closure_and_warm_closure_use_log(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.closure_cache = None
+        _, adds, _ = mgr.closure()
+        self.assertIsInstance(adds, ProvenanceLog)
+        _, _, inferred = mgr.try_set_aspect_level_relation("A", "2", "3", BT)
+        self.assertIsInstance(inferred, ProvenanceLog)
+        self.assertIn(("A", "1", "3"), {(vd.aspect_name, vd.from_level, vd.to_level)
+                                        for _, _, (vd, _, _) in inferred})
+
+
+class TestPointQuery(unittest.TestCase):
+    """derived_vdiff_relation() agrees with the full closure."""
+
+    def test_matches_reference(self):
+        for seed in range(40):
+            mgr = random_mgr(seed, n_aspects=4, n_relations=4)
+            ref, _, colls = mgr.reference_closure()
+            if colls:
+                continue
+            vds = list(mgr.vdiff_ids().vdiffs)
+            pairs = [(a, b) for a in vds for b in vds]
+            random.Random(seed).shuffle(pairs)
+            for a, b in pairs:
+                self.assertEqual(mgr.derived_vdiff_relation(a, b),
+                                 get_vdiff_relation(ref, a, b), (seed, a, b))
+
+    def test_lazy_component_run(self):
+        mgr = make_mgr({"A": ["1", "2", "3", "4", "5"], "B": ["1", "2"]})
+        for la, lb in (("1", "2"), ("2", "3"), ("3", "4"), ("4", "5")):
+            mgr.set_aspect_level_relation("A", la, lb, BT)
+        self.assertEqual(mgr.derived_vdiff_relation(VDiff("A", "1", "3"), NATURAL_ZERO), TRUE)
+        query = mgr._point_query
+        self.assertEqual(len(query._runs), 1)
+        self.assertIsNotNone(query._runs[query.component_of[0]][2])   # still suspended
+        self.assertEqual(mgr.get_aspect_level_relation("A", "1", "5", derived=True), BT)
+        self.assertEqual(mgr.get_aspect_level_relation("A", "1", "5"), UNDEFINED)
+
+    def test_uses_warm_closure_and_invalidation(self):
+        mgr = make_mgr({"A": ["1", "2", "3"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.try_set_aspect_level_relation("A", "2", "3", BT)
+        self.assertEqual(mgr.derived_vdiff_relation(VDiff("A", "1", "3"), NATURAL_ZERO), TRUE)
+        self.assertIsNone(mgr._point_query)
+        mgr.set_aspect_level_relation("A", "3", "1", BT)   # contradicts; invalidates
+        self.assertIsNone(mgr._warm_closure)
+        mgr.set_aspect_level_relation("A", "3", "1", UNDEFINED)
+        self.assertEqual(mgr.derived_vdiff_relation(VDiff("A", "1", "3"), NATURAL_ZERO), TRUE)
+        self.assertIsInstance(mgr._point_query, PointQuery)
+
+
+
+class TestReachabilityIndex(unittest.TestCase):
+    """ReachabilityIndex answers every cell as the closure does."""
+
+    def test_matches_closure(self):
+        kinds = set()
+        for seed in range(40):
+            for kw in ({}, {"n_aspects": 2, "max_levels": 5, "n_relations": 8},
+                       {"n_aspects": 5, "max_levels": 4, "n_relations": 2}):
+                mgr = random_mgr(seed, **kw)
+                ids = mgr.vdiff_ids()
+                n = len(ids)
+                codes = ids.encode(mgr.vdiff_comparison_matrix)
+                closed = bytearray(codes)
+                if any(ev[5] != REL_UNDEFINED for ev in ClosureEngine(ids, closed).run()):
+                    continue
+                index = ReachabilityIndex(ids, codes)
+                kinds.update(labels[0] for labels in index.labels)
+                with self.subTest(seed=seed, **kw):
+                    self.assertEqual(bytes(index.relation(i, j) for i in range(n) for j in range(n)),
+                                     bytes(closed))
+        self.assertEqual(kinds, {"levels", "classes"})
+
+    def test_natural_zero_closed(self):
+        # With the ◬?◬ diagonal unset, the index reads ◬⊒◬ from the closure
+        derived = 0
+        for seed in range(20):
+            for kw in ({}, {"n_aspects": 1, "max_levels": 5, "n_relations": 4}):
+                mgr = random_mgr(seed, **kw)
+                set_vdiff_relation(mgr.vdiff_comparison_matrix, NATURAL_ZERO, NATURAL_ZERO,
+                                   UNDEFINED)
+                ids = mgr.vdiff_ids()
+                n = len(ids)
+                codes = ids.encode(mgr.vdiff_comparison_matrix)
+                self.assertEqual(codes[0], REL_UNDEFINED)
+                closed = bytearray(codes)
+                if any(ev[5] != REL_UNDEFINED for ev in ClosureEngine(ids, closed).run()):
+                    continue
+                index = ReachabilityIndex(ids, codes)
+                derived += closed[0] == REL_TRUE
+                with self.subTest(seed=seed, **kw):
+                    self.assertEqual(bytes(index.relation(i, j) for i in range(n) for j in range(n)),
+                                     bytes(closed))
+        self.assertGreater(derived, 0)
+
+    def test_collision_keeps_cells(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", BT)
+        mgr.set_aspect_level_relation("A", "3", "1", BT)
+        mgr.set_aspect_level_relation("B", "1", "2", BT)
+        ids = mgr.vdiff_ids()
+        n = len(ids)
+        codes = ids.encode(mgr.vdiff_comparison_matrix)
+        index = ReachabilityIndex(ids, codes)
+        self.assertEqual([labels[0] for labels in index.labels], ["cells", "levels"])
+        query = PointQuery(ids, codes)
+        for i in range(n):
+            for j in range(n):
+                self.assertEqual(index.relation(i, j), query.relation(i, j), (i, j))
+
+    def test_manager_index(self):
+        mgr = random_mgr(3, n_aspects=8, max_levels=8, n_relations=6)
+        self.assertFalse(mgr.closure()[2])
+        ref = mgr.closure()[0]
+        for name, aspect in mgr.aspects.items():
+            for la in aspect.levels:
+                for lb in aspect.levels:
+                    mgr.get_aspect_level_relation(name, la, lb, derived=True)
+        index = mgr._reachability
+        self.assertIsInstance(index, ReachabilityIndex)
+        self.assertIsNone(mgr._point_query)
+        self.assertLess(index.nbytes, len(index.ids) ** 2 // 4)
+        vds = list(mgr.vdiff_ids().vdiffs)
+        lookup = mgr.derived_relations()
+        for a in vds:
+            for b in vds:
+                self.assertEqual(lookup(a, b), get_vdiff_relation(ref, a, b))
+        mgr.invalidate_closure()
+        self.assertIsNone(mgr._reachability)
+
+
+class TestUndecidedRanking(unittest.TestCase):
+    """rank_undecided() counts what each answer would infer, on the warm
+    closure and without changing it."""
+
+    def closed_cells(self, mgr):
+        closure, _, colls = mgr.closure()
+        return {(_vdiff_key(a), _vdiff_key(b)) for a in closure for b in closure[a]
+                if closure[a][b] != UNDEFINED}, colls
+
+    def test_counts_match_closure(self):
+        levels = 0
+        for seed in range(8):
+            mgr = random_mgr(seed, n_relations=4)
+            if mgr.closure()[2]:
+                continue
+            before, _ = self.closed_cells(mgr)
+            warm = bytes(mgr.warm_closure().engine.codes)
+            result = mgr.rank_undecided(sample=10, limit=100, seed=seed)
+            self.assertEqual(bytes(mgr.warm_closure().engine.codes), warm)
+            self.assertLessEqual(result["evaluated"], 10)
+            for item in result["ranking"]:
+                levels += item["level"] is not None
+                for rel, count in item["answers"].items():
+                    if item["level"]:
+                        entries = mgr.aspect_level_relation_entries(*item["level"], rel)
+                    else:
+                        entries = mgr.vdiff_order_relation_entries(item["vd1"], item["vd2"], rel)
+                    trial = EudoxaManager.from_dict(mgr.to_dict())
+                    for vd1, vd2, r in entries:
+                        set_vdiff_relation(trial.vdiff_comparison_matrix, vd1, vd2, r)
+                    after, colls = self.closed_cells(trial)
+                    with self.subTest(seed=seed, item=item, rel=rel):
+                        self.assertEqual(count is None, bool(colls))
+                        if count is not None:
+                            asserted = {(_vdiff_key(a), _vdiff_key(b)) for a, b, _ in entries}
+                            self.assertEqual(len(after - before), count + len(asserted - before))
+                counts = [c for c in item["answers"].values() if c is not None]
+                self.assertEqual(item["worst"], min(counts))
+            expected = [item["expected"] for item in result["ranking"]]
+            self.assertEqual(expected, sorted(expected, reverse=True))
+        self.assertGreater(levels, 0)
+
+    def test_candidates_and_sampling(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        result = mgr.rank_undecided(limit=1000)
+        self.assertEqual(result["evaluated"], result["candidates"])
+        # One of each mirror pair, none that the closure decides
+        ids = mgr.vdiff_ids()
+        pairs = [frozenset((ids.id_of(r["vd1"]), ids.id_of(r["vd2"]))) for r in result["ranking"]]
+        self.assertEqual(len(set(pairs)), len(pairs))
+        for pair in pairs:
+            mirror = frozenset(ids.inv[x] for x in pair)
+            self.assertTrue(mirror == pair or mirror not in pairs, pair)
+        self.assertNotIn(frozenset((0, ids.id_of(VDiff("A", "2", "1")))), pairs)
+        self.assertIn(("B", "2", "1"), [r["level"] for r in result["ranking"]])
+        sampled = mgr.rank_undecided(sample=3, seed=7)
+        self.assertEqual(sampled["evaluated"], 3)
+        self.assertEqual(sampled, mgr.rank_undecided(sample=3, seed=7))
+
+    def test_budget_and_contradiction(self):
+        mgr = make_mgr({"A": ["1", "2", "3"]})
+        budget = ClosureBudget()
+        budget.cancel()
+        result = mgr.rank_undecided(budget=budget)
+        self.assertEqual((result["evaluated"], result["ranking"]), (0, []))
+        self.assertTrue(budget.incomplete)
+        for la, lb in (("1", "2"), ("2", "3"), ("3", "1")):
+            mgr.set_aspect_level_relation("A", la, lb, BT)
+        with self.assertRaises(ValueError):
+            mgr.rank_undecided()
+
+
+class TestConflictCore(unittest.TestCase):
+    """conflict_core() returns a minimal colliding set of explicit cells."""
+
+    def collides(self, mgr, cells):
+        fresh = make_mgr({name: list(a.levels) for name, a in mgr.aspects.items()})
+        for vd1, r, vd2 in cells:
+            if set_vdiff_relation(fresh.vdiff_comparison_matrix, vd1, vd2, r)[1]:
+                return True
+        return bool(fresh.reference_closure()[2])
+
+    def test_chain(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"], "D": ["1", "2"]})
+        a, b, c, d = (VDiff(x, "1", "2") for x in "ABCD")
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GT)
+        mgr.set_rel("A", "1", "2", "D", "1", "2", GTE)   # unrelated to the conflict
+        entries = mgr.vdiff_order_relation_entries(c, a, GTE)
+        self.assertTrue(mgr.try_set_vdiff_order_relation(c, a, GTE)[1])
+        core = mgr.conflict_core(entries)
+        self.assertEqual(sorted(map(repr, core)), sorted(map(repr, [
+            [c, TRUE, a], [a, TRUE, b], [c, FALSE, b]])))
+
+    def test_direct_clash_and_no_conflict(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        a, b = VDiff("A", "1", "2"), VDiff("B", "1", "2")
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GT)
+        self.assertEqual(mgr.conflict_core([(b, a, TRUE)]), [[b, FALSE, a], [b, TRUE, a]])
+        self.assertEqual(mgr.conflict_core([(a, b, TRUE)]), [])
+        self.assertEqual(mgr.conflict_core([(a, a, FALSE)]), [[a, FALSE, a]])
+
+    def test_random_cores_are_minimal(self):
+        checked = 0
+        for seed in range(60):
+            rng = random.Random(seed)
+            mgr = random_mgr(seed, n_relations=4)
+            if mgr.closure()[2]:
+                continue
+            names = list(mgr.aspects)
+            for _ in range(4):
+                a1, a2 = rng.choice(names), rng.choice(names)
+                l1, l2 = list(mgr.aspects[a1].levels), list(mgr.aspects[a2].levels)
+                vd1 = VDiff(a1, rng.choice(l1), rng.choice(l1))
+                vd2 = VDiff(a2, rng.choice(l2), rng.choice(l2))
+                order = rng.choice([GT, GTE, DEQ, LTE, LT])
+                if not mgr.try_set_vdiff_order_relation(vd1, vd2, order)[1]:
+                    continue
+                core = mgr.conflict_core(mgr.vdiff_order_relation_entries(vd1, vd2, order))
+                with self.subTest(seed=seed, core=core):
+                    self.assertTrue(self.collides(mgr, core))
+                    for k in range(len(core)):
+                        self.assertFalse(self.collides(mgr, core[:k] + core[k + 1:]))
+                checked += 1
+        self.assertGreater(checked, 20)
+
+    def test_traced_on_warm_closure(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"], "C": ["1", "2"], "D": ["1", "2"]})
+        mgr.set_aspect_level_relation("D", "1", "2", BT)   # not part of the conflict
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", BT)
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GT)
+        warm = mgr.warm_closure()
+        codes, records = bytes(warm.engine.codes), list(warm.log.cells())
+        runs = []
+        run = ClosureEngine.run
+        with unittest.mock.patch.object(ClosureEngine, "run",
+                                        lambda engine: runs.append(engine.n) or run(engine)):
+            c, a = VDiff("C", "1", "2"), VDiff("A", "1", "3")
+            core = mgr.conflict_core(mgr.vdiff_order_relation_entries(c, a, GTE))
+        self.assertTrue(self.collides(mgr, core))
+        self.assertIn([c, TRUE, a], core)
+        # No closure of the whole matrix, and the warm closure is unchanged
+        self.assertNotIn(len(mgr.vdiff_ids()), runs)
+        self.assertEqual(bytes(warm.engine.codes), codes)
+        self.assertEqual(list(warm.log.cells()), records)
+
+    def test_unset_entries_use_a_fresh_run(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        a, b, c = (VDiff(x, "1", "2") for x in "ABC")
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GT)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GT)
+        unset = mgr.vdiff_order_relation_entries(a, b, UNDEFINED)
+        self.assertEqual(mgr.conflict_core(unset + [(c, a, TRUE)]), [])
+        unset = mgr.vdiff_order_relation_entries(a, c, UNDEFINED)
+        core = mgr.conflict_core(unset + [(c, a, TRUE)])
+        self.assertIn([c, TRUE, a], core)
+        self.assertTrue(self.collides(mgr, core))
+
+class TestConsistencyChecker(unittest.TestCase):
+    """ConsistencyChecker and check_consistency() decide whether the closure
+    collides without computing it."""
+
+    def collides(self, ids, codes):
+        return any(ev[5] != REL_UNDEFINED for ev in ClosureEngine(ids, bytearray(codes)).run())
+
+    def test_matches_engine(self):
+        # Collides exactly when the closure does, and the collision cell can
+        # be derived with both codes: pinning it to either still collides
+        found = 0
+        for seed in range(80):
+            for kw in ({}, {"n_aspects": 2, "max_levels": 5, "n_relations": 8}):
+                with self.subTest(seed=seed, **kw):
+                    mgr = random_mgr(seed, **kw)
+                    ids = mgr.vdiff_ids()
+                    n = len(ids)
+                    codes = ids.encode(mgr.vdiff_comparison_matrix)
+                    result = ConsistencyChecker(ids, bytearray(codes)).check()
+                    self.assertEqual(result is not None, self.collides(ids, codes))
+                    if result is None:
+                        continue
+                    found += 1
+                    i, j, old, new = result
+                    self.assertEqual({old, new}, {REL_TRUE, REL_FALSE})
+                    for code in (old, new):
+                        if codes[i * n + j] in (REL_UNDEFINED, code):
+                            pinned = bytearray(codes)
+                            pinned[i * n + j] = code
+                            self.assertTrue(self.collides(ids, pinned))
+        self.assertGreater(found, 10)
+
+    def test_transitive_stage(self):
+        # ⊒ chain with a ⋣ across it, and a ⋣ chain closing a ⊒ cycle
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        a, b, c = (VDiff(x, "1", "2") for x in "ABC")
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GTE)
+        ids = mgr.vdiff_ids()
+        checker = ConsistencyChecker(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        self.assertIsNone(checker.transitive_conflict())
+        set_vdiff_relation(mgr.vdiff_comparison_matrix, a, c, FALSE)
+        checker = ConsistencyChecker(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        self.assertIsNotNone(checker.transitive_conflict())
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.set_rel("A", "1", "2", "B", "1", "2", LT)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", LT)
+        mgr.set_rel("A", "1", "2", "C", "1", "2", GTE)
+        ids = mgr.vdiff_ids()
+        checker = ConsistencyChecker(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        self.assertIsNotNone(checker.transitive_conflict())
+        self.assertIsNotNone(checker.check())
+
+    def test_diffp_needs_local_pass(self):
+        # DiffP collisions are out of reach of the transitive pass alone
+        mgr = make_mgr({"A": ["1", "2", "3", "4"]})
+        mgr.set_rel("A", "1", "3", "A", "2", "4", GTE)
+        set_vdiff_relation(mgr.vdiff_comparison_matrix, VDiff("A", "1", "2"), VDiff("A", "3", "4"), FALSE)
+        ids = mgr.vdiff_ids()
+        checker = ConsistencyChecker(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        self.assertIsNone(checker.transitive_conflict())
+        self.assertIsNotNone(checker.saturated_conflict())
+        self.assertIsNotNone(checker.check())
+
+    def test_decided_without_backend(self):
+        # Saturation decides both ways; the backend never runs
+        class NoBackend:
+            def __init__(self, *args):
+                raise AssertionError("backend ran")
+        mgr = make_mgr({"A": ["1", "2", "3", "4"], "B": ["1", "2", "3"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("B", "1", "2", BT)
+        mgr.set_rel("A", "1", "3", "B", "1", "2", GTE)
+        mgr.set_rel("A", "1", "3", "A", "2", "4", GTE)
+        ids = mgr.vdiff_ids()
+        codes = ids.encode(mgr.vdiff_comparison_matrix)
+        self.assertFalse(self.collides(ids, codes))
+        self.assertIsNone(ConsistencyChecker(ids, codes, NoBackend).check())
+        set_vdiff_relation(mgr.vdiff_comparison_matrix, VDiff("A", "1", "2"), VDiff("A", "3", "4"), FALSE)
+        codes = ids.encode(mgr.vdiff_comparison_matrix)
+        self.assertIsNotNone(ConsistencyChecker(ids, codes, NoBackend).check())
+
+    def test_without_diagonal_uses_components(self):
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                mgr = random_mgr(seed, n_relations=6)
+                set_vdiff_relation(mgr.vdiff_comparison_matrix, NATURAL_ZERO, NATURAL_ZERO, UNDEFINED)
+                ids = mgr.vdiff_ids()
+                codes = ids.encode(mgr.vdiff_comparison_matrix)
+                result = ConsistencyChecker(ids, bytearray(codes)).check()
+                self.assertEqual(result is not None, self.collides(ids, codes))
+
+    def test_cancelled_budget(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_rel("A", "1", "3", "B", "1", "2", GTE)
+        budget = ClosureBudget()
+        budget.cancel()
+        self.assertIsNone(mgr.check_consistency(budget=budget))
+        self.assertEqual(budget.reason, 'cancelled')
+
+    def test_level_only_components(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["1", "2"]})
+        mgr.set_aspect_level_relation("A", "1", "2", BT)
+        mgr.set_aspect_level_relation("A", "2", "3", BT)
+        self.assertIsNone(mgr.check_consistency())
+        set_vdiff_relation(mgr.vdiff_comparison_matrix, NATURAL_ZERO, VDiff("A", "1", "3"), TRUE)
+        mgr.invalidate_closure()
+        self.assertIsNotNone(mgr.check_consistency())
+        self.assertTrue(mgr.closure()[2])
+
+    def test_check_consistency_entries(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        a, b, c = (VDiff(x, "1", "2") for x in "ABC")
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GT)
+        self.assertIsNone(mgr.check_consistency())
+        self.assertIsNone(mgr.check_consistency(mgr.vdiff_order_relation_entries(a, c, GTE)))
+        coll = mgr.check_consistency(mgr.vdiff_order_relation_entries(c, a, GTE))
+        self.assertIsNotNone(coll)
+        self.assertEqual({coll[1], coll[3]}, {TRUE, FALSE})
+        self.assertEqual(mgr.check_consistency([(c, b, TRUE)]), [c, FALSE, b, TRUE])
+        # Entries are not applied to the matrix
+        self.assertEqual(get_vdiff_relation(mgr.vdiff_comparison_matrix, c, a), UNDEFINED)
+        with self.assertRaises(ValueError):
+            mgr.check_consistency(engine="nope")
+
+
+class TestRelationIndex(unittest.TestCase):
+    """RelationIndex keeps TRUE and FALSE adjacency apart, in both directions."""
+
+    def test_split_by_relation(self):
+        index = RelationIndex(4)
+        index.add(1, 2, REL_TRUE)
+        index.add(1, 3, REL_FALSE)
+        self.assertEqual(index.successors(1, REL_TRUE), [2])
+        self.assertEqual(index.successors(1, REL_FALSE), [3])
+        self.assertEqual(index.predecessors(2, REL_TRUE), [1])
+        self.assertEqual(index.predecessors(2, REL_FALSE), [])
+
+
+class TestDerivations(unittest.TestCase):
+    """ClosureEngine.derivations() finds a valid one-step derivation of every
+    fact the closure adds."""
+
+    def test_every_add_has_a_derivation(self):
+        for seed in range(40):
+            mgr = random_mgr(seed)
+            if mgr.closure()[2]:
+                continue
+            warm = mgr.warm_closure()
+            ids, engine = warm.ids, warm.engine
+            _, adds, _ = mgr.closure()
+            for _, _, (vd1, r, vd2) in adds:
+                i, j = ids.id_of(vd1), ids.id_of(vd2)
+                self.assertTrue(any(True for _ in engine.derivations(i, j, REL_CODES[r])),
+                                (seed, vd1, r, vd2))
+
+
+class TestClosureCache(unittest.TestCase):
+    """closure() results are cached by vdcm fingerprint and handed out as copies."""
+
+    def test_fingerprint_tracks_content(self):
+        m1 = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        m2 = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        self.assertEqual(m1.vdcm_fingerprint(), m2.vdcm_fingerprint())
+        m1.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        self.assertNotEqual(m1.vdcm_fingerprint(), m2.vdcm_fingerprint())
+        m2.add_aspect_level("B", "3", None)
+        self.assertNotEqual(m2.vdcm_fingerprint(),
+                            make_mgr({"A": ["1", "2"], "B": ["1", "2"]}).vdcm_fingerprint())
+
+    def test_hit_returns_copy(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.closure_cache = ClosureCache(maxsize=4)
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GTE)
+        closure, adds, _ = mgr.closure()
+        closure[NATURAL_ZERO][NATURAL_ZERO] = FALSE
+        adds.clear()
+        again, adds_again, _ = mgr.closure()
+        self.assertEqual(again[NATURAL_ZERO][NATURAL_ZERO], TRUE)
+        self.assertGreater(len(adds_again), 0)
+        self.assertEqual(len(mgr.closure_cache._entries), 1)
+
+    def test_bounded_and_on_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ClosureCache(maxsize=2, directory=tmp)
+            for seed in range(4):
+                mgr = random_mgr(seed)
+                mgr.closure_cache = cache
+                mgr.closure()
+            self.assertEqual(len(cache._entries), 2)
+            self.assertEqual(len(os.listdir(tmp)), 2)
+            # A fresh cache over the same directory serves the stored results
+            mgr.closure_cache = ClosureCache(maxsize=2, directory=tmp)
+            expected = mgr.reference_closure()[0]
+            self.assertEqual(mgr.closure_cache.get(mgr.closure_cache_key())[0], expected)
+
+    def test_disk_round_trip_with_collisions(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"], "C": ["1", "2"]})
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GTE)
+        mgr.set_rel("B", "1", "2", "C", "1", "2", GTE)
+        mgr.set_rel("A", "1", "2", "C", "1", "2", LT)
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr.closure_cache = ClosureCache(directory=tmp)
+            closure, adds, colls = mgr.closure()
+            self.assertTrue(colls)
+            cached = ClosureCache(directory=tmp).get(mgr.closure_cache_key())
+            self.assertEqual(cached[0], closure)
+            self.assertEqual(list(cached[1]), list(adds))
+            self.assertEqual(cached[2], colls)
+
+    def test_unreadable_file_is_a_miss(self):
+        mgr = random_mgr(3)
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr.closure_cache = ClosureCache(directory=tmp)
+            expected = mgr.closure()
+            key = mgr.closure_cache_key()
+            path = os.path.join(tmp, f"{key}.json")
+            with open(path, "rb") as f:
+                data = f.read()
+            digest, body = data.split(b"\n", 1)
+            forged = body.replace(b'"colls": []', b'"colls": [["DiffP", [99999], []]]')
+            for content in (b"", b"\x80\x04garbage", data[:-10],
+                            data.replace(b'"key": "', b'"key": "x'),
+                            hashlib.blake2b(forged, digest_size=16).hexdigest().encode() + b"\n" + forged):
+                with self.subTest(content=content[:20]):
+                    with open(path, "wb") as f:
+                        f.write(content)
+                    with self.assertLogs("eudoxa", level="WARNING"):
+                        self.assertIsNone(ClosureCache(directory=tmp).get(key))
+            # A miss recomputes and rewrites the entry
+            mgr.closure_cache = ClosureCache(directory=tmp)
+            self.assertEqual(mgr.closure()[0], expected[0])
+            self.assertIsNotNone(ClosureCache(directory=tmp).get(key))
+
+    def test_bounded_in_bytes(self):
+        mgrs = [random_mgr(seed) for seed in range(4)]
+        cache = ClosureCache()
+        for mgr in mgrs:
+            mgr.closure_cache = cache
+            mgr.closure()
+        size = cache._bytes
+        self.assertEqual(size, sum(map(cache._size, cache._entries.values())))
+        cache = ClosureCache(maxbytes=size - 1)
+        for mgr in mgrs:
+            mgr.closure_cache = cache
+            mgr.closure()
+        self.assertLess(len(cache._entries), 4)
+        self.assertLessEqual(cache._bytes, size - 1)
+        self.assertIn(mgrs[-1].closure_cache_key(), cache._entries)
+
+    def test_key_follows_runner_settings(self):
+        mgr = random_mgr(6, n_aspects=3, max_levels=4, n_relations=8)
+        mgr.closure_cache = ClosureCache()
+        keys = set()
+        for components, level_orders in itertools.product((True, False), repeat=2):
+            with self.subTest(components=components, level_orders=level_orders):
+                mgr.closure_components = components
+                mgr.closure_level_orders = level_orders
+                keys.add(mgr.closure_cache_key('python'))
+                _, adds, _ = mgr.closure('python')
+                cache, mgr.closure_cache = mgr.closure_cache, None
+                _, fresh, _ = mgr.closure('python')
+                mgr.closure_cache = cache
+                self.assertEqual(list(adds), list(fresh))
+        self.assertEqual(len(keys), 4)
+        self.assertEqual(len(mgr.closure_cache._entries), 4)
+
+    def test_shared_by_managers(self):
+        shared = EudoxaManager.closure_cache
+        EudoxaManager.closure_cache = ClosureCache()
+        try:
+            m1, m2 = random_mgr(5), random_mgr(5)
+            m1.closure()
+            stats = ClosureStats()
+            m2.closure(stats=stats)
+            self.assertTrue(stats.cached)
+            # An instance's own cache is not seen by other managers
+            m1.closure_cache = ClosureCache()
+            m1.closure()
+            self.assertEqual(len(m1.closure_cache._entries), 1)
+            self.assertEqual(len(EudoxaManager.closure_cache._entries), 1)
+        finally:
+            EudoxaManager.closure_cache = shared
+
+
+class TestVDiffIds(unittest.TestCase):
+    """Interned vdiff ids: ◬ is 0, ids are dense and inv is consistent."""
+
+    def test_ids(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["x", "y"]})
+        ids = mgr.vdiff_ids()
+        self.assertEqual(len(ids), 1 + 6 + 2)
+        self.assertEqual(ids.id_of(VDiff("A", "2", "2")), 0)
+        self.assertEqual(ids.vdiffs[ids.id_of(VDiff("B", "y", "x"))], VDiff("B", "y", "x"))
+        for i, vd in enumerate(ids.vdiffs):
+            self.assertEqual(ids.vdiffs[ids.inv[i]], _vdiff_key(vd.inv()))
+
+    def test_natural_zero_aliases(self):
+        mgr = make_mgr({"A": ["1", "2", "3"], "B": ["x", "y"]})
+        ids = mgr.vdiff_ids()
+        alias = ids.zeros[1][0]
+        self.assertGreaterEqual(alias, len(ids))
+        self.assertEqual(ids.labels[alias], VDiff("B", "x", "x"))
+        self.assertEqual(ids.real(alias), 0)
+        self.assertEqual(len(ids.labels), len(ids) + 5)
+
+    def test_ids_rebuilt_on_structure_change(self):
+        mgr = make_mgr({"A": ["1", "2"]})
+        ids = mgr.vdiff_ids()
+        self.assertIs(mgr.vdiff_ids(), ids)
+        mgr.add_aspect_level("A", "3", None)
+        self.assertIsNot(mgr.vdiff_ids(), ids)
+        self.assertEqual(len(mgr.vdiff_ids()), 7)
+
+    def test_encode(self):
+        mgr = make_mgr({"A": ["1", "2"], "B": ["1", "2"]})
+        mgr.set_rel("A", "1", "2", "B", "1", "2", GT)
+        ids = mgr.vdiff_ids()
+        codes = ids.encode(mgr.vdiff_comparison_matrix)
+        n = len(ids)
+        a12, b12 = ids.id_of(VDiff("A", "1", "2")), ids.id_of(VDiff("B", "1", "2"))
+        self.assertEqual(codes[a12 * n + b12], REL_TRUE)
+        self.assertEqual(codes[b12 * n + a12], REL_FALSE)
+        self.assertEqual(codes[0], REL_TRUE)   # ◬ ⊒ ◬
+
+
+class TestMirrorSymmetry(unittest.TestCase):
+    """A mirror-closed matrix is closed from one cell of each mirror pair."""
+
+    def make(self):
+        mgr = make_mgr({"A": ["1", "2", "3", "4"], "B": ["1", "2", "3"]})
+        for la, lb in (("1", "2"), ("2", "3"), ("3", "4")):
+            mgr.set_aspect_level_relation("A", la, lb, BT)
+        mgr.set_aspect_level_relation("B", "1", "2", EQ)
+        mgr.set_aspect_level_relation("B", "2", "3", BT)
+        return mgr
+
+    def run_engine(self, mgr, mirrored):
+        ids = mgr.vdiff_ids()
+        engine = ClosureEngine(ids, ids.encode(mgr.vdiff_comparison_matrix))
+        engine.stats = ClosureStats()
+        if mirrored:
+            events = list(engine.run())
+        else:
+            events = list(engine.propagate(list(engine.facts())))
+        return engine, events
+
+    def test_mirror_rules(self):
+        for rule, mirror in enumerate(MIRROR_RULES):
+            self.assertEqual(MIRROR_RULES[mirror], rule)
+
+    def test_mirror_closed(self):
+        mgr = self.make()
+        ids = mgr.vdiff_ids()
+        self.assertTrue(ids.mirror_closed(ids.encode(mgr.vdiff_comparison_matrix)))
+        mgr.set_rel("A", "1", "2", "B", "1", "3", GTE)
+        self.assertFalse(ids.mirror_closed(ids.encode(mgr.vdiff_comparison_matrix)))
+
+    def test_half_the_joins(self):
+        mgr = self.make()
+        full, full_events = self.run_engine(mgr, mirrored=False)
+        half, half_events = self.run_engine(mgr, mirrored=True)
+        self.assertEqual(half.codes, full.codes)
+        self.assertEqual(len(half_events), len(full_events))
+        self.assertTrue(mgr.vdiff_ids().mirror_closed(half.codes))
+        self.assertLess(sum(half.stats.attempts), 0.75 * sum(full.stats.attempts))
+
+    def test_matches_reference(self):
+        mgr = self.make()
+        ref_closure, ref_adds, ref_colls = mgr.reference_closure()
+        closure, adds, colls = mgr.closure()
+        self.assertFalse(colls or ref_colls)
+        self.assertEqual(closure, ref_closure)
+        self.assertEqual(add_cells(adds), add_cells(ref_adds))
+
+
 if __name__ == "__main__":
     unittest.main()
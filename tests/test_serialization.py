@@ -125,6 +125,37 @@ class TestSerialization(unittest.TestCase):
             set(mgr2.vdiff_comparison_matrix.keys())
         )
 
+    def test_vdcm_mirror_pairs_stored_once(self):
+        mgr = build_konsert_manager()
+        mgr.set_aspect_level_relation("Betyg", "VG", "G", "≻")
+        mgr.set_aspect_level_relation("Betyg", "G", "IG", "≻")
+        mgr.set_rel("Taxikostnad", "0", "600", "Konsert", "K+", "K-", "⊒")
+        d = mgr.to_dict()
+        self.assertEqual(d["__schema__"], 3)
+        # ◬ ⊒ Δ(G,VG) stands for its mirror Δ(VG,G) ⊒ ◬ as well
+        self.assertEqual(d["vdiff_comparison_mirrored"]["◬"]["Betyg|||G|||VG"], "⊒")
+        self.assertNotIn("Betyg|||VG|||G", d["vdiff_comparison_mirrored"])
+        self.assertEqual(d["vdiff_comparison_matrix"],
+                         {"Taxikostnad|||0|||600": {"Konsert|||K+|||K-": "⊒"}})
+        mgr2 = EudoxaManager.from_dict(d)
+        self.assertEqual(mgr.vdiff_comparison_matrix, mgr2.vdiff_comparison_matrix)
+
+    def test_vdcm_schema2_still_loads(self):
+        mgr = build_konsert_manager()
+        mgr.set_aspect_level_relation("Betyg", "VG", "G", "≻")
+        mgr.set_rel("Taxikostnad", "0", "600", "Konsert", "K+", "K-", "⊒")
+        d = mgr.to_dict()
+        serial = lambda vd: ("◬" if vd.natural_zero() else
+                             f"{vd.aspect_name}|||{vd.from_level}|||{vd.to_level}")
+        d["__schema__"] = 2
+        d["vdiff_comparison_matrix"] = {
+            serial(vd1): {serial(vd2): rel for vd2, rel in row.items()}
+            for vd1, row in mgr.vdiff_comparison_matrix.items()
+        }
+        d.pop("vdiff_comparison_mirrored")
+        mgr2 = EudoxaManager.from_dict(d)
+        self.assertEqual(mgr.vdiff_comparison_matrix, mgr2.vdiff_comparison_matrix)
+
 
 # -------------------------------------------------------------
 # TEST: Type validation in Aspect.add_level  (Step 1)
@@ -527,4 +558,151 @@ class TestTrySetAspectLevelRelation(unittest.TestCase):
 
         _, _, closure_colls = mgr.closure()
         self.assertGreater(len(closure_colls), 0,
-            "Closure must detect the transitive contradiction across three aspects")
\ No newline at end of file
+            "Closure must detect the transitive contradiction across three aspects")
+
+# -------------------------------------------------------------
+# TEST: Batch relation transactions
+# -------------------------------------------------------------
+
+class TestRelationBatch(unittest.TestCase):
+
+    def _grade_manager(self):
+        mgr = EudoxaManager()
+        mgr.add_aspect("Grade", "str")
+        for lvl in ("VG", "G", "IG", "U"):
+            mgr.add_aspect_level("Grade", lvl, None)
+        return mgr
+
+    def test_batch_equals_sequential_calls(self):
+        """A clean batch commits the same matrix and closure as one call per change."""
+        changes = [("VG", "G", eudoxa.BT), ("G", "IG", eudoxa.BT), ("IG", "U", eudoxa.EQ)]
+        seq = self._grade_manager()
+        for la, lb, rel in changes:
+            seq.try_set_aspect_level_relation("Grade", la, lb, rel)
+        mgr = self._grade_manager()
+        adds, colls, inferred_adds = mgr.try_set_aspect_level_relations("Grade", changes)
+        self.assertEqual(colls, [])
+        self.assertEqual(mgr.vdiff_comparison_matrix, seq.vdiff_comparison_matrix)
+        self.assertEqual(sorted(mgr.warm_closure().cells(), key=repr),
+                         sorted(seq.warm_closure().cells(), key=repr))
+        inferred = {(e[2][0].from_level, e[2][0].to_level) for e in inferred_adds}
+        self.assertIn(("VG", "IG"), inferred)
+
+    def test_collisions_name_their_change_and_nothing_is_committed(self):
+        import copy
+        mgr = self._grade_manager()
+        mgr.try_set_aspect_level_relation("Grade", "VG", "G", eudoxa.BT)
+        matrix_before = copy.deepcopy(mgr.vdiff_comparison_matrix)
+        cells_before = set(mgr.warm_closure().cells())
+        changes = [("G", "IG", eudoxa.BT),      # fine on its own
+                   ("IG", "VG", eudoxa.BT),     # cycle via VG>G>IG: inferred collision
+                   ("IG", "U", eudoxa.BT),      # fine
+                   ("G", "VG", eudoxa.BT)]      # direct contradiction of VG>G
+        adds, colls, inferred_adds = mgr.try_set_aspect_level_relations("Grade", changes)
+        self.assertEqual((adds, inferred_adds), ([], []))
+        self.assertEqual(sorted({k for k, _ in colls}), [3])   # staging stops at direct ones
+        self.assertEqual(mgr.vdiff_comparison_matrix, matrix_before)
+        self.assertEqual(set(mgr.warm_closure().cells()), cells_before)
+
+        adds, colls, _ = mgr.try_set_aspect_level_relations("Grade", changes[:3])
+        self.assertEqual(sorted({k for k, _ in colls}), [1])
+        self.assertEqual(mgr.vdiff_comparison_matrix, matrix_before)
+        self.assertEqual(set(mgr.warm_closure().cells()), cells_before)
+
+    def test_unset_in_batch_and_rollback(self):
+        mgr = self._grade_manager()
+        mgr.try_set_aspect_level_relations("Grade", [("VG", "G", eudoxa.BT),
+                                                     ("G", "IG", eudoxa.BT)])
+        import copy
+        matrix_before = copy.deepcopy(mgr.vdiff_comparison_matrix)
+        # Unset VG>G, then G>VG is fine; IG>G contradicts G>IG: whole batch undone
+        _, colls, _ = mgr.try_set_aspect_level_relations("Grade", [
+            ("VG", "G", eudoxa.UNDEFINED), ("G", "VG", eudoxa.BT), ("IG", "G", eudoxa.BT)])
+        self.assertEqual({k for k, _ in colls}, {2})
+        self.assertEqual(mgr.vdiff_comparison_matrix, matrix_before)
+        _, colls, _ = mgr.try_set_aspect_level_relations("Grade", [
+            ("VG", "G", eudoxa.UNDEFINED), ("G", "VG", eudoxa.BT)])
+        self.assertEqual(colls, [])
+        self.assertEqual(mgr.get_aspect_level_relation("Grade", "G", "VG"), eudoxa.BT)
+        cells = set(mgr.warm_closure().cells())
+        mgr.invalidate_closure()
+        self.assertEqual(set(mgr.warm_closure().cells()), cells)
+
+    def test_vdiff_order_batch(self):
+        mgr = EudoxaManager()
+        for name in ("X", "Y", "Z"):
+            mgr.add_aspect(name, "str")
+            mgr.add_aspect_level(name, "1", None)
+            mgr.add_aspect_level(name, "2", None)
+        x, y, z = (eudoxa.VDiff(a, "1", "2") for a in ("X", "Y", "Z"))
+        _, colls, _ = mgr.try_set_vdiff_order_relations(
+            [(x, y, eudoxa.GTE), (y, z, eudoxa.GTE), (z, x, eudoxa.GT)])
+        self.assertEqual({k for k, _ in colls}, {2})
+        self.assertEqual(mgr.get_vdiff_relation(x, y), eudoxa.UNDEFINED)
+        adds, colls, inferred_adds = mgr.try_set_vdiff_order_relations(
+            [(x, y, eudoxa.GTE), (y, z, eudoxa.GTE)])
+        self.assertEqual(colls, [])
+        self.assertEqual(len(adds), 2)
+        self.assertIn([x, eudoxa.TRUE, z], [e[2] for e in inferred_adds])
+
+    def test_preview_matches_batch_and_changes_nothing(self):
+        import copy
+        mgr = self._grade_manager()
+        mgr.try_set_aspect_level_relation("Grade", "VG", "G", eudoxa.BT)
+        matrix_before = copy.deepcopy(mgr.vdiff_comparison_matrix)
+        codes_before = bytes(mgr.warm_closure().engine.codes)
+        changes = [("G", "IG", eudoxa.BT), ("IG", "U", eudoxa.EQ)]
+        inferred, colls = mgr.preview_aspect_level_relations("Grade", changes)
+        self.assertEqual(colls, [])
+        self.assertEqual(mgr.vdiff_comparison_matrix, matrix_before)
+        self.assertEqual(bytes(mgr.warm_closure().engine.codes), codes_before)
+        _, _, inferred_adds = mgr.try_set_aspect_level_relations("Grade", changes)
+        # Same facts; the rule origins may differ with the join order
+        self.assertEqual(sorted(inferred.cells()), sorted(inferred_adds.cells()))
+
+    def test_preview_collisions_and_unsets(self):
+        mgr = self._grade_manager()
+        mgr.try_set_aspect_level_relations("Grade", [("VG", "G", eudoxa.BT),
+                                                     ("G", "IG", eudoxa.BT)])
+        cells_before = set(mgr.warm_closure().cells())
+        inferred, colls = mgr.preview_aspect_level_relations("Grade", [
+            ("IG", "U", eudoxa.BT), ("IG", "VG", eudoxa.BT)])
+        self.assertEqual((inferred, {k for k, _ in colls}), ([], {1}))
+        self.assertEqual(set(mgr.warm_closure().cells()), cells_before)
+        x, y = eudoxa.VDiff("Grade", "VG", "IG"), eudoxa.VDiff("Grade", "G", "U")
+        _, colls = mgr.preview_vdiff_order_relations([(x, y, eudoxa.GTE)])
+        self.assertEqual(colls, [])
+        with self.assertRaises(ValueError):
+            mgr.preview_vdiff_order_relations([(x, y, eudoxa.UNDEFINED)])
+        with self.assertRaises(ValueError):
+            mgr.preview_aspect_level_relations("Grade", [("VG", "X", eudoxa.BT)])
+        self.assertEqual(set(mgr.warm_closure().cells()), cells_before)
+
+
+class TestVdcmOverlay(unittest.TestCase):
+
+    def test_writes_are_staged_until_commit(self):
+        mgr = build_konsert_manager()
+        base = mgr.vdiff_comparison_matrix
+        before = {k: dict(row) for k, row in base.items()}
+        vg_g, g_ig = eudoxa.VDiff("Betyg", "VG", "G"), eudoxa.VDiff("Betyg", "G", "IG")
+        overlay = eudoxa.VdcmOverlay(base)
+        add, coll = eudoxa.set_vdiff_relation(overlay, vg_g, g_ig, eudoxa.TRUE)
+        self.assertEqual((add, coll), ([vg_g, eudoxa.TRUE, g_ig], None))
+        self.assertEqual(eudoxa.get_vdiff_relation(overlay, vg_g, g_ig), eudoxa.TRUE)
+        self.assertEqual(base, before)
+        self.assertEqual(list(overlay.changes()), [(vg_g, g_ig, eudoxa.TRUE)])
+        ids = mgr.vdiff_ids()
+        self.assertNotEqual(ids.encode(overlay), ids.encode(base))
+        overlay.discard()
+        self.assertEqual(ids.encode(overlay), ids.encode(base))
+        eudoxa.set_vdiff_relation(overlay, vg_g, g_ig, eudoxa.FALSE)
+        overlay.commit()
+        self.assertEqual(eudoxa.get_vdiff_relation(base, vg_g, g_ig), eudoxa.FALSE)
+        self.assertEqual(list(overlay.changes()), [])
+
+    def test_unknown_entry_raises(self):
+        overlay = eudoxa.VdcmOverlay(build_konsert_manager().vdiff_comparison_matrix)
+        with self.assertRaises(KeyError):
+            eudoxa.set_vdiff_relation(overlay, eudoxa.VDiff("Betyg", "VG", "G"),
+                                      eudoxa.VDiff("Nope", "a", "b"), eudoxa.TRUE)